@@ -2,11 +2,13 @@
 import asyncio
 import logging
 
-from quart import Quart
-import socketio
 from app.core.logging import LoggerManager
 
 def create_app():
+    # Web 框架在创建应用时才导入，导入 app.core 的子模块（如测试）不需要 Quart / Socket.IO
+    from quart import Quart, request
+    import socketio
+
     # 初始化日志系统，设置为DEBUG级别
     LoggerManager.initialize(log_level=logging.DEBUG)
     
@@ -19,6 +21,9 @@ def create_app():
     # 添加静态资源路由处理，禁用缓存
     @app.after_request
     async def add_no_cache_headers(response):
+        # 按内容 hash 寻址的封面可以长期缓存，不覆盖其缓存头
+        if request.path.startswith('/api/cover/'):
+            return response
         # 检查是否为静态资源请求
         content_type = response.headers.get('Content-Type', '')
         if content_type.startswith(('text/css', 'application/javascript', 'text/javascript', 'image/', 'font/')):
@@ -52,14 +57,18 @@ def create_app():
     # 注册 SocketIO 事件
     from .sockets.sync import register_socket_events
     register_socket_events(sio)
+    from .sockets.search import register_search_events
+    register_search_events(sio)
 
     # ============================= 新增：启动保底推送 =============================
     @app.before_serving
     async def startup():
         sio.start_force_sync()  # ← 关键！调用 sync.py 中的启动函数
+        sio.start_playlist_patches()  # 播放列表修改时推送 playlist_patch 增量事件
         
         # ============================= 新增：初始化同步管理器 =============================
         from app.core.player import player_manager
+        from app.core.player_commands import Command
         from app.core.sync_manager import get_sync_manager
         
         # 初始化同步管理器（单例模式）
@@ -75,8 +84,8 @@ def create_app():
             print(f"[App Startup] 文件: {playback_info['file']}")
             print(f"[App Startup] 位置: {playback_info['position']}秒")
             
-            # 尝试恢复播放
-            success = player_manager.restore_last_playback()
+            # 尝试恢复播放（由播放器命令队列执行）
+            success = await player_manager.commands.run(Command.CALL, player_manager.restore_last_playback)
             if success:
                 print("[App Startup] 成功恢复上次播放")
             else:
@@ -1,24 +1,37 @@
 # app/core/__init__.py
 # 暴露核心类的主要接口
-from .player import PlayerManager, PlayMode, Settings
-from .error_handler import PlayerErrorHandler
-from .logging import get_logger, error_logger, info_logger, debug_logger, player_logger
-from .sync_manager import get_sync_manager, SyncManager
-from .signal_handler import SignalHandler, signal_handler, get_signal_handler, register_cleanup_handler, unregister_cleanup_handler, is_shutting_down, default_player_cleanup
+# 按需导入：导入 app.core 的子模块（如 app.core.playlist）时不会连带导入 player，
+# 也就不会创建 player_manager（VLC 播放器、后台线程、退出清理处理器）
+import importlib
 
-__all__ = [
+_EXPORTS = {
     # 播放器相关
-    'PlayerManager', 'PlayMode', 'Settings',
-    
+    'PlayerManager': '.player', 'PlayMode': '.player', 'Settings': '.player',
+
     # 错误处理
-    'PlayerErrorHandler',
-    
+    'PlayerErrorHandler': '.error_handler',
+
     # 日志系统
-    'get_logger', 'error_logger', 'info_logger', 'debug_logger', 'player_logger',
-    
+    'get_logger': '.logging', 'error_logger': '.logging', 'info_logger': '.logging',
+    'debug_logger': '.logging', 'player_logger': '.logging',
+
     # 同步管理
-    'get_sync_manager', 'SyncManager',
-    
+    'get_sync_manager': '.sync_manager', 'SyncManager': '.sync_manager',
+
     # 信号处理
-    'SignalHandler', 'signal_handler', 'get_signal_handler', 'register_cleanup_handler', 'unregister_cleanup_handler', 'is_shutting_down', 'default_player_cleanup'
-]
\ No newline at end of file
+    'SignalHandler': '.signal_handler', 'signal_handler': '.signal_handler',
+    'get_signal_handler': '.signal_handler', 'register_cleanup_handler': '.signal_handler',
+    'unregister_cleanup_handler': '.signal_handler', 'is_shutting_down': '.signal_handler',
+    'default_player_cleanup': '.signal_handler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,231 @@
+# app/core/album_art.py
+"""
+专辑封面服务
+- 用 mutagen 提取封面（MP3/AIFF 的 ID3 APIC、FLAC 图片块、M4A covr、Ogg Vorbis/Opus METADATA_BLOCK_PICTURE），
+  每个文件（path + size + mtime）只提取一次，hash 记录在元数据缓存中，同一文件的并发请求共享同一次提取
+- 封面按内容 SHA-1 保存到磁盘（album_art/<前两位>/<hash>），相同封面只存一份
+- 缩略图在线程池中用 Pillow 生成（THUMBNAIL_SIZES），通过 /api/cover/<hash>/<size> 提供，
+  内容由 hash 决定，可以 immutable 长期缓存
+"""
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from mutagen import File as MutagenFile
+from mutagen.flac import Picture
+from PIL import Image
+
+from app.core.metadata_cache import metadata_cache
+from app.core.logging import player_logger
+
+# 提供的缩略图边长（像素），"original" 为原图
+THUMBNAIL_SIZES = (64, 128, 256, 512)
+# ID3 / FLAC 图片类型：封面（正面）
+_FRONT_COVER = 3
+
+
+def _pick_picture(pictures):
+    """优先选择类型为封面的图片"""
+    for picture in pictures:
+        if getattr(picture, "type", None) == _FRONT_COVER:
+            return picture
+    return pictures[0] if pictures else None
+
+
+def extract_cover(path: str) -> Optional[bytes]:
+    """从音频文件读取封面图片数据，没有封面或无法解析时返回 None"""
+    try:
+        audio = MutagenFile(path)
+    except Exception:
+        return None
+    if audio is None:
+        return None
+
+    # FLAC 图片块
+    picture = _pick_picture(getattr(audio, "pictures", None) or [])
+    if picture is not None:
+        return picture.data
+
+    tags = audio.tags
+    if tags is None:
+        return None
+    # ID3（MP3 / AIFF / WAV）
+    if hasattr(tags, "getall"):
+        picture = _pick_picture(tags.getall("APIC"))
+        return picture.data if picture is not None else None
+    # MP4 / M4A
+    covers = tags.get("covr")
+    if covers:
+        return bytes(covers[0])
+    # Ogg Vorbis / Opus
+    blocks = tags.get("metadata_block_picture")
+    if blocks:
+        try:
+            pictures = [Picture(base64.b64decode(block)) for block in blocks]
+        except Exception:
+            return None
+        picture = _pick_picture(pictures)
+        return picture.data if picture is not None else None
+    return None
+
+
+def sniff_mimetype(data: bytes) -> str:
+    """根据文件头判断图片类型"""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+class AlbumArtService:
+    """
+    专辑封面服务
+    - get_cover_hash(path)：提取（或读取缓存的）封面，返回内容 hash（访问音频文件，需在存储根线程池中调用）
+    - get_file(hash, size)：返回原图或缩略图在磁盘上的路径（缩略图不存在时生成）
+    """
+    # 生成缩略图的线程数
+    THUMBNAIL_WORKERS = 2
+    # 缩略图 JPEG 质量
+    JPEG_QUALITY = 85
+
+    def __init__(self, cache_dir: str = "album_art"):
+        self.cache_dir = cache_dir
+        self._extracting: Dict[str, Future] = {}
+        self._thumbnails: Dict[Tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stats = {"extracted": 0, "cached": 0, "thumbnails": 0}
+
+    # ============================= 存储 =============================
+    def blob_path(self, cover_hash: str, size="original") -> str:
+        name = cover_hash if size == "original" else f"{cover_hash}_{size}.jpg"
+        return os.path.join(self.cache_dir, cover_hash[:2], name)
+
+    def _store(self, data: bytes) -> str:
+        """按内容保存封面原图，返回 hash（已存在时不重复写入）"""
+        cover_hash = hashlib.sha1(data).hexdigest()
+        path = self.blob_path(cover_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return cover_hash
+
+    # ============================= 提取 =============================
+    def get_cover_hash(self, path: str) -> Optional[str]:
+        """音频文件封面的内容 hash，没有封面时返回 None"""
+        entry = metadata_cache.get(path)
+        if entry is None:
+            raise FileNotFoundError(path)
+        # 已记录的封面（原图被清理时重新提取）
+        if entry["cover"] == "" or (entry["cover"] and os.path.exists(self.blob_path(entry["cover"]))):
+            with self._lock:
+                self._stats["cached"] += 1
+            return entry["cover"] or None
+
+        with self._lock:
+            future = self._extracting.get(path)
+            owner = future is None
+            if owner:
+                future = self._extracting[path] = Future()
+
+        if not owner:
+            # 同一文件正在被其他请求提取，等待其结果
+            return future.result()
+
+        try:
+            data = extract_cover(path)
+            cover_hash = self._store(data) if data else None
+            # 封面 hash 记录在元数据缓存中（同样以 path + size + mtime 判断失效）
+            metadata_cache.set_cover(entry, cover_hash)
+            future.set_result(cover_hash)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._extracting.pop(path, None)
+
+        with self._lock:
+            self._stats["extracted"] += 1
+        if cover_hash:
+            # 在后台预先生成各尺寸缩略图
+            for size in THUMBNAIL_SIZES:
+                self._submit_thumbnail(cover_hash, size)
+        return cover_hash
+
+    def get_cover_bytes(self, path: str) -> Optional[bytes]:
+        """音频文件封面原图数据（兼容旧接口）"""
+        cover_hash = self.get_cover_hash(path)
+        if not cover_hash:
+            return None
+        with open(self.blob_path(cover_hash), "rb") as f:
+            return f.read()
+
+    # ============================= 缩略图 =============================
+    def _submit_thumbnail(self, cover_hash: str, size: int) -> Future:
+        key = (cover_hash, size)
+        with self._lock:
+            future = self._thumbnails.get(key)
+            if future is not None:
+                return future
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.THUMBNAIL_WORKERS, thread_name_prefix="album-art")
+            future = self._thumbnails[key] = self._pool.submit(self._make_thumbnail, cover_hash, size)
+        # 已完成的 future 会立即在当前线程调用回调，必须在释放锁之后注册
+        future.add_done_callback(lambda _: self._forget_thumbnail(key))
+        return future
+
+    def _forget_thumbnail(self, key: Tuple[str, int]):
+        with self._lock:
+            self._thumbnails.pop(key, None)
+
+    def _make_thumbnail(self, cover_hash: str, size: int) -> str:
+        path = self.blob_path(cover_hash, size)
+        if os.path.exists(path):
+            return path
+        with Image.open(self.blob_path(cover_hash)) as image:
+            image = image.convert("RGB")
+            image.thumbnail((size, size), Image.LANCZOS)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(tmp_path, "JPEG", quality=self.JPEG_QUALITY, optimize=True)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._stats["thumbnails"] += 1
+        return path
+
+    def get_file(self, cover_hash: str, size="original") -> Optional[str]:
+        """
+        原图或缩略图的磁盘路径（缩略图不存在时在线程池中生成并等待）
+
+        Returns:
+            Optional[str]: 路径，封面不存在时返回 None
+        """
+        if not os.path.exists(self.blob_path(cover_hash)):
+            return None
+        if size == "original":
+            return self.blob_path(cover_hash)
+        path = self.blob_path(cover_hash, size)
+        if os.path.exists(path):
+            return path
+        try:
+            return self._submit_thumbnail(cover_hash, size).result()
+        except Exception as e:
+            player_logger.warning(f"[AlbumArt] 生成缩略图失败 {cover_hash} {size}: {e}")
+            return self.blob_path(cover_hash)
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending_thumbnails=len(self._thumbnails))
+
+
+# 导出单例实例
+album_art = AlbumArtService()
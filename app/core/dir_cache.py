@@ -0,0 +1,172 @@
+# app/core/dir_cache.py
+"""
+目录列表缓存
+使用 os.scandir 读取目录（类型信息无需额外 stat），
+每个目录缓存一份按名称排序的快照，以目录 mtime 判断是否失效，分页直接切片快照
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
+
+from app.core.media_types import get_media_type, media_type_name, MEDIA_NONE
+
+
+class DirEntryInfo:
+    """目录项信息（只在返回页时转换为 dict）"""
+    __slots__ = ("name", "path", "is_dir", "size", "mtime", "media_type")
+
+    def __init__(self, name: str, path: str, is_dir: bool, size: int, mtime: float, media_type: int):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.media_type = media_type
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "type": "folder" if self.is_dir else "file",
+            "path": self.path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "media_type": media_type_name(self.media_type),
+        }
+
+
+class DirectorySnapshot:
+    """单个目录的排序快照"""
+    __slots__ = ("directory", "mtime_ns", "entries", "created_at")
+
+    def __init__(self, directory: str, mtime_ns: int, entries: List[DirEntryInfo]):
+        self.directory = directory
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+        self.created_at = time.time()
+
+
+class DirectoryListingCache:
+    """
+    目录列表缓存（LRU）
+    目录的 mtime 在增删条目时会变化，mtime 未变时直接复用快照
+    """
+
+    def __init__(self, max_dirs: int = 256):
+        self.max_dirs = max_dirs
+        self._snapshots: "OrderedDict[str, DirectorySnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scan(directory: str) -> List[DirEntryInfo]:
+        """scandir 读取目录并按名称排序"""
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                size, mtime = 0, 0.0
+                media_type = MEDIA_NONE
+                if not is_dir:
+                    media_type = get_media_type(entry.name)
+                    try:
+                        st = entry.stat()
+                        size, mtime = st.st_size, st.st_mtime
+                    except OSError:
+                        pass
+                entries.append(DirEntryInfo(entry.name, entry.path, is_dir, size, mtime, media_type))
+        entries.sort(key=lambda e: e.name)
+        return entries
+
+    def get_snapshot(self, directory: str) -> DirectorySnapshot:
+        """
+        获取目录快照（mtime 未变时使用缓存）
+
+        Raises:
+            FileNotFoundError / NotADirectoryError / PermissionError
+        """
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with self._lock:
+            snapshot = self._snapshots.get(directory)
+            if snapshot is not None and snapshot.mtime_ns == mtime_ns:
+                self._snapshots.move_to_end(directory)
+                return snapshot
+
+        snapshot = DirectorySnapshot(directory, mtime_ns, self._scan(directory))
+        with self._lock:
+            self._snapshots[directory] = snapshot
+            self._snapshots.move_to_end(directory)
+            while len(self._snapshots) > self.max_dirs:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def list_page(self, directory: str, page: int = 1, page_size: int = 10) -> Tuple[int, List[dict]]:
+        """
+        分页获取目录内容，只为当前页生成 dict
+
+        Returns:
+            tuple: (条目总数, 当前页条目)
+        """
+        snapshot = self.get_snapshot(directory)
+        start = (max(page, 1) - 1) * page_size
+        return len(snapshot.entries), [e.to_dict() for e in snapshot.entries[start:start + page_size]]
+
+    def list_tree(self, directory: str, depth: int = 2, max_entries: int = 500) -> Tuple[dict, int, bool]:
+        """
+        逐层（广度优先）展开多级目录，直到达到深度或条目数上限
+        已展开的文件夹带 children，未展开的文件夹不带（客户端需要时再请求）
+
+        Returns:
+            tuple: (根节点, 返回的条目数, 是否因条目数上限被截断)
+
+        Raises:
+            FileNotFoundError / NotADirectoryError / PermissionError（仅根目录）
+        """
+        root = {"name": os.path.basename(directory.rstrip("\\/")) or directory, "type": "folder", "path": directory}
+        queue = deque([(directory, root, 1)])
+        count = 0
+        truncated = False
+        while queue:
+            current, node, level = queue.popleft()
+            try:
+                snapshot = self.get_snapshot(current)
+            except OSError as e:
+                if node is root:
+                    raise
+                node["error"] = str(e)
+                continue
+            children = []
+            for entry in snapshot.entries:
+                if count >= max_entries:
+                    truncated = True
+                    node["truncated"] = True
+                    break
+                item = entry.to_dict()
+                count += 1
+                if entry.is_dir and level < depth:
+                    queue.append((entry.path, item, level + 1))
+                children.append(item)
+            node["children"] = children
+            if truncated:
+                break
+        return root, count, truncated
+
+    def peek(self, directory: str) -> Optional[DirectorySnapshot]:
+        """只读取缓存中的快照，不访问文件系统"""
+        with self._lock:
+            return self._snapshots.get(directory)
+
+    def invalidate(self, directory: Optional[str] = None):
+        """使指定目录（为空时全部）的快照失效"""
+        with self._lock:
+            if directory is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(directory, None)
+
+
+# 导出单例实例
+directory_cache = DirectoryListingCache()
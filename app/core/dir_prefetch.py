@@ -0,0 +1,115 @@
+# app/core/dir_prefetch.py
+"""
+目录预读
+打开一个文件夹后，在后台预先读取其子文件夹的列表快照和当前可见音频文件的标签摘要，
+下一次点击子文件夹或查看曲目信息时可以直接从内存 / 数据库返回
+"""
+import queue
+import threading
+from typing import List, Optional
+
+from app.core.dir_cache import directory_cache
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError
+from app.core.media_library import media_library
+from app.core.media_types import is_audio_file
+from app.core.logging import player_logger
+
+
+class DirectoryPrefetcher:
+    """
+    目录预读器（单个后台线程顺序执行，避免和用户请求争抢存储）
+    任务按路径去重，队列满时直接丢弃（预读只是优化，丢弃不影响正确性）
+    """
+    # 每次打开文件夹最多预读的子文件夹数
+    MAX_CHILD_DIRS = 32
+    # 每次最多预读标签的文件数
+    MAX_TAG_FILES = 200
+    # 等待中的预读任务上限
+    MAX_QUEUED = 256
+
+    def __init__(self):
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=self.MAX_QUEUED)
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"directories": 0, "tag_batches": 0, "tags_read": 0, "dropped": 0, "failed": 0}
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="dir-prefetch", daemon=True)
+            self._worker.start()
+
+    def _enqueue(self, kind: str, path: str, payload=None) -> bool:
+        key = (kind, path)
+        with self._lock:
+            if key in self._queued:
+                return False
+            try:
+                self._queue.put_nowait((kind, path, payload))
+            except queue.Full:
+                self._stats["dropped"] += 1
+                return False
+            self._queued.add(key)
+            self._ensure_worker()
+        return True
+
+    def prefetch_directory(self, directory: str, visible_files: Optional[List[dict]] = None):
+        """
+        预读 directory 的子文件夹列表和可见音频文件的标签
+
+        Args:
+            directory: 已打开的文件夹（其快照应已在缓存中）
+            visible_files: 当前返回给客户端的条目（ListDirectoryView 的 files）
+        """
+        snapshot = directory_cache.peek(directory)
+        if snapshot is not None:
+            child_dirs = [e.path for e in snapshot.entries if e.is_dir][:self.MAX_CHILD_DIRS]
+            for child in child_dirs:
+                cached = directory_cache.peek(child)
+                if cached is None:
+                    self._enqueue("dir", child)
+
+        if visible_files:
+            audio = [f["path"] for f in visible_files if f.get("type") == "file" and is_audio_file(f["path"])]
+            if audio:
+                self._enqueue("tags", directory, audio[:self.MAX_TAG_FILES])
+
+    def _run(self):
+        while True:
+            kind, path, payload = self._queue.get()
+            try:
+                if kind == "dir":
+                    io_scheduler.call(path, directory_cache.get_snapshot, path)
+                    self._stats["directories"] += 1
+                else:
+                    read = io_scheduler.call(path, media_library.ensure_tracks, payload)
+                    self._stats["tag_batches"] += 1
+                    self._stats["tags_read"] += read
+            except (StorageUnavailableError, OSError):
+                self._stats["failed"] += 1
+            except Exception as e:
+                self._stats["failed"] += 1
+                player_logger.warning(f"[DirPrefetch] 预读失败 {path}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard((kind, path))
+
+    def get_status(self) -> dict:
+        """预读统计"""
+        return dict(self._stats, queued=self._queue.qsize())
+
+
+def attach_tags(entries: List[dict]) -> List[dict]:
+    """为已入库的音频文件条目附加标签摘要（tags 字段，只查数据库）"""
+    audio = [e for e in entries if e.get("type") == "file" and is_audio_file(e.get("path", ""))]
+    if audio:
+        tracks = media_library.get_tracks([e["path"] for e in audio])
+        for entry in audio:
+            tags = tracks.get(entry["path"])
+            if tags is not None:
+                entry["tags"] = tags
+    return entries
+
+
+# 导出单例实例
+dir_prefetcher = DirectoryPrefetcher()
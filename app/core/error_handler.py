@@ -3,6 +3,7 @@ import traceback
 import os
 from quart import jsonify
 from app.core.logging import error_logger, debug_logger, get_logger
+from app.core.io_scheduler import StorageUnavailableError, StorageTimeoutError
 
 class PlayerErrorHandler:
     """
@@ -20,6 +21,8 @@ class PlayerErrorHandler:
         IndexError: (400, "Index out of range"),
         AttributeError: (500, "Attribute error occurred"),
         OSError: (500, "Operating system error"),
+        StorageUnavailableError: (503, "Storage unavailable"),
+        StorageTimeoutError: (504, "Storage timed out"),
     }
     
     @classmethod
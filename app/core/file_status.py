@@ -0,0 +1,228 @@
+# app/core/file_status.py
+"""
+文件存在性缓存
+播放列表中的本地文件在加入时登记，由后台线程分批（按存储根并行）重新检查，
+安装了 watchdog 时还会监听所在目录的增删事件；
+切歌时直接读取缓存判断，只对最终选中的文件再检查一次
+"""
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError
+from app.core.logging import player_logger
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog 为可选依赖，未安装时只使用后台定期检查
+    Observer = None
+    FileSystemEventHandler = object
+
+# 每个检查任务包含的文件数
+CHECK_CHUNK = 256
+
+
+def _exists_many(paths: List[str]) -> List[bool]:
+    return [os.path.exists(p) for p in paths]
+
+
+def check_paths_exist(paths: Iterable[str]) -> Dict[str, Optional[bool]]:
+    """
+    并行检查一批本地路径是否存在：按存储根分组、分块提交到各自的线程池
+    存储不可用的路径结果为 None
+    """
+    chunks: Dict[str, List[List[str]]] = {}
+    for path in dict.fromkeys(paths):
+        groups = chunks.setdefault(io_scheduler.root_of(path), [[]])
+        if len(groups[-1]) >= CHECK_CHUNK:
+            groups.append([])
+        groups[-1].append(path)
+
+    futures = []
+    result: Dict[str, Optional[bool]] = {}
+    for groups in chunks.values():
+        for chunk in groups:
+            try:
+                futures.append((chunk, io_scheduler.submit(chunk[0], _exists_many, chunk)))
+            except StorageUnavailableError:
+                result.update((p, None) for p in chunk)
+    for chunk, future in futures:
+        try:
+            result.update(zip(chunk, future.result(timeout=io_scheduler.DEFAULT_TIMEOUT)))
+        except Exception:
+            result.update((p, None) for p in chunk)
+    return result
+
+
+class _DirectoryEventHandler(FileSystemEventHandler):
+    """watchdog 事件：只更新已登记文件的状态"""
+
+    def __init__(self, cache: "FileStatusCache"):
+        super().__init__()
+        self._cache = cache
+
+    def on_created(self, event):
+        self._cache._on_fs_event(event.src_path, True)
+
+    def on_deleted(self, event):
+        self._cache._on_fs_event(event.src_path, False)
+
+    def on_moved(self, event):
+        self._cache._on_fs_event(event.src_path, False)
+        self._cache._on_fs_event(event.dest_path, True)
+
+
+class FileStatusCache:
+    """
+    文件存在性缓存
+    - track / untrack：登记或取消登记需要维护状态的文件（O(1)，可在持有播放列表锁时调用）
+    - get：读取缓存状态（True / False / None 表示尚未检查或存储不可用）
+    - check：立即重新检查单个文件并更新缓存
+    """
+    # 后台完整检查一轮的间隔（秒）
+    REVALIDATE_INTERVAL = 300.0
+    # 后台检查每批之间的停顿（秒），避免占满存储
+    BATCH_PAUSE = 0.05
+    # 最多监听的目录数
+    MAX_WATCHED_DIRS = 256
+
+    def __init__(self):
+        self._status: Dict[str, Optional[bool]] = {}
+        self._pending: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._observer = None
+        self._watched_dirs: Dict[str, object] = {}
+        self._last_sweep = time.time()
+
+    # ============================= 登记 =============================
+    def track(self, paths: Iterable[str]):
+        """登记文件，新文件的状态在后台尽快检查"""
+        with self._lock:
+            added = False
+            for path in paths:
+                if path not in self._status:
+                    self._status[path] = None
+                    self._pending[path] = None
+                    added = True
+            if added:
+                self._ensure_worker()
+                self._wakeup.set()
+
+    def untrack(self, paths: Iterable[str]):
+        with self._lock:
+            for path in paths:
+                self._status.pop(path, None)
+                self._pending.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._status.clear()
+            self._pending.clear()
+
+    # ============================= 查询 =============================
+    def get(self, path: str) -> Optional[bool]:
+        return self._status.get(path)
+
+    def check(self, path: str) -> bool:
+        """立即检查单个文件（存储不可用视为不存在），登记过的文件同时更新缓存"""
+        exists = io_scheduler.path_exists(path)
+        with self._lock:
+            if path in self._status:
+                self._status[path] = exists
+        return exists
+
+    def check_many(self, paths: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """并行检查一批文件，登记过的文件同时更新缓存"""
+        result = check_paths_exist(paths)
+        self._store(result)
+        return result
+
+    def _store(self, result: Dict[str, Optional[bool]]):
+        with self._lock:
+            for path, exists in result.items():
+                if path in self._status:
+                    self._status[path] = exists
+                    self._pending.pop(path, None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            values = list(self._status.values())
+        return {
+            "tracked": len(values),
+            "available": sum(1 for v in values if v is True),
+            "missing": sum(1 for v in values if v is False),
+            "unknown": sum(1 for v in values if v is None),
+            "watching": len(self._watched_dirs),
+        }
+
+    # ============================= 后台检查 =============================
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="file-status", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, self.REVALIDATE_INTERVAL - (time.time() - self._last_sweep))
+            self._wakeup.wait(timeout=timeout)
+            self._wakeup.clear()
+            try:
+                with self._lock:
+                    pending = list(self._pending)
+                if pending:
+                    self._check_in_batches(pending)
+                if time.time() - self._last_sweep >= self.REVALIDATE_INTERVAL:
+                    with self._lock:
+                        tracked = list(self._status)
+                    self._check_in_batches(tracked)
+                    self._last_sweep = time.time()
+                self._update_watches()
+            except Exception as e:
+                player_logger.warning(f"[FileStatus] 后台检查失败: {e}")
+
+    def _check_in_batches(self, paths: List[str]):
+        batch = CHECK_CHUNK * 4
+        for i in range(0, len(paths), batch):
+            self._store(check_paths_exist(paths[i:i + batch]))
+            time.sleep(self.BATCH_PAUSE)
+
+    # ============================= 目录监听（可选） =============================
+    def _update_watches(self):
+        """监听登记文件所在的目录（文件最多的 MAX_WATCHED_DIRS 个）"""
+        if Observer is None:
+            return
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for path in self._status:
+                directory = os.path.dirname(path)
+                counts[directory] = counts.get(directory, 0) + 1
+        wanted = set(sorted(counts, key=counts.get, reverse=True)[:self.MAX_WATCHED_DIRS])
+        if self._observer is None:
+            if not wanted:
+                return
+            self._observer = Observer()
+            self._observer.daemon = True
+            self._observer.start()
+        for directory in list(self._watched_dirs):
+            if directory not in wanted:
+                self._observer.unschedule(self._watched_dirs.pop(directory))
+        handler = _DirectoryEventHandler(self)
+        for directory in wanted - set(self._watched_dirs):
+            try:
+                self._watched_dirs[directory] = self._observer.schedule(handler, directory, recursive=False)
+            except (OSError, RuntimeError) as e:
+                player_logger.debug(f"[FileStatus] 无法监听目录 {directory}: {e}")
+
+    def _on_fs_event(self, path: str, exists: bool):
+        with self._lock:
+            if path in self._status:
+                self._status[path] = exists
+                self._pending.pop(path, None)
+
+
+# 导出单例实例
+file_status = FileStatusCache()
@@ -0,0 +1,312 @@
+# app/core/folder_source.py
+"""
+文件夹递归播放来源（play_source = 3）
+- 用 scandir 生成器按需遍历整个子树（每个文件夹先播放自身的文件，再依次进入子文件夹），
+  只在内存中保留一小段即将播放的曲目（窗口），开始播放 20 万个文件的目录树也不需要先完整遍历
+- 顺序模式按自然顺序遍历；随机模式每个文件夹的顺序由种子 + 文件夹路径确定（可重现），
+  并从较大的窗口中随机抽取
+- 游标记录生成器最后产出的文件，连同窗口和历史保存到 folder_source.json，重启后从游标处继续遍历
+"""
+import json
+import os
+import random
+import threading
+from bisect import bisect_right
+from typing import Iterator, List, Optional, Tuple
+
+from app.core.io_scheduler import io_scheduler
+from app.core.media_types import is_audio_file
+from app.core.track_list import natural_sort_key
+from app.core.logging import player_logger
+
+
+class FolderPlaySource:
+    """
+    文件夹递归播放来源（内部加锁）
+    next() / previous() 会访问文件系统，需在线程中调用
+    """
+    # 顺序模式的窗口大小
+    WINDOW = 32
+    # 随机模式的窗口大小（从中随机抽取下一首）
+    SHUFFLE_WINDOW = 512
+    # 保留的播放历史数（上一首）
+    MAX_HISTORY = 200
+    # 状态变化后延迟保存的时间（秒）
+    SAVE_DELAY = 2.0
+
+    def __init__(self, state_path: str = "folder_source.json"):
+        self.state_path = state_path
+        self.root: Optional[str] = None
+        self.shuffle = False
+        self._seed = 0
+        self._cursor: Optional[List[str]] = None
+        self._window: List[str] = []
+        self._history: List[str] = []
+        self._forward: List[str] = []
+        self._generator: Optional[Iterator[str]] = None
+        self._generated = 0
+        # 随机模式下窗口末尾的曲目已被选为下一首（peek_next 预测后 _take 不再重新抽取）
+        self._picked = False
+        self._lock = threading.RLock()
+        self._save_timer: Optional[threading.Timer] = None
+
+    # ============================= 遍历 =============================
+    def _list(self, directory: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """读取单个文件夹，返回按播放顺序排列的 ([(文件名, 路径)], [(子文件夹名, 路径)])"""
+        files, dirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            dirs.append((entry.name, entry.path))
+                        elif is_audio_file(entry.name):
+                            files.append((entry.name, entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            player_logger.debug(f"[FolderSource] 跳过无法读取的文件夹 {directory}: {e}")
+        for entries in (files, dirs):
+            entries.sort(key=lambda e: natural_sort_key(e[0]))
+            if self.shuffle:
+                random.Random(f"{self._seed}:{directory}").shuffle(entries)
+        return files, dirs
+
+    def _locate(self, entries: List[Tuple[str, str]], name: str) -> Tuple[int, bool]:
+        """
+        游标中的名称在本层的位置：(位置, 是否找到)
+        游标指向的文件 / 文件夹已被删除时，顺序模式按自然顺序定位到其后，随机模式从本层开头重新开始
+        """
+        for i, (entry_name, _) in enumerate(entries):
+            if entry_name == name:
+                return i, True
+        if self.shuffle:
+            return 0, False
+        keys = [natural_sort_key(entry_name) for entry_name, _ in entries]
+        return bisect_right(keys, natural_sort_key(name)), False
+
+    def _walk(self, directory: str, resume: Optional[List[str]]) -> Iterator[str]:
+        """
+        深度优先遍历 directory，resume 为相对路径分段时从该文件之后继续
+        每次只读取一个文件夹，内存中只保留当前路径上各层的列表
+        """
+        files, dirs = self._list(directory)
+        start_dir = 0
+        if resume is None:
+            start_file = 0
+        elif len(resume) == 1:
+            index, found = self._locate(files, resume[0])
+            start_file = index + 1 if found else index
+        else:
+            # 游标在子文件夹内：本层文件已播放过
+            start_file = len(files)
+            index, found = self._locate(dirs, resume[0])
+            if found:
+                yield from self._walk(dirs[index][1], resume[1:])
+                index += 1
+            start_dir = index
+        for _, path in files[start_file:]:
+            yield path
+        for _, path in dirs[start_dir:]:
+            yield from self._walk(path, None)
+
+    def _fill(self) -> bool:
+        """从生成器补充窗口，本轮已遍历完时返回 False（调用方持有 _lock）"""
+        if self._picked:
+            # 已选为下一首的曲目保持在窗口末尾
+            picked = self._window.pop()
+            try:
+                self._extend()
+            finally:
+                self._window.append(picked)
+            return True
+        return self._extend()
+
+    def _extend(self) -> bool:
+        """按遍历顺序追加到窗口末尾（调用方持有 _lock）"""
+        size = self.SHUFFLE_WINDOW if self.shuffle else self.WINDOW
+        if self._generator is None:
+            self._generator = self._walk(self.root, self._cursor)
+        for path in self._generator:
+            self._window.append(path)
+            self._generated += 1
+            self._cursor = os.path.relpath(path, self.root).split(os.sep)
+            if len(self._window) >= size:
+                return True
+        return bool(self._window)
+
+    def _restart(self):
+        """整个目录树已播放完：从头开始新的一轮（随机模式换新种子）"""
+        self._generator = None
+        self._cursor = None
+        if self.shuffle:
+            self._seed = random.getrandbits(32)
+
+    def _pick(self) -> int:
+        """窗口中下一首的位置（随机模式抽取一次后固定在末尾，调用方持有 _lock）"""
+        if not self.shuffle:
+            return 0
+        if not self._picked:
+            index = random.randrange(len(self._window))
+            self._window[index], self._window[-1] = self._window[-1], self._window[index]
+            self._picked = True
+        return len(self._window) - 1
+
+    def _take(self) -> Optional[str]:
+        """取出窗口中的下一首（调用方持有 _lock）"""
+        if len(self._window) < (self.SHUFFLE_WINDOW if self.shuffle else self.WINDOW) // 2:
+            self._fill()
+        if not self._window:
+            self._restart()
+            if not self._fill():
+                return None
+        path = self._window.pop(self._pick())
+        self._picked = False
+        return path
+
+    # ============================= 对外接口 =============================
+    def start(self, root: str, shuffle: bool = False) -> Optional[str]:
+        """
+        从 root 开始新的递归播放
+
+        Returns:
+            Optional[str]: 第一首，目录树中没有音频文件时返回 None
+        """
+        with self._lock:
+            self.root = os.path.abspath(root)
+            self.shuffle = shuffle
+            self._seed = random.getrandbits(32)
+            self._cursor = None
+            self._generator = None
+            self._generated = 0
+            self._window, self._history, self._forward = [], [], []
+            self._picked = False
+            return self._advance()
+
+    def _advance(self) -> Optional[str]:
+        """下一首：先回到上一首之前的位置，再从窗口中取（跳过已被删除的文件）"""
+        with self._lock:
+            skipped = 0
+            while True:
+                path = self._forward.pop() if self._forward else self._take()
+                if path is None:
+                    return None
+                if os.path.exists(path):
+                    break
+                skipped += 1
+                if skipped > self.SHUFFLE_WINDOW:
+                    return None
+            self._history.append(path)
+            del self._history[:-self.MAX_HISTORY]
+        self._schedule_save()
+        return path
+
+    def next(self) -> Optional[str]:
+        """下一首（在根目录所属的存储线程池中执行）"""
+        if self.root is None:
+            return None
+        return io_scheduler.call(self.root, self._advance)
+
+    def _peek(self) -> Optional[str]:
+        """
+        下一首是什么，但不取出（只补充窗口，不改变播放历史）；
+        需要开始新的一轮或下一首已被删除时返回 None，由 next() 处理
+        """
+        with self._lock:
+            if self._forward:
+                path = self._forward[-1]
+            else:
+                if len(self._window) < (self.SHUFFLE_WINDOW if self.shuffle else self.WINDOW) // 2:
+                    self._fill()
+                if not self._window:
+                    return None
+                path = self._window[self._pick()]
+        return path if os.path.exists(path) else None
+
+    def peek_next(self) -> Optional[str]:
+        """预测 next() 将返回的曲目（用于无缝切歌预加载，在根目录所属的存储线程池中执行）"""
+        if self.root is None:
+            return None
+        return io_scheduler.call(self.root, self._peek)
+
+    def previous(self) -> Optional[str]:
+        """上一首（历史中没有更早的曲目时返回 None）"""
+        with self._lock:
+            if len(self._history) < 2:
+                return None
+            self._forward.append(self._history.pop())
+            self._schedule_save()
+            return self._history[-1]
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "shuffle": self.shuffle,
+                "current": self._history[-1] if self._history else None,
+                "cursor": os.path.join(self.root, *self._cursor) if self.root and self._cursor else None,
+                "window": len(self._window),
+                "generated": self._generated,
+            }
+
+    # ============================= 持久化 =============================
+    def load(self):
+        """读取上次的遍历状态（生成器在下一次取曲目时从游标处重新创建）"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            player_logger.warning(f"[FolderSource] 文件夹播放状态读取失败: {e}")
+            return
+        with self._lock:
+            self.root = data.get("root")
+            self.shuffle = bool(data.get("shuffle", False))
+            self._seed = int(data.get("seed", 0))
+            self._cursor = data.get("cursor")
+            self._window = list(data.get("window", []))
+            self._history = list(data.get("history", []))
+            self._forward = list(data.get("forward", []))
+            self._generator = None
+            self._picked = False
+
+    def save(self):
+        """原子写入遍历状态（临时文件 + os.replace）"""
+        with self._lock:
+            if self.root is None:
+                return
+            data = {
+                "version": "1.0",
+                "root": self.root,
+                "shuffle": self.shuffle,
+                "seed": self._seed,
+                "cursor": self._cursor,
+                "window": self._window,
+                "history": self._history,
+                "forward": self._forward,
+            }
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.state_path)
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self._delayed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _delayed_save(self):
+        with self._lock:
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as e:
+            player_logger.error(f"[FolderSource] 文件夹播放状态保存失败: {e}")
+
+
+# 导出单例实例
+folder_source = FolderPlaySource()
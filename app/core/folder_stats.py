@@ -0,0 +1,255 @@
+# app/core/folder_stats.py
+"""
+文件夹统计
+后台低优先级线程递归汇总每个文件夹的总大小、媒体文件数和总时长（时长来自媒体库标签），
+每个文件夹只保存自身文件的统计和子文件夹列表，以目录 mtime 判断是否需要重新读取，
+子树汇总值在内存中自底向上累加
+"""
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError
+from app.core.media_library import media_library
+from app.core.media_types import get_media_type, MEDIA_NONE, MEDIA_AUDIO
+from app.core.logging import player_logger
+
+
+class _FolderNode:
+    """单个文件夹的统计（own_* 为自身文件，total_* 为整个子树）"""
+    __slots__ = ("mtime_ns", "children", "own_bytes", "own_media", "own_duration",
+                 "total_bytes", "total_media", "total_duration", "complete", "updated_at")
+
+    def __init__(self):
+        self.mtime_ns = -1
+        self.children: Tuple[str, ...] = ()
+        self.own_bytes = 0
+        self.own_media = 0
+        self.own_duration = 0.0
+        self.total_bytes = 0
+        self.total_media = 0
+        self.total_duration = 0.0
+        self.complete = False
+        self.updated_at = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "bytes": self.total_bytes,
+            "media_count": self.total_media,
+            "duration": round(self.total_duration, 2),
+            "complete": self.complete,
+        }
+
+
+class FolderStatsAggregator:
+    """
+    文件夹统计汇总器
+    - request(directory)：排队刷新 directory 的子树（同一文件夹 REFRESH_INTERVAL 秒内只刷新一次）
+    - get(directory)：读取已计算的统计（不访问文件系统）
+    目录 mtime 只在增删条目时变化，文件原地修改导致的大小变化会在该文件夹下次增删条目时更新
+    """
+    # 同一文件夹两次刷新的最小间隔（秒）
+    REFRESH_INTERVAL = 30.0
+    # 等待刷新的文件夹上限
+    MAX_QUEUED = 64
+    # 每处理多少个文件夹让出一次 CPU
+    YIELD_EVERY = 32
+
+    def __init__(self):
+        self._nodes: Dict[str, _FolderNode] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=self.MAX_QUEUED)
+        self._queued = set()
+        self._requested_at: Dict[str, float] = {}
+        self._worker: Optional[threading.Thread] = None
+
+    # ============================= 对外接口 =============================
+    def request(self, directory: str) -> bool:
+        """排队在后台刷新 directory 的统计，返回是否已加入队列"""
+        directory = os.path.abspath(directory)
+        now = time.time()
+        with self._lock:
+            if directory in self._queued or now - self._requested_at.get(directory, 0.0) < self.REFRESH_INTERVAL:
+                return False
+            try:
+                self._queue.put_nowait(directory)
+            except queue.Full:
+                return False
+            self._queued.add(directory)
+            self._requested_at[directory] = now
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="folder-stats", daemon=True)
+                self._worker.start()
+        return True
+
+    def get(self, directory: str) -> Optional[dict]:
+        """读取文件夹统计，尚未计算时返回 None"""
+        with self._lock:
+            node = self._nodes.get(os.path.abspath(directory))
+            return node.to_dict() if node is not None and node.mtime_ns >= 0 else None
+
+    def get_many(self, directories: List[str]) -> Dict[str, dict]:
+        """批量读取文件夹统计（只包含已计算的文件夹）"""
+        result = {}
+        with self._lock:
+            for directory in directories:
+                node = self._nodes.get(directory)
+                if node is not None and node.mtime_ns >= 0:
+                    result[directory] = node.to_dict()
+        return result
+
+    # ============================= 后台计算 =============================
+    def _run(self):
+        self._lower_priority()
+        while True:
+            directory = self._queue.get()
+            try:
+                self._refresh(directory)
+            except Exception as e:
+                player_logger.warning(f"[FolderStats] 统计失败 {directory}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(directory)
+
+    @staticmethod
+    def _lower_priority():
+        """尽量降低当前线程的调度优先级（仅 Linux 支持按线程设置）"""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+    @staticmethod
+    def _scan_own(directory: str) -> Tuple[int, List[str], int, List[str], List[Tuple[str, int]]]:
+        """
+        读取单个文件夹（在存储根线程池中执行）
+
+        Returns:
+            tuple: (mtime_ns, 子文件夹, 自身文件总字节数, 音频文件路径, [(媒体文件路径, 类型)])
+        """
+        mtime_ns = os.stat(directory).st_mtime_ns
+        children, audio, media = [], [], []
+        total_bytes = 0
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        children.append(entry.path)
+                        continue
+                    total_bytes += entry.stat().st_size
+                except OSError:
+                    continue
+                media_type = get_media_type(entry.name)
+                if media_type != MEDIA_NONE:
+                    media.append((entry.path, media_type))
+                    if media_type == MEDIA_AUDIO:
+                        audio.append(entry.path)
+        return mtime_ns, children, total_bytes, audio, media
+
+    def _refresh(self, root: str):
+        """
+        刷新 root 子树：mtime 未变的文件夹复用自身统计，只重新读取变化的文件夹，
+        然后自底向上重新累加子树汇总值，并更新已缓存的上级文件夹
+        """
+        # 先序遍历（只重新读取 mtime 变化的文件夹），倒序累加即为后序
+        order: List[str] = []
+        stack = [root]
+        processed = 0
+        while stack:
+            directory = stack.pop()
+            processed += 1
+            if processed % self.YIELD_EVERY == 0:
+                time.sleep(0.001)
+            with self._lock:
+                node = self._nodes.get(directory)
+            try:
+                mtime_ns = io_scheduler.call(directory, lambda d=directory: os.stat(d).st_mtime_ns)
+                if node is None or node.mtime_ns != mtime_ns:
+                    node = self._update_own(directory, node)
+            except StorageUnavailableError as e:
+                player_logger.debug(f"[FolderStats] 存储不可用，停止统计 {root}: {e}")
+                return
+            except OSError:
+                # 文件夹已删除或无权限：按空文件夹处理
+                self._remove_subtree(directory)
+                continue
+            order.append(directory)
+            stack.extend(node.children)
+
+        with self._lock:
+            for directory in reversed(order):
+                self._sum_node(directory)
+            self._propagate_up(root)
+
+    def _update_own(self, directory: str, node: Optional[_FolderNode]) -> _FolderNode:
+        """重新读取文件夹自身的文件统计（时长从媒体库已入库的标签读取）"""
+        mtime_ns, children, own_bytes, audio, media = io_scheduler.call(directory, self._scan_own, directory)
+        duration = 0.0
+        if audio:
+            duration = sum((t["duration"] or 0.0 for t in media_library.get_tracks(audio).values()), 0.0)
+        new_node = _FolderNode()
+        new_node.mtime_ns = mtime_ns
+        new_node.children = tuple(children)
+        new_node.own_bytes = own_bytes
+        new_node.own_media = len(media)
+        new_node.own_duration = duration
+        new_node.updated_at = time.time()
+        with self._lock:
+            if node is not None:
+                # 已删除的子文件夹连同其子树一起移除
+                removed = set(node.children) - set(children)
+                for child in removed:
+                    self._remove_subtree_locked(child)
+                new_node.total_bytes, new_node.total_media, new_node.total_duration = (
+                    node.total_bytes, node.total_media, node.total_duration
+                )
+            self._nodes[directory] = new_node
+        return new_node
+
+    def _sum_node(self, directory: str):
+        """累加单个文件夹的子树汇总值（调用方持有 _lock，子文件夹须已累加）"""
+        node = self._nodes.get(directory)
+        if node is None:
+            return
+        total_bytes, total_media, total_duration = node.own_bytes, node.own_media, node.own_duration
+        complete = True
+        for child in node.children:
+            child_node = self._nodes.get(child)
+            if child_node is None:
+                complete = False
+                continue
+            total_bytes += child_node.total_bytes
+            total_media += child_node.total_media
+            total_duration += child_node.total_duration
+            complete = complete and child_node.complete
+        node.total_bytes, node.total_media, node.total_duration = total_bytes, total_media, total_duration
+        node.complete = complete
+
+    def _propagate_up(self, directory: str):
+        """子树变化后，重新累加已缓存的各级上级文件夹（调用方持有 _lock）"""
+        parent = os.path.dirname(directory)
+        while parent and parent != directory and parent in self._nodes:
+            self._sum_node(parent)
+            directory, parent = parent, os.path.dirname(parent)
+
+    def _remove_subtree(self, directory: str):
+        with self._lock:
+            self._remove_subtree_locked(directory)
+
+    def _remove_subtree_locked(self, directory: str):
+        stack = [directory]
+        while stack:
+            node = self._nodes.pop(stack.pop(), None)
+            if node is not None:
+                stack.extend(node.children)
+
+    def get_status(self) -> dict:
+        """汇总器状态"""
+        with self._lock:
+            return {"folders": len(self._nodes), "queued": self._queue.qsize()}
+
+
+# 导出单例实例
+folder_stats = FolderStatsAggregator()
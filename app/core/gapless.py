@@ -0,0 +1,192 @@
+# app/core/gapless.py
+"""
+无缝自动切歌
+当前曲目剩余 PRELOAD_AHEAD 秒时用 get_next_file() 预测下一首，在备用 MediaPlayer 中创建并预解析 vlc.Media；
+剩余时间小于启动提前量时让备用播放器开始播放，并把它换成当前播放器（旧播放器播完最后一点后停止），
+不再经过 EndReached → Timer → set_file → play 的重新打开流程。
+启动提前量按实测的启动延迟（play() 到 MediaPlayerPlaying）自适应调整，
+每次交接记录间隙：新播放器开始播放时间 - 旧播放器播放结束时间（负数表示有重叠）
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import vlc
+
+from app.core.media_types import is_audio_file
+from app.core.player_commands import Command
+from app.core.logging import player_logger
+
+
+class GaplessPlayback:
+    """
+    无缝切歌（单个后台线程监视播放进度）
+    只用于音频文件；预测失效（手动切歌、播放模式或来源改变）时重新预测
+    """
+    # 剩余多少秒时预测并预加载下一首
+    PRELOAD_AHEAD = 15.0
+    # 预解析超时（毫秒）
+    PARSE_TIMEOUT_MS = 3000
+    # 初始启动提前量（秒）及其上下限
+    DEFAULT_LEAD = 0.25
+    MIN_LEAD = 0.05
+    MAX_LEAD = 1.0
+    # 接近结尾时 / 平时的检查间隔（秒）
+    FAST_POLL = 0.02
+    SLOW_POLL = 0.5
+    # 保留的交接记录数
+    MAX_RECORDS = 100
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.standby = vlc.MediaPlayer()
+        self.lead = self.DEFAULT_LEAD
+        self._prepared: Optional[tuple] = None  # (预测条件, 下一首路径)
+        self._handoff: Optional[dict] = None
+        self._records: "deque[dict]" = deque(maxlen=self.MAX_RECORDS)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.manager.settings.get_gapless()
+
+    def start(self):
+        """启动进度监视线程"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="gapless", daemon=True)
+            self._worker.start()
+
+    # ============================= 预测与交接 =============================
+    def _conditions(self) -> tuple:
+        """预测依赖的条件，任一变化时已预加载的下一首失效"""
+        m = self.manager
+        return (m.track_switch.seq, m.play_mode, m.settings.get_play_source())
+
+    def _prepare(self, conditions: tuple):
+        """预测下一首并在备用播放器中预加载"""
+        m = self.manager
+        try:
+            # 只预测，不推进文件夹遍历 / 随机顺序；在命令队列中执行，不与切歌同时读写播放状态
+            path = m.commands.call(Command.CALL, m.get_next_file, 1, True)
+        except ValueError:
+            path = None
+        if not path or not is_audio_file(path):
+            self._prepared = (conditions, None)
+            return
+        media = vlc.Media(path)
+        # 异步预解析（读取文件头和时长），交接时 demux 不必从头探测
+        media.parse_with_options(vlc.MediaParseFlag.local, self.PARSE_TIMEOUT_MS)
+        # 上一次交接换下的旧播放器由命令队列 stop()，设置媒体也排在命令队列中，不会与尚未完成的 stop() 同时操作它
+        m.commands.call(Command.CALL, self.standby.set_media, media)
+        self._prepared = (conditions, path)
+        player_logger.debug(f"[Gapless] 已预加载下一首: {path}")
+
+    def _hand_over(self, seq: int, path: str):
+        """让备用播放器开始播放，并换成当前播放器（通过命令队列执行，预加载之后已切歌时放弃）"""
+        m = self.manager
+        standby = self.standby
+        standby.audio_set_volume(m.get_volume())
+        started = time.perf_counter()
+        with self._lock:
+            self._handoff = {"file": path, "started": started, "playing_at": None, "ended_at": None}
+        self._prepared = None
+        old = m.commands.call(Command.HANDOFF, seq, path, standby, started)
+        if old is None:
+            with self._lock:
+                self._handoff = None
+            return
+        self.standby = old
+        player_logger.info(f"[Gapless] 无缝切换 → {path}")
+
+    def _run(self):
+        while True:
+            delay = self.SLOW_POLL
+            try:
+                delay = self._tick()
+            except Exception as e:
+                player_logger.error(f"[Gapless] 无缝切歌检查失败: {e}")
+            time.sleep(delay)
+
+    def _tick(self) -> float:
+        m = self.manager
+        if not self.enabled or m.player.get_state() != vlc.State.Playing:
+            return self.SLOW_POLL
+        length, position = m.player.get_length(), m.player.get_time()
+        if length <= 0 or position < 0:
+            return self.SLOW_POLL
+        remaining = (length - position) / 1000.0
+        if remaining > self.PRELOAD_AHEAD:
+            return min(self.SLOW_POLL, remaining - self.PRELOAD_AHEAD)
+
+        conditions = self._conditions()
+        if self._prepared is None or self._prepared[0] != conditions:
+            if self.standby.get_state() == vlc.State.Playing:
+                # 当前曲目很短：换下的旧播放器还在播放最后一点，播完停止后才能复用
+                return self.FAST_POLL
+            self._prepare(conditions)
+        path = self._prepared[1]
+        if path and remaining <= self.lead:
+            self._hand_over(conditions[0], path)
+            return self.SLOW_POLL
+        return self.FAST_POLL
+
+    # ============================= VLC 事件 =============================
+    def on_playing(self, player):
+        """交接后的新播放器开始播放：记录启动延迟并调整提前量"""
+        with self._lock:
+            handoff = self._handoff
+            if handoff is None or player is not self.manager.player or handoff["playing_at"] is not None:
+                return
+            handoff["playing_at"] = time.perf_counter()
+            startup = handoff["playing_at"] - handoff["started"]
+            self.lead = min(self.MAX_LEAD, max(self.MIN_LEAD, 0.7 * self.lead + 0.3 * startup))
+            self._finish_record(handoff)
+
+    def on_end_reached(self, player) -> bool:
+        """
+        播放器播放结束
+
+        Returns:
+            bool: 是否是已完成交接的旧播放器（是则不再触发自动下一首）
+        """
+        if player is self.manager.player:
+            return False
+        with self._lock:
+            handoff = self._handoff
+            if handoff is not None and handoff["ended_at"] is None:
+                handoff["ended_at"] = time.perf_counter()
+                self._finish_record(handoff)
+        # 不能在 VLC 事件回调中直接操作播放器；由命令队列停止，之后复用它预加载下一首时排在 stop() 之后
+        self.manager.commands.submit(Command.CALL, player.stop)
+        return True
+
+    def _finish_record(self, handoff: dict):
+        """交接的两个时间都已记录时保存间隙（调用方持有 _lock）"""
+        if handoff["playing_at"] is None or handoff["ended_at"] is None:
+            return
+        self._records.append({
+            "file": handoff["file"],
+            "startup_ms": round((handoff["playing_at"] - handoff["started"]) * 1000, 1),
+            "gap_ms": round((handoff["playing_at"] - handoff["ended_at"]) * 1000, 1),
+        })
+        self._handoff = None
+
+    def get_stats(self) -> dict:
+        """最近交接的间隙统计（毫秒，负数表示重叠）"""
+        with self._lock:
+            records = list(self._records)
+            lead = self.lead
+        gaps = sorted(r["gap_ms"] for r in records)
+        return {
+            "enabled": self.enabled,
+            "lead_ms": round(lead * 1000, 1),
+            "handoffs": len(records),
+            "gap_ms": {
+                "last": records[-1]["gap_ms"] if records else None,
+                "p50": gaps[len(gaps) // 2] if gaps else None,
+                "max": gaps[-1] if gaps else None,
+            },
+            "recent": records[-10:],
+        }
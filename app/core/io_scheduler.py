@@ -0,0 +1,260 @@
+# app/core/io_scheduler.py
+"""
+按存储根（挂载点 / 盘符 / 网络共享）隔离的 I/O 调度器
+每个存储根有独立的有界线程池，调用带超时，连续失败后熔断，
+一个卡死的 NAS 只会影响访问它的请求，不会拖慢播放控制
+"""
+import asyncio
+import errno
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from app.core.logging import player_logger
+
+
+class StorageUnavailableError(OSError):
+    """存储不可用（熔断中、排队已满或调用超时）"""
+
+
+class StorageTimeoutError(StorageUnavailableError):
+    """存储调用超时"""
+
+
+# 这些错误说明文件本身有问题，不代表存储故障，不计入熔断
+_NON_STORAGE_ERRORS = (FileNotFoundError, NotADirectoryError, IsADirectoryError, PermissionError, FileExistsError)
+
+
+class _StorageRoot:
+    """单个存储根的线程池和熔断状态"""
+    __slots__ = ("root", "executor", "lock", "pending", "failures", "failed_at", "opened_at", "half_open_probe",
+                 "total_calls", "total_failures", "total_timeouts")
+
+    def __init__(self, root: str, max_workers: int):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"io[{root}]")
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.failures = 0
+        self.failed_at = 0.0  # 最近一次失败的时间
+        self.opened_at: Optional[float] = None
+        self.half_open_probe = False
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_timeouts = 0
+
+
+class IOScheduler:
+    """
+    I/O 调度器
+    - submit / call / run：在路径所属存储根的线程池中执行函数
+    - 连续 FAILURE_THRESHOLD 次超时或存储错误后熔断 RESET_TIMEOUT 秒，熔断期间直接失败
+    - 熔断到期后放行一次探测调用，成功则恢复
+    """
+    DEFAULT_TIMEOUT = 10.0
+    MAX_WORKERS_PER_ROOT = 4
+    MAX_PENDING_PER_ROOT = 64
+    FAILURE_THRESHOLD = 3
+    RESET_TIMEOUT = 30.0
+    MOUNT_REFRESH_INTERVAL = 60.0
+
+    def __init__(self):
+        self._roots: Dict[str, _StorageRoot] = {}
+        self._lock = threading.Lock()
+        self._mountpoints: List[str] = []
+        self._mounts_loaded_at = 0.0
+
+    # ============================= 存储根识别 =============================
+    def _get_mountpoints(self) -> List[str]:
+        """获取挂载点列表（按长度倒序，便于最长前缀匹配），定期刷新"""
+        now = time.time()
+        if not self._mountpoints or now - self._mounts_loaded_at > self.MOUNT_REFRESH_INTERVAL:
+            try:
+                mounts = {p.mountpoint for p in psutil.disk_partitions(all=True)}
+            except Exception as e:
+                player_logger.warning(f"[IOScheduler] 获取挂载点失败: {e}")
+                mounts = set()
+            mounts.add(os.sep)
+            self._mountpoints = sorted(mounts, key=len, reverse=True)
+            self._mounts_loaded_at = now
+        return self._mountpoints
+
+    def root_of(self, path: str) -> str:
+        """
+        获取路径所属的存储根（只做字符串处理，不访问文件系统）
+        Windows 为盘符或 \\\\server\\share，其他系统为最长匹配的挂载点
+        """
+        path = os.path.abspath(path)
+        if os.name == 'nt':
+            drive, _ = os.path.splitdrive(path)
+            return drive.upper() if drive else path
+        for mount in self._get_mountpoints():
+            if path == mount or path.startswith(mount.rstrip(os.sep) + os.sep):
+                return mount
+        return os.sep
+
+    def _get_root(self, path: str) -> _StorageRoot:
+        root = self.root_of(path)
+        state = self._roots.get(root)
+        if state is None:
+            with self._lock:
+                state = self._roots.get(root)
+                if state is None:
+                    state = _StorageRoot(root, self.MAX_WORKERS_PER_ROOT)
+                    self._roots[root] = state
+        return state
+
+    # ============================= 熔断 =============================
+    def _acquire(self, state: _StorageRoot):
+        """提交前检查熔断和排队上限"""
+        with state.lock:
+            if state.opened_at is not None:
+                if time.time() - state.opened_at < self.RESET_TIMEOUT or state.half_open_probe:
+                    raise StorageUnavailableError(f"存储暂时不可用（已熔断）: {state.root}")
+                # 熔断到期，放行一次探测调用
+                state.half_open_probe = True
+            if state.pending >= self.MAX_PENDING_PER_ROOT:
+                raise StorageUnavailableError(f"存储繁忙（排队已满）: {state.root}")
+            state.pending += 1
+            state.total_calls += 1
+
+    def _record(self, state: _StorageRoot, ok: bool, timeout: bool = False, issued: Optional[float] = None):
+        """
+        记录调用结果，更新熔断状态
+
+        Args:
+            issued: 调用的提交时间；成功的调用如果在最近一次失败之前提交（例如已超时的调用迟到完成），
+                    不能说明存储已恢复，不重置熔断
+        """
+        with state.lock:
+            if ok:
+                if issued is not None and issued < state.failed_at:
+                    return
+                if state.opened_at is not None:
+                    player_logger.info(f"[IOScheduler] 存储已恢复: {state.root}")
+                state.failures = 0
+                state.opened_at = None
+                state.half_open_probe = False
+                return
+            state.failures += 1
+            state.failed_at = time.time()
+            state.total_failures += 1
+            if timeout:
+                state.total_timeouts += 1
+            if state.half_open_probe or state.failures >= self.FAILURE_THRESHOLD:
+                if state.opened_at is None or state.half_open_probe:
+                    player_logger.warning(f"[IOScheduler] 存储熔断 {self.RESET_TIMEOUT:.0f} 秒: {state.root}")
+                state.opened_at = time.time()
+                state.half_open_probe = False
+
+    def _release(self, state: _StorageRoot):
+        with state.lock:
+            state.pending -= 1
+
+    # ============================= 调用接口 =============================
+    def submit(self, path: str, func: Callable, *args, **kwargs) -> Future:
+        """
+        在路径所属存储根的线程池中执行 func，返回 concurrent.futures.Future
+        函数抛出的存储错误（非文件本身错误）计入熔断
+
+        Raises:
+            StorageUnavailableError: 存储熔断中或排队已满
+        """
+        state = self._get_root(path)
+        self._acquire(state)
+        issued = time.time()
+
+        def task():
+            try:
+                result = func(*args, **kwargs)
+            except _NON_STORAGE_ERRORS:
+                self._record(state, ok=True, issued=issued)
+                raise
+            except OSError:
+                self._record(state, ok=False)
+                raise
+            except Exception:
+                self._record(state, ok=True, issued=issued)
+                raise
+            self._record(state, ok=True, issued=issued)
+            return result
+
+        try:
+            future = state.executor.submit(task)
+        except RuntimeError:
+            self._release(state)
+            raise StorageUnavailableError(f"存储线程池已关闭: {state.root}")
+        # 排队中被取消（超时、请求断开）的调用不会执行 task，在 Future 完成时统一释放排队名额
+        future.add_done_callback(lambda _: self._release(state))
+        return future
+
+    def _on_timeout(self, path: str, future: Future, timeout: float):
+        """调用超时：计入熔断并抛出 StorageTimeoutError（卡住的线程留在该存储根的线程池里）"""
+        future.cancel()
+        state = self._get_root(path)
+        self._record(state, ok=False, timeout=True)
+        raise StorageTimeoutError(errno.ETIMEDOUT, f"存储访问超时（{timeout:.1f}秒）: {state.root}")
+
+    def call(self, path: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """同步调用（用于后台线程），超时抛出 StorageTimeoutError"""
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        future = self.submit(path, func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._on_timeout(path, future, timeout)
+
+    async def run(self, path: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """异步调用（用于路由），超时抛出 StorageTimeoutError"""
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        future = self.submit(path, func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._on_timeout(path, future, timeout)
+
+    def path_exists(self, path: str, timeout: Optional[float] = None) -> bool:
+        """带超时的 os.path.exists，存储不可用时视为不存在"""
+        try:
+            return bool(self.call(path, os.path.exists, path, timeout=timeout))
+        except StorageUnavailableError:
+            return False
+
+    def get_status(self) -> List[dict]:
+        """各存储根的状态"""
+        now = time.time()
+        result = []
+        for root, state in list(self._roots.items()):
+            with state.lock:
+                if state.opened_at is None:
+                    circuit = "closed"
+                elif now - state.opened_at >= self.RESET_TIMEOUT:
+                    circuit = "half_open"
+                else:
+                    circuit = "open"
+                result.append({
+                    "root": root,
+                    "circuit": circuit,
+                    "pending": state.pending,
+                    "consecutive_failures": state.failures,
+                    "total_calls": state.total_calls,
+                    "total_failures": state.total_failures,
+                    "total_timeouts": state.total_timeouts,
+                })
+        return result
+
+    def shutdown(self):
+        """关闭所有线程池（不等待卡住的调用）"""
+        with self._lock:
+            for state in self._roots.values():
+                state.executor.shutdown(wait=False)
+            self._roots.clear()
+
+
+# 导出单例实例
+io_scheduler = IOScheduler()
@@ -0,0 +1,429 @@
+# app/core/media_library.py
+"""
+媒体库标签索引
+后台扫描索引目录，元数据缓存中没有的文件在进程池中用 TinyTag 读取音频标签（结果同时写回元数据缓存），
+结果保存在磁盘上的 SQLite（FTS5）数据库中，支持 artist:/album:/title: 字段查询
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.media_types import is_audio_file
+from app.core.metadata_cache import metadata_cache, read_metadata
+from app.core.logging import player_logger
+
+# 支持的字段限定词
+QUERY_FIELDS = ("artist", "album", "title")
+_FIELD_QUERY_RE = re.compile(r'(?:^|\s)(artist|album|title):', re.IGNORECASE)
+_QUERY_TOKEN_RE = re.compile(r'(?:(artist|album|title):)?(?:"([^"]*)"|(\S+))', re.IGNORECASE)
+
+
+def _tag_record(path: str, meta: dict) -> Tuple[str, str, str, str, float, int]:
+    """元数据缓存记录 -> (path, title, artist, album, duration, bitrate)"""
+    return (path, meta["title"], meta["artist"], meta["album"], meta["duration"], meta["bitrate"])
+
+
+def is_field_query(keyword: str) -> bool:
+    """判断搜索关键词中是否包含字段限定（artist: / album: / title:）"""
+    return bool(_FIELD_QUERY_RE.search(keyword))
+
+
+def parse_query(keyword: str) -> List[Tuple[Optional[str], str]]:
+    """
+    解析字段查询
+
+    例如 'artist:周杰伦 album:"叶惠美" 晴天'
+    -> [("artist", "周杰伦"), ("album", "叶惠美"), (None, "晴天")]
+    """
+    terms = []
+    for field, quoted, bare in _QUERY_TOKEN_RE.findall(keyword):
+        term = quoted if quoted else bare
+        if term:
+            terms.append((field.lower() if field else None, term))
+    return terms
+
+
+class MediaLibrary:
+    """
+    媒体库（单例）
+    以 path 为键，mtime + size 判断文件是否变化，重新扫描时只读取变化文件的标签
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    # 每批写入数据库的记录数
+    WRITE_BATCH_SIZE = 500
+    # 按路径批量查询时每条 SQL 的参数个数（SQLite 默认上限 999）
+    LOOKUP_BATCH_SIZE = 500
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, db_path: str = "media_library.db"):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._fts_enabled = False
+        self._scan_thread: Optional[threading.Thread] = None
+        self._status = {
+            "state": "idle",  # idle / scanning / done / error
+            "root": None,
+            "scanned": 0,
+            "changed": 0,
+            "processed": 0,
+            "removed": 0,
+            "started_at": None,
+            "finished_at": None,
+            "message": "",
+        }
+
+    # ============================= 数据库 =============================
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用时建表），调用方需持有 _db_lock"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    mtime REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    title TEXT NOT NULL DEFAULT '',
+                    artist TEXT NOT NULL DEFAULT '',
+                    album TEXT NOT NULL DEFAULT '',
+                    duration REAL NOT NULL DEFAULT 0,
+                    bitrate INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # trigram 分词器支持中文子串匹配，旧版本 SQLite 不支持时退回 LIKE 查询
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts "
+                    "USING fts5(title, artist, album, tokenize='trigram')"
+                )
+                self._fts_enabled = True
+            except sqlite3.OperationalError as e:
+                print(f"[MediaLibrary] FTS5 不可用，使用 LIKE 查询: {e}")
+                self._fts_enabled = False
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load_known(self, root: str) -> Dict[str, Tuple[float, int]]:
+        """读取数据库中 root 下已有的 path -> (mtime, size)"""
+        prefix = os.path.join(root, "")
+        with self._db_lock:
+            rows = self._get_conn().execute(
+                "SELECT path, mtime, size FROM tracks WHERE path >= ? AND path < ?",
+                (prefix, prefix + "\uffff"),
+            ).fetchall()
+        return {path: (mtime, size) for path, mtime, size in rows}
+
+    def _write_batch(self, records: List[tuple], stats: Dict[str, Tuple[float, int]]):
+        """批量写入标签记录（同一事务内同步更新 FTS 表）"""
+        with self._db_lock:
+            conn = self._get_conn()
+            with conn:
+                for path, title, artist, album, duration, bitrate in records:
+                    mtime, size = stats[path]
+                    conn.execute(
+                        """
+                        INSERT INTO tracks (path, mtime, size, title, artist, album, duration, bitrate)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(path) DO UPDATE SET
+                            mtime=excluded.mtime, size=excluded.size, title=excluded.title,
+                            artist=excluded.artist, album=excluded.album,
+                            duration=excluded.duration, bitrate=excluded.bitrate
+                        """,
+                        (path, mtime, size, title, artist, album, duration, bitrate),
+                    )
+                    if self._fts_enabled:
+                        track_id = conn.execute("SELECT id FROM tracks WHERE path = ?", (path,)).fetchone()[0]
+                        conn.execute("DELETE FROM tracks_fts WHERE rowid = ?", (track_id,))
+                        conn.execute(
+                            "INSERT INTO tracks_fts (rowid, title, artist, album) VALUES (?, ?, ?, ?)",
+                            (track_id, title, artist, album),
+                        )
+
+    def _delete_paths(self, paths: List[str]):
+        """删除已不存在的文件记录"""
+        with self._db_lock:
+            conn = self._get_conn()
+            with conn:
+                for path in paths:
+                    row = conn.execute("SELECT id FROM tracks WHERE path = ?", (path,)).fetchone()
+                    if not row:
+                        continue
+                    if self._fts_enabled:
+                        conn.execute("DELETE FROM tracks_fts WHERE rowid = ?", (row[0],))
+                    conn.execute("DELETE FROM tracks WHERE id = ?", (row[0],))
+
+    # ============================= 扫描 =============================
+    @staticmethod
+    def _iter_audio_files(root: str):
+        """使用 scandir 遍历目录，直接从 DirEntry 获取 mtime 和 size"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=True):
+                                stack.append(entry.path)
+                            elif is_audio_file(entry.name):
+                                st = entry.stat()
+                                yield entry.path, st.st_mtime, st.st_size, st.st_mtime_ns
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    def start_scan(self, root: str) -> bool:
+        """
+        在后台线程中开始扫描
+
+        Returns:
+            bool: 是否成功启动（已有扫描在进行时返回 False）
+        """
+        with self._lock:
+            if self._scan_thread and self._scan_thread.is_alive():
+                return False
+            self._scan_thread = threading.Thread(target=self.scan, args=(root,), daemon=True)
+            self._scan_thread.start()
+        return True
+
+    def scan(self, root: str):
+        """扫描 root 下的音频文件，只为新增或变化的文件读取标签"""
+        root = os.path.abspath(root)
+        self._status.update({
+            "state": "scanning", "root": root, "scanned": 0, "changed": 0,
+            "processed": 0, "removed": 0, "started_at": time.time(),
+            "finished_at": None, "message": "",
+        })
+        try:
+            known = self._load_known(root)
+            stats: Dict[str, Tuple[float, int]] = {}
+            mtimes_ns: Dict[str, int] = {}
+            changed: List[str] = []
+            for path, mtime, size, mtime_ns in self._iter_audio_files(root):
+                stats[path] = (mtime, size)
+                mtimes_ns[path] = mtime_ns
+                self._status["scanned"] += 1
+                if known.get(path) != (mtime, size):
+                    changed.append(path)
+
+            removed = [path for path in known if path not in stats]
+            if removed:
+                self._delete_paths(removed)
+            self._status["removed"] = len(removed)
+            self._status["changed"] = len(changed)
+
+            if changed:
+                # 元数据缓存中未变化的文件（播放过或在列表中显示过）不必重新读取
+                batch = []
+                cached = metadata_cache.lookup(changed)
+                to_read = []
+                for path in changed:
+                    meta = cached.get(path)
+                    if meta is not None and (meta["size"], meta["mtime_ns"]) == (stats[path][1], mtimes_ns[path]):
+                        batch.append(_tag_record(path, meta))
+                        self._status["processed"] += 1
+                    else:
+                        to_read.append(path)
+
+                if to_read:
+                    # TinyTag 是纯 Python 解析，受 GIL 限制，用进程池才能随 CPU 核数扩展。
+                    # 子进程（spawn / forkserver）只导入 read_metadata 所在的模块：
+                    # app.core 按需导入不会创建 player_manager，run.py 以 __mp_main__ 导入时不创建应用
+                    workers = os.cpu_count() or 1
+                    chunksize = max(1, min(256, len(to_read) // (workers * 4) or 1))
+                    parsed = []
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        for path, meta in zip(to_read, pool.map(read_metadata, to_read, chunksize=chunksize)):
+                            batch.append(_tag_record(path, meta))
+                            parsed.append(dict(meta, path=path, size=stats[path][1], mtime_ns=mtimes_ns[path]))
+                            self._status["processed"] += 1
+                            if len(batch) >= self.WRITE_BATCH_SIZE:
+                                self._write_batch(batch, stats)
+                                metadata_cache.put_many(parsed)
+                                batch, parsed = [], []
+                    metadata_cache.put_many(parsed)
+                if batch:
+                    self._write_batch(batch, stats)
+
+            self._status["state"] = "done"
+            player_logger.info(
+                f"[MediaLibrary] 扫描完成: {root} 共 {len(stats)} 个音频文件，"
+                f"更新 {len(changed)} 个，删除 {len(removed)} 个"
+            )
+        except Exception as e:
+            self._status["state"] = "error"
+            self._status["message"] = str(e)
+            player_logger.error(f"[MediaLibrary] 扫描失败: {e}")
+        finally:
+            self._status["finished_at"] = time.time()
+
+    def get_status(self) -> dict:
+        """获取扫描状态"""
+        return dict(self._status)
+
+    # ============================= 查询 =============================
+    def _term_condition(self, field: Optional[str], term: str) -> Tuple[str, list]:
+        """生成单个查询词的 SQL 条件"""
+        like = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        # trigram 分词器只能匹配不少于 3 个字符的子串，更短的词使用 LIKE
+        if self._fts_enabled and len(term) >= 3:
+            phrase = '"' + term.replace('"', '""') + '"'
+            match = f"{field} : {phrase}" if field else phrase
+            condition = "t.id IN (SELECT rowid FROM tracks_fts WHERE tracks_fts MATCH ?)"
+            if field:
+                return condition, [match]
+            return f"({condition} OR t.path LIKE ? ESCAPE '\\')", [match, like]
+        if field:
+            return f"t.{field} LIKE ? ESCAPE '\\'", [like]
+        columns = ("title", "artist", "album", "path")
+        return "(" + " OR ".join(f"t.{c} LIKE ? ESCAPE '\\'" for c in columns) + ")", [like] * len(columns)
+
+    def _where(self, keyword: str) -> Optional[Tuple[str, list]]:
+        """字段查询 -> (WHERE 条件, 参数)，没有查询词时返回 None"""
+        terms = parse_query(keyword)
+        if not terms:
+            return None
+        conditions, params = [], []
+        for field, term in terms:
+            condition, condition_params = self._term_condition(field, term)
+            conditions.append(condition)
+            params.extend(condition_params)
+        return " AND ".join(conditions), params
+
+    def search(self, keyword: str, limit: int = 1000, offset: int = 0) -> List[dict]:
+        """
+        字段查询，例如 'artist:周杰伦 album:叶惠美'
+
+        Args:
+            limit: 最多返回的数量，0 表示不限制
+            offset: 跳过前面的匹配数
+
+        Returns:
+            List[dict]: 匹配的曲目（包含 path / title / artist / album / duration）
+        """
+        where = self._where(keyword)
+        if where is None:
+            return []
+        condition, params = where
+        sql = (
+            "SELECT t.path, t.title, t.artist, t.album, t.duration FROM tracks t WHERE " + condition
+            + " ORDER BY t.artist, t.album, t.title, t.path LIMIT ? OFFSET ?"
+        )
+        # SQLite 中 LIMIT -1 表示不限制
+        params = params + [limit if limit > 0 else -1, max(offset, 0)]
+        with self._db_lock:
+            rows = self._get_conn().execute(sql, params).fetchall()
+        return [
+            {"path": path, "title": title, "artist": artist, "album": album, "duration": duration}
+            for path, title, artist, album, duration in rows
+        ]
+
+    def count(self, keyword: str) -> int:
+        """字段查询的匹配总数"""
+        where = self._where(keyword)
+        if where is None:
+            return 0
+        condition, params = where
+        with self._db_lock:
+            return self._get_conn().execute(
+                "SELECT COUNT(*) FROM tracks t WHERE " + condition, params
+            ).fetchone()[0]
+
+    def search_page(self, keyword: str, page: int = 1, page_size: int = 0) -> Tuple[int, List[dict]]:
+        """
+        分页字段查询（与文件名搜索的 search_page 相同的分页方式）
+
+        Args:
+            page_size: 每页数量，0 表示返回全部匹配
+
+        Returns:
+            tuple: (匹配总数, 当前页的曲目)
+        """
+        if page_size <= 0:
+            tracks = self.search(keyword, limit=0)
+            return len(tracks), tracks
+        tracks = self.search(keyword, limit=page_size, offset=(max(page, 1) - 1) * page_size)
+        return self.count(keyword), tracks
+
+    def get_tracks(self, paths: List[str]) -> Dict[str, dict]:
+        """
+        批量读取已入库文件的标签摘要（只查数据库，不访问媒体文件）
+
+        Returns:
+            Dict[str, dict]: path -> {title, artist, album, duration}，未入库的文件不包含在内
+        """
+        result = {}
+        for i in range(0, len(paths), self.LOOKUP_BATCH_SIZE):
+            chunk = paths[i:i + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            with self._db_lock:
+                rows = self._get_conn().execute(
+                    f"SELECT path, title, artist, album, duration FROM tracks WHERE path IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            for path, title, artist, album, duration in rows:
+                result[path] = {"title": title, "artist": artist, "album": album, "duration": duration}
+        return result
+
+    def ensure_tracks(self, paths: List[str]) -> int:
+        """
+        为给定的音频文件补齐标签（新增或 mtime / size 变化的文件才读取），在调用线程中执行
+
+        Returns:
+            int: 实际读取标签的文件数
+        """
+        paths = [p for p in paths if is_audio_file(p)]
+        if not paths:
+            return 0
+        known = {}
+        for i in range(0, len(paths), self.LOOKUP_BATCH_SIZE):
+            chunk = paths[i:i + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            with self._db_lock:
+                rows = self._get_conn().execute(
+                    f"SELECT path, mtime, size FROM tracks WHERE path IN ({placeholders})", chunk
+                ).fetchall()
+            known.update((path, (mtime, size)) for path, mtime, size in rows)
+
+        stats: Dict[str, Tuple[float, int]] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (st.st_mtime, st.st_size):
+                stats[path] = (st.st_mtime, st.st_size)
+        if stats:
+            # 通过元数据缓存读取（播放器、播放列表已读取过的文件不再解析）
+            metas = metadata_cache.get_many(list(stats))
+            self._write_batch([_tag_record(path, metas[path]) for path in stats if path in metas], stats)
+        return len(stats)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 导出单例实例
+media_library = MediaLibrary()
@@ -0,0 +1,38 @@
+# app/core/media_types.py
+"""
+媒体文件类型判断
+统一维护音频/视频扩展名，供索引、目录浏览和媒体库扫描共用
+"""
+import os
+
+# 媒体类型标识
+MEDIA_NONE = 0
+MEDIA_AUDIO = 1
+MEDIA_VIDEO = 2
+
+AUDIO_EXTENSIONS = frozenset({
+    '.mp3', '.flac', '.wav', '.m4a', '.aac', '.ogg', '.opus', '.wma', '.ape', '.aiff', '.dsf'
+})
+VIDEO_EXTENSIONS = frozenset({
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.ts', '.rmvb'
+})
+
+
+def get_media_type(name: str) -> int:
+    """根据文件名扩展名返回媒体类型（MEDIA_NONE / MEDIA_AUDIO / MEDIA_VIDEO）"""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in AUDIO_EXTENSIONS:
+        return MEDIA_AUDIO
+    if ext in VIDEO_EXTENSIONS:
+        return MEDIA_VIDEO
+    return MEDIA_NONE
+
+
+def media_type_name(media_type: int) -> str:
+    """媒体类型转为前端可读的名称"""
+    return {MEDIA_AUDIO: "audio", MEDIA_VIDEO: "video"}.get(media_type, "other")
+
+
+def is_audio_file(name: str) -> bool:
+    """是否为音频文件"""
+    return get_media_type(name) == MEDIA_AUDIO
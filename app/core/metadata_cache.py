@@ -0,0 +1,260 @@
+# app/core/metadata_cache.py
+"""
+音频元数据缓存
+播放器、播放列表补全、目录预读、媒体库和专辑封面共用的单文件元数据缓存：
+标签（title / artist / album）、时长、码率、流信息（采样率 / 声道 / 位深）和封面 hash，
+以 path + size + mtime_ns 判断是否失效，保存在磁盘上的 SQLite 数据库中，前面是进程内 LRU，
+文件未变化时重复播放和列表渲染只需一次 stat（lookup() 连 stat 都不需要）
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from tinytag import TinyTag
+from app.core.logging import player_logger
+
+# 缓存记录中的元数据字段（顺序与数据表列一致）
+METADATA_FIELDS = ("title", "artist", "album", "duration", "bitrate", "samplerate", "channels", "bitdepth")
+
+
+def read_metadata(path: str) -> dict:
+    """
+    用 TinyTag 读取单个文件的元数据（可在子进程中执行，必须是模块级函数才能被 pickle）
+    读取失败时各字段为空值
+    """
+    try:
+        tag = TinyTag.get(path)
+    except Exception:
+        tag = None
+    return {
+        "title": (tag and tag.title) or "",
+        "artist": (tag and tag.artist) or "",
+        "album": (tag and tag.album) or "",
+        "duration": float((tag and tag.duration) or 0.0),
+        "bitrate": int((tag and tag.bitrate) or 0),
+        "samplerate": int((tag and tag.samplerate) or 0),
+        "channels": int((tag and tag.channels) or 0),
+        "bitdepth": int((tag and getattr(tag, "bitdepth", None)) or 0),
+    }
+
+
+class MetadataCache:
+    """
+    元数据缓存（内部加锁）
+    每条记录为 dict：path / size / mtime_ns / METADATA_FIELDS / cover
+    cover 为 None 表示尚未提取封面，"" 表示没有封面
+    get() / get_many() 会访问媒体文件，需在存储根线程池中调用
+    """
+    # 进程内 LRU 保存的记录数
+    MAX_ENTRIES = 8192
+    # 按路径批量查询时每条 SQL 的参数个数（SQLite 默认上限 999）
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str = "metadata_cache.db"):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "parsed": 0}
+
+    # ============================= 数据库 =============================
+    def _get_conn(self) -> sqlite3.Connection:
+        """获取数据库连接（首次调用时建表），调用方需持有 _db_lock"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS metadata (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    title TEXT NOT NULL DEFAULT '',
+                    artist TEXT NOT NULL DEFAULT '',
+                    album TEXT NOT NULL DEFAULT '',
+                    duration REAL NOT NULL DEFAULT 0,
+                    bitrate INTEGER NOT NULL DEFAULT 0,
+                    samplerate INTEGER NOT NULL DEFAULT 0,
+                    channels INTEGER NOT NULL DEFAULT 0,
+                    bitdepth INTEGER NOT NULL DEFAULT 0,
+                    cover TEXT
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    _COLUMNS = ("path", "size", "mtime_ns") + METADATA_FIELDS + ("cover",)
+
+    def _load_rows(self, paths: List[str]) -> Dict[str, dict]:
+        """批量读取数据库中的记录（不校验是否失效）"""
+        result = {}
+        columns = ", ".join(self._COLUMNS)
+        for i in range(0, len(paths), self.LOOKUP_BATCH_SIZE):
+            chunk = paths[i:i + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            with self._db_lock:
+                rows = self._get_conn().execute(
+                    f"SELECT {columns} FROM metadata WHERE path IN ({placeholders})", chunk
+                ).fetchall()
+            for row in rows:
+                result[row[0]] = dict(zip(self._COLUMNS, row))
+        return result
+
+    def _write_rows(self, entries: List[dict], keep_cover: bool = False):
+        """
+        写入记录，keep_cover 为 True 时 cover 为 None 的记录保留数据库中
+        同一文件（size / mtime_ns 未变）已提取的封面 hash
+        """
+        columns = ", ".join(self._COLUMNS)
+        placeholders = ",".join("?" * len(self._COLUMNS))
+        if keep_cover:
+            updates = ", ".join(f"{c} = excluded.{c}" for c in self._COLUMNS[1:-1])
+            sql = f"""
+                INSERT INTO metadata ({columns}) VALUES ({placeholders})
+                ON CONFLICT(path) DO UPDATE SET {updates},
+                    cover = CASE
+                        WHEN excluded.cover IS NULL AND metadata.size = excluded.size
+                             AND metadata.mtime_ns = excluded.mtime_ns THEN metadata.cover
+                        ELSE excluded.cover
+                    END
+            """
+        else:
+            sql = f"INSERT OR REPLACE INTO metadata ({columns}) VALUES ({placeholders})"
+        with self._db_lock:
+            conn = self._get_conn()
+            with conn:
+                conn.executemany(sql, [tuple(entry[c] for c in self._COLUMNS) for entry in entries])
+
+    # ============================= 内存 LRU =============================
+    def _remember(self, entries: List[dict], keep_cover: bool = False):
+        with self._lock:
+            for entry in entries:
+                if keep_cover and entry["cover"] is None:
+                    cached = self._entries.get(entry["path"])
+                    if cached is not None and (cached["size"], cached["mtime_ns"]) == (entry["size"], entry["mtime_ns"]):
+                        entry["cover"] = cached["cover"]
+                self._entries[entry["path"]] = entry
+                self._entries.move_to_end(entry["path"])
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    # ============================= 对外接口 =============================
+    def lookup(self, paths: List[str]) -> Dict[str, dict]:
+        """
+        只读取已缓存的记录（内存 / 数据库），不访问媒体文件，不校验文件是否变化
+
+        Returns:
+            Dict[str, dict]: path -> 记录副本，未缓存的文件不包含在内
+        """
+        result, missing = {}, []
+        with self._lock:
+            for path in paths:
+                entry = self._entries.get(path)
+                if entry is None:
+                    missing.append(path)
+                else:
+                    self._entries.move_to_end(path)
+                    result[path] = dict(entry)
+        if missing:
+            rows = self._load_rows(missing)
+            self._remember(list(rows.values()))
+            result.update((path, dict(entry)) for path, entry in rows.items())
+        return result
+
+    def get_many(self, paths: List[str]) -> Dict[str, dict]:
+        """
+        批量获取元数据：文件未变化时直接返回缓存，新增或变化的文件读取标签后写入缓存
+
+        Returns:
+            Dict[str, dict]: path -> 记录副本，无法访问的文件不包含在内
+        """
+        stats = {}
+        for path in dict.fromkeys(paths):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_size, st.st_mtime_ns)
+
+        result, missing = {}, []
+        with self._lock:
+            for path, key in stats.items():
+                entry = self._entries.get(path)
+                if entry is not None and (entry["size"], entry["mtime_ns"]) == key:
+                    self._entries.move_to_end(path)
+                    result[path] = dict(entry)
+                else:
+                    missing.append(path)
+            self._stats["memory_hits"] += len(result)
+        if not missing:
+            return result
+
+        rows = self._load_rows(missing)
+        valid, parsed = [], []
+        for path in missing:
+            row = rows.get(path)
+            if row is not None and (row["size"], row["mtime_ns"]) == stats[path]:
+                valid.append(row)
+                continue
+            size, mtime_ns = stats[path]
+            parsed.append(dict(read_metadata(path), path=path, size=size, mtime_ns=mtime_ns, cover=None))
+        with self._lock:
+            self._stats["db_hits"] += len(valid)
+            self._stats["parsed"] += len(parsed)
+        if parsed:
+            try:
+                self._write_rows(parsed)
+            except sqlite3.Error as e:
+                player_logger.warning(f"[MetadataCache] 写入元数据缓存失败: {e}")
+
+        self._remember(valid + parsed)
+        result.update((entry["path"], dict(entry)) for entry in valid + parsed)
+        return result
+
+    def get(self, path: str) -> Optional[dict]:
+        """单个文件的元数据，文件无法访问时返回 None"""
+        return self.get_many([path]).get(path)
+
+    def put_many(self, entries: List[dict]):
+        """
+        写入外部读取的元数据（如媒体库扫描的子进程结果），每条需包含 path / size / mtime_ns
+        没有 cover 的记录保留同一文件已提取的封面 hash（扫描不读取封面）
+        """
+        entries = [dict({field: entry.get(field) for field in METADATA_FIELDS}, path=entry["path"],
+                        size=entry["size"], mtime_ns=entry["mtime_ns"], cover=entry.get("cover"))
+                   for entry in entries]
+        if not entries:
+            return
+        self._write_rows(entries, keep_cover=True)
+        self._remember(entries, keep_cover=True)
+
+    def set_cover(self, entry: dict, cover_hash: Optional[str]):
+        """记录文件的封面 hash（None 表示没有封面），entry 为 get() 返回的记录"""
+        entry = dict(entry, cover=cover_hash or "")
+        with self._db_lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    "UPDATE metadata SET cover = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (entry["cover"], entry["path"], entry["size"], entry["mtime_ns"]),
+                )
+        self._remember([entry])
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 导出单例实例
+metadata_cache = MetadataCache()
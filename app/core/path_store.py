@@ -0,0 +1,252 @@
+# app/core/path_store.py
+"""
+紧凑路径存储
+目录表 + 每个文件的 (dir_id, basename) 记录：
+- 同一目录的文件连续存放，目录只保存一次
+- 文件名拼接成一个大字符串，通过偏移数组访问，不为每个文件创建 str 对象
+- 媒体类型位图用于快速排除非媒体文件
+查询只返回文件 id，调用方只为需要返回的那一页拼接完整路径
+"""
+import os
+import pickle
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+from app.core.media_types import get_media_type, MEDIA_NONE
+
+# 文件名分隔符（文件名中不可能出现）
+_SEP = "\0"
+_PATH_SEPARATORS = tuple({"/", "\\", os.sep})
+# 匹配循环中每处理多少个文件检查一次取消标记
+_CANCEL_CHECK_INTERVAL = 4096
+
+
+class SearchCancelled(Exception):
+    """搜索被更新的查询取消"""
+
+
+def _check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
+
+
+def _filter_ids(ids: Iterable[int], predicate, cancel=None) -> array:
+    """逐个过滤文件 id，定期检查取消标记（cancel 为带 is_set() 的对象，如 threading.Event）"""
+    result = array('I')
+    for n, file_id in enumerate(ids):
+        if n % _CANCEL_CHECK_INTERVAL == 0:
+            _check_cancel(cancel)
+        if predicate(file_id):
+            result.append(file_id)
+    return result
+
+
+class PathStoreBuilder:
+    """按目录追加文件，最终生成只读的 PathStore"""
+
+    def __init__(self):
+        self._dirs: List[str] = []
+        self._dir_start = array('I')
+        self._names: List[str] = []
+        self._media = bytearray()
+
+    def add_directory(self, directory: str, names: Iterable[str]):
+        """追加一个目录及其下的文件名（同一目录只能追加一次）"""
+        self._dirs.append(directory)
+        self._dir_start.append(len(self._names))
+        for name in names:
+            self._names.append(name)
+            self._media.append(get_media_type(name))
+
+    @property
+    def file_count(self) -> int:
+        return len(self._names)
+
+    def build(self) -> "PathStore":
+        """生成 PathStore，构建完成后 builder 不应再使用"""
+        dir_start = self._dir_start
+        dir_start.append(len(self._names))
+        dir_ids = array('I')
+        for dir_id in range(len(self._dirs)):
+            dir_ids.extend([dir_id] * (dir_start[dir_id + 1] - dir_start[dir_id]))
+        names_blob = _SEP.join(self._names) + _SEP if self._names else ""
+        store = PathStore(self._dirs, dir_start, dir_ids, names_blob, self._media)
+        self._names = []
+        return store
+
+
+class PathStore:
+    """只读的紧凑路径存储"""
+    __slots__ = (
+        "dirs", "_dir_lower", "_dir_start", "_dir_ids",
+        "_names", "_starts", "_lower_names", "_lower_starts", "_media",
+    )
+
+    def __init__(self, dirs: List[str], dir_start: array, dir_ids: array, names_blob: str, media: bytearray):
+        self.dirs = dirs
+        self._dir_lower = [d.lower() for d in dirs]
+        self._dir_start = dir_start
+        self._dir_ids = dir_ids
+        self._names = names_blob
+        self._starts = self._offsets(names_blob)
+        self._media = media
+        # 小写文件名单独存放（部分字符小写后长度会变化，因此单独维护偏移）
+        self._lower_names = names_blob.lower()
+        self._lower_starts = self._offsets(self._lower_names)
+
+    @staticmethod
+    def _offsets(blob: str) -> array:
+        """计算每个文件名在拼接字符串中的起始偏移（末尾附加哨兵）"""
+        starts = array('I', [0])
+        pos = blob.find(_SEP)
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = blob.find(_SEP, pos + 1)
+        return starts
+
+    def __len__(self) -> int:
+        return len(self._dir_ids)
+
+    # ============================= 访问 =============================
+    def name(self, file_id: int) -> str:
+        return self._names[self._starts[file_id]:self._starts[file_id + 1] - 1]
+
+    def _lower_name(self, file_id: int) -> str:
+        return self._lower_names[self._lower_starts[file_id]:self._lower_starts[file_id + 1] - 1]
+
+    def path(self, file_id: int) -> str:
+        return os.path.join(self.dirs[self._dir_ids[file_id]], self.name(file_id))
+
+    def paths(self, file_ids: Iterable[int]) -> List[str]:
+        """只为给定的 id 拼接完整路径"""
+        return [self.path(i) for i in file_ids]
+
+    def media_type(self, file_id: int) -> int:
+        return self._media[file_id]
+
+    def iter_paths(self) -> Iterator[str]:
+        """逐个生成完整路径（不会一次性创建全部字符串）"""
+        for dir_id, directory in enumerate(self.dirs):
+            for file_id in range(self._dir_start[dir_id], self._dir_start[dir_id + 1]):
+                yield os.path.join(directory, self.name(file_id))
+
+    # ============================= 查询 =============================
+    def match_lower(self, file_id: int, pattern_lower: str) -> bool:
+        """判断单个文件的完整路径是否包含 pattern（pattern 已转小写）"""
+        if any(s in pattern_lower for s in _PATH_SEPARATORS):
+            return pattern_lower in self.path(file_id).lower()
+        return pattern_lower in self._lower_name(file_id) or pattern_lower in self._dir_lower[self._dir_ids[file_id]]
+
+    def search_substring(self, pattern: str, media_only: bool = False,
+                         candidates: Optional[Iterable[int]] = None, cancel=None) -> array:
+        """
+        不区分大小写的子串匹配（匹配完整路径）
+
+        Args:
+            pattern: 搜索关键词
+            media_only: 是否只返回媒体文件
+            candidates: 候选文件 id，提供时只在候选中过滤
+            cancel: 取消标记，被设置时抛出 SearchCancelled
+
+        Returns:
+            array: 按 id 升序排列的匹配文件 id
+        """
+        pattern_lower = pattern.lower()
+        if not pattern_lower:
+            result = array('I', candidates if candidates is not None else range(len(self)))
+        elif candidates is not None:
+            result = _filter_ids(candidates, lambda i: self.match_lower(i, pattern_lower), cancel)
+        elif any(s in pattern_lower for s in _PATH_SEPARATORS):
+            # 关键词含路径分隔符时可能跨越目录和文件名，逐个拼接路径判断
+            result = _filter_ids(range(len(self)), lambda i: pattern_lower in self.path(i).lower(), cancel)
+        else:
+            result = self._scan_substring(pattern_lower, cancel)
+        if media_only:
+            result = self.filter_media(result)
+        return result
+
+    def _scan_substring(self, pattern_lower: str, cancel=None) -> array:
+        """在拼接的文件名中查找 + 匹配目录，合并为有序 id 列表"""
+        hits = bytearray(len(self))
+        # 1. 目录匹配：目录下的所有文件都命中
+        for dir_id, directory in enumerate(self._dir_lower):
+            if dir_id % _CANCEL_CHECK_INTERVAL == 0:
+                _check_cancel(cancel)
+            if pattern_lower in directory:
+                start, end = self._dir_start[dir_id], self._dir_start[dir_id + 1]
+                hits[start:end] = b"\x01" * (end - start)
+        # 2. 文件名匹配：直接在拼接字符串上 find，命中后跳到下一个文件名
+        blob, starts = self._lower_names, self._lower_starts
+        pos = blob.find(pattern_lower)
+        n = 0
+        while pos != -1:
+            n += 1
+            if n % _CANCEL_CHECK_INTERVAL == 0:
+                _check_cancel(cancel)
+            file_id = bisect_right(starts, pos) - 1
+            hits[file_id] = 1
+            pos = blob.find(pattern_lower, starts[file_id + 1])
+        result = array('I')
+        file_id = hits.find(1)
+        while file_id != -1:
+            result.append(file_id)
+            file_id = hits.find(1, file_id + 1)
+        return result
+
+    def filter_media(self, file_ids: Iterable[int]) -> array:
+        """只保留媒体文件"""
+        media = self._media
+        return array('I', (i for i in file_ids if media[i] != MEDIA_NONE))
+
+    def search_regex(self, regex, media_only: bool = False,
+                     candidates: Optional[Iterable[int]] = None, cancel=None) -> array:
+        """使用已编译的正则对完整路径做 match（逐个生成路径，不保留中间字符串）"""
+        ids = _filter_ids(
+            candidates if candidates is not None else range(len(self)),
+            lambda i: regex.match(self.path(i)) is not None,
+            cancel,
+        )
+        if media_only:
+            ids = self.filter_media(ids)
+        return ids
+
+    def rank(self, file_ids: Iterable[int], pattern: str, cancel=None) -> List[int]:
+        """
+        按相关度排序：文件名以关键词开头 > 文件名包含关键词 > 仅目录匹配
+        同一档内保持原有顺序
+        """
+        pattern_lower = pattern.lower()
+        tiers = ([], [], [])
+        for n, file_id in enumerate(file_ids):
+            if n % _CANCEL_CHECK_INTERVAL == 0:
+                _check_cancel(cancel)
+            name = self._lower_name(file_id)
+            if name.startswith(pattern_lower):
+                tiers[0].append(file_id)
+            elif pattern_lower in name:
+                tiers[1].append(file_id)
+            else:
+                tiers[2].append(file_id)
+        return tiers[0] + tiers[1] + tiers[2]
+
+    # ============================= 持久化 =============================
+    def save(self, save_path: str):
+        data = (1, self.dirs, self._dir_start.tobytes(), self._dir_ids.tobytes(), self._names, bytes(self._media))
+        with open(save_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, load_path: str) -> "PathStore":
+        """
+        Raises:
+            ValueError: 不是本格式的索引文件（如旧版本的 marisa-trie 索引）或文件已损坏
+        """
+        with open(load_path, "rb") as f:
+            try:
+                version, dirs, dir_start, dir_ids, names_blob, media = pickle.load(f)
+            except Exception as e:
+                raise ValueError(f"无法识别的索引文件: {e}")
+        if version != 1:
+            raise ValueError(f"不支持的索引文件版本: {version}")
+        return cls(dirs, array('I', dir_start), array('I', dir_ids), names_blob, bytearray(media))
@@ -7,11 +7,25 @@ import uuid
 import threading
 import random
 import json
-import eyed3
 import vlc
 from enum import Enum
 from typing import Optional, List, Dict, Union
-from tinytag import TinyTag
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError
+from app.core.file_status import file_status
+from app.core.track_list import track_list_cache, TrackList
+from app.core.folder_source import folder_source
+from app.core.album_art import album_art
+from app.core.metadata_cache import metadata_cache
+from app.core.logging import player_logger
+from app.core.playlist import IndexedPlaylist
+from app.core.playlist_journal import PlaylistJournal
+from app.core.shuffle import ShuffleBag
+from app.core.playlist_metadata import PlaylistMetadataEnricher
+from app.core.playlist_changes import PlaylistChangeLog
+from app.core.track_switch import TrackSwitchTracker
+from app.core.gapless import GaplessPlayback
+from app.core.stems import StemPlayback
+from app.core.player_commands import Command, PlayerCommandQueue
 
 class Settings:
     """
@@ -31,8 +45,9 @@ class Settings:
             "last_position": 0.0,  # 上次播放位置（秒）
             "volume": 80,  # 音量设置
             "play_mode": "SINGLE",  # 播放模式
-            "play_source": 1,  # 播放来源：1=播放列表，2=磁盘路径
-            "popup_window": True  # 是否弹出窗口播放视频
+            "play_source": 1,  # 播放来源：1=播放列表，2=磁盘路径，3=文件夹（递归）
+            "popup_window": True,  # 是否弹出窗口播放视频
+            "gapless": True  # 自动切歌时无缝衔接（预加载下一首）
         }
         
         try:
@@ -134,13 +149,13 @@ class Settings:
     
     def set_play_source(self, source: int):
         """设置播放来源"""
-        if source in [1, 2]:
+        if source in [1, 2, 3]:
             self.settings["play_source"] = source
             self.save_settings()
-            source_name = "播放列表" if source == 1 else "磁盘路径"
+            source_name = {1: "播放列表", 2: "磁盘路径", 3: "文件夹（递归）"}[source]
             print(f"[Settings] 播放来源设置为: {source_name}")
         else:
-            print(f"[Settings] 播放来源值无效: {source}，必须为1(播放列表)或2(磁盘路径)")
+            print(f"[Settings] 播放来源值无效: {source}，必须为1(播放列表)、2(磁盘路径)或3(文件夹递归)")
     
     def get_play_source(self) -> int:
         """获取播放来源"""
@@ -156,6 +171,16 @@ class Settings:
         """获取是否弹出窗口播放视频"""
         return self.settings.get("popup_window", True)
 
+    def set_gapless(self, enabled: bool):
+        """设置自动切歌时是否无缝衔接"""
+        self.settings["gapless"] = enabled
+        self.save_settings()
+        print(f"[Settings] 无缝切歌: {'启用' if enabled else '禁用'}")
+
+    def get_gapless(self) -> bool:
+        """获取自动切歌时是否无缝衔接"""
+        return self.settings.get("gapless", True)
+
 
 class PlayMode(Enum):
     """
@@ -191,6 +216,10 @@ class PlayerManager:
     """
     _instance = None
     _lock = threading.Lock()
+    # 播放列表中查找下一首时每次在锁内取出的项目数
+    PLAYLIST_SCAN_BATCH = 64
+    # 批量修改播放列表时最多展开的文件数
+    PLAYLIST_BATCH_MAX_FILES = 20000
 
     def __new__(cls):
         if cls._instance is None:
@@ -232,20 +261,50 @@ class PlayerManager:
         self.duration = 0.0  # 当前文件时长
         self.bitrate = 0  # 当前文件码率
         # 播放列表相关
-        self.playlist = []  # 播放列表数据结构
+        self.playlist = IndexedPlaylist()  # 播放列表数据结构（稳定 id + 路径索引 + 顺序树）
         self.playlist_lock = threading.Lock()  # 播放列表线程锁
+        self.playlist_journal = PlaylistJournal()  # 播放列表修改日志（启动恢复播放列表时打开）
+        self.shuffle_bag = ShuffleBag()  # 播放列表随机播放顺序（洗牌排列 + 游标）
+        self.playlist_enricher = PlaylistMetadataEnricher(self._apply_playlist_metadata)  # 后台补全播放列表标签
+        self.playlist_changes = PlaylistChangeLog()  # 播放列表版本号和最近的变更（增量同步）
+        self._add_playlist_listeners()
+        # 文件夹递归播放来源（恢复上次的遍历位置）
+        self.folder_source = folder_source
+        self.folder_source.load()
         
         # 播放历史记录（用于随机播放模式下的上一曲功能）
         self.playback_history = []  # 播放历史记录列表
         self.max_history_size = 50  # 最多保存50条历史记录
         self.other_event_broadcast = ""
-        # 设置VLC事件监听器（自动播放检测）
-        self._setup_vlc_event_manager()
+        # 切歌延迟跟踪（先播放，目录索引 / 标签 / 歌词延后执行）
+        self.track_switch = TrackSwitchTracker(self._finish_track_switch)
+        # 无缝自动切歌（备用播放器预加载下一首）
+        self.gapless = GaplessPlayback(self)
+        # 设置VLC事件监听器（自动播放检测），当前播放器和备用播放器会在交接时互换
+        self._setup_vlc_event_manager(self.player)
+        self._setup_vlc_event_manager(self.gapless.standby)
+        self.gapless.start()
         self.audio_track=0#0为正常播放1为人声2为伴奏
         # 注册信号处理器（程序退出时的清理工作）
         self._register_signal_handlers()
         self.Vocal=vlc.MediaPlayer()
         self.Instrumental=vlc.MediaPlayer()
+        # 分轨同步播放（人声 / 伴奏与原曲同时播放，切换时只切换静音）
+        self.stems = StemPlayback(self)
+        # 播放器命令队列：改变播放状态的操作由单个工作线程依次执行，排队中的连续操作会合并
+        self.commands = PlayerCommandQueue({
+            Command.SKIP: self.skip_tracks,
+            Command.PLAY_FILE: self.play_file,
+            Command.PLAY: self.resume,
+            Command.PAUSE: self.pause,
+            Command.STOP: self.stop,
+            Command.SEEK: self.seek,
+            Command.VOLUME: self.set_volume,
+            Command.AUDIO_TRACK: self.switch_audio_track,
+            Command.AUTO_NEXT: self._auto_next,
+            Command.HANDOFF: self._hand_over_player,
+            Command.CALL: lambda func, *args: func(*args),
+        })
         # 同步到类属性（向下兼容）
         PlayerManager.player = self.player
         PlayerManager.current_file = self.current_file
@@ -289,15 +348,22 @@ class PlayerManager:
                     self.settings.update_last_playback(self.current_file, current_position)
                     print(f"[PlayerManager] 已保存播放进度: {current_position:.2f}秒")
             
-            # 保存播放列表到文件
-            if self.playlist:
+            # 压缩播放列表日志为快照（清空操作也记录在日志里，空播放列表照常压缩）；
+            # 启动时未能读取的播放列表文件还在原位置时不压缩，避免覆盖
+            if self.playlist_journal.can_compact:
                 result = self.save_playlist_to_file()
                 if result["status"] == "success":
                     print(f"[PlayerManager] 播放列表已保存，共 {result['count']} 个项目")
                 else:
                     print(f"[PlayerManager] 播放列表保存失败: {result['message']}")
             else:
-                print("[PlayerManager] 播放列表为空，跳过保存")
+                print("[PlayerManager] 播放列表文件未能成功读取，跳过保存")
+            self.playlist_journal.close()
+            try:
+                self.shuffle_bag.save()
+                self.folder_source.save()
+            except OSError as e:
+                print(f"[PlayerManager] 随机播放状态保存失败: {e}")
             
             # 停止播放
             if self.player.is_playing():
@@ -305,6 +371,11 @@ class PlayerManager:
                 print("[PlayerManager] 播放器已停止")
             
             # 释放VLC资源
+            self.stems.stop()
+            self.Vocal.release()
+            self.Instrumental.release()
+            self.gapless.standby.stop()
+            self.gapless.standby.release()
             self.player.release()
             print("[PlayerManager] VLC资源已释放")
             
@@ -340,12 +411,15 @@ class PlayerManager:
         获取当前播放文件的音频元数据
         """
         try:
-            tag = TinyTag.get(self.current_file)
-            self.artist = tag.artist if tag.artist else ""
-            self.album = tag.album if tag.album else ""
-            self.title = tag.title if tag.title else ""
-            self.duration = tag.duration if tag.duration else 0.0
-            self.bitrate = tag.bitrate if tag.bitrate else 0
+            # 通过存储根线程池读取（文件未变化时直接使用元数据缓存），存储卡住时超时返回
+            meta = io_scheduler.call(self.current_file, metadata_cache.get, self.current_file)
+            if meta is None:
+                raise FileNotFoundError(self.current_file)
+            self.artist = meta["artist"]
+            self.album = meta["album"]
+            self.title = meta["title"]
+            self.duration = meta["duration"]
+            self.bitrate = meta["bitrate"]
         except Exception as e:
             player_logger.error(f"获取音频元数据失败: {e}")
             return False
@@ -354,45 +428,13 @@ class PlayerManager:
     def switch_audio_track(self, track: int = 0):
         """
         切换音频轨道
+        人声 / 伴奏与原曲同步播放，切换时只做短交叉淡化，不重新打开文件，也不需要重新跳转
         Args:
             track: 音频轨道索引，0为正常播放，1为人声，2为伴奏
         """
-
-        position=self.player.get_time()  # 转换为秒
-        Instrumental_path = self.current_file.replace(".mp3", "_Instrumental.mp3")
-        Vocal_path = self.current_file.replace(".mp3", "_Vocal.mp3")
-        
-        # 检查对应轨道文件是否存在
-        if track == 1 and not os.path.exists(Vocal_path):
-            raise FileNotFoundError("没有人声轨道文件")
-            return {"success": False, "message": "没有人声轨道文件"}
-        if track == 2 and not os.path.exists(Instrumental_path):
-            raise FileNotFoundError("没有伴奏轨道文件")
-            return {"success": False, "message": "没有伴奏轨道文件"}
-
-        
-        if track == 0:
-            self.player.stop()
-            self.audio_track = 0
-            self.player.set_media(vlc.Media(self.current_file))
-            self.player.play()
-            self.player.set_time(position)  # 转换为毫秒
-        elif track == 1:
-            self.player.stop()
-            self.audio_track = 1
-            self.player.set_media(vlc.Media(Vocal_path))
-            self.player.play()
-            self.player.set_time(position)  # 转换为毫秒
-            print(f"切换到人声轨道，当前位置: {position:.2f}秒 当前路径:{Vocal_path}")
-        elif track == 2:
-            self.player.stop()
-            self.audio_track = 2
-            self.player.set_media(vlc.Media(Instrumental_path))
-            self.player.play()
-            self.player.set_time(position)  # 转换为毫秒
-            print(f"切换到伴奏轨道，当前位置: {position:.2f}秒 当前路径:{Instrumental_path}")
-
-
+        self.stems.select(track)
+        self.audio_track = track
+        print(f"[PlayerManager] 切换音频轨道: {track} 当前位置: {self.player.get_time() / 1000.0:.2f}秒")
 
     def set_file(self, path: str, position: float = 0.0):
         """
@@ -404,19 +446,12 @@ class PlayerManager:
         """
         self.current_directory = os.path.dirname(path)
         self.current_file = path
+        self.stems.stop()
+        self.audio_track = 0
         
-        # 更新播放列表信息
-        all_files = self.get_audio_files_in_directory(self.current_directory)
-        if all_files:
-            self.file_index = all_files.index(path) if path in all_files else 0
-        else:
-            self.file_index = -1
-            
-        # 如果是新的文件且不是单曲循环模式，添加到已播放列表
-        if path not in self.played_files and self.play_mode != PlayMode.LOOP:
-            self.played_files.append(path)
-        # 添加到播放历史记录（用于随机播放模式下的上一曲功能）
-        self._add_to_playback_history(path)
+        # 更新播放列表信息（目录曲目列表缓存，位置查找 O(1)）
+        self._update_file_index(path)
+        self._record_played(path)
         
         self.player.set_media(vlc.Media(self.current_file))
         # 根据popup_window设置决定是否全屏播放
@@ -431,6 +466,201 @@ class PlayerManager:
         PlayerManager.played_files = self.played_files
         #更新音频元数据
         self.get_AudioMetadata()
+
+    def _update_file_index(self, path: str):
+        """更新当前文件在所在目录中的位置（读取目录曲目列表）"""
+        tracks = self._get_track_list(os.path.dirname(path))
+        if tracks:
+            self.file_index = max(tracks.index_of(path), 0)
+        else:
+            self.file_index = -1
+        PlayerManager.file_index = self.file_index
+
+    def _record_played(self, path: str):
+        """切歌时的内存记录（已播放列表、播放历史、随机顺序游标），下一首的选择依赖这些状态"""
+        # 如果是新的文件且不是单曲循环模式，添加到已播放列表
+        if path not in self.played_files and self.play_mode != PlayMode.LOOP:
+            self.played_files.append(path)
+        # 添加到播放历史记录（用于随机播放模式下的上一曲功能）
+        self._add_to_playback_history(path)
+        # 移动播放列表随机顺序的游标
+        with self.playlist_lock:
+            item = self.playlist.get_by_path(path)
+            if item is not None:
+                self.shuffle_bag.mark_played(item.id)
+
+    def play_file(self, path: str, position: float = 0.0, started: Optional[float] = None) -> str:
+        """
+        低延迟切歌：设置媒体后立即播放，目录索引、标签和歌词在第一帧音频之后由后台线程补齐，
+        补齐后生成新 token 通知客户端刷新
+        Args:
+            path: 文件路径
+            position: 播放位置（秒），默认为0
+            started: 切歌请求开始的 time.perf_counter()，用于统计 time-to-first-audio
+
+        Returns:
+            str: 开始播放的文件（命令队列中被它取代的切歌请求也得到这个结果）
+        """
+        seq = self._begin_track_switch(path, started)
+        self.player.set_media(vlc.Media(path))
+        self.player.set_fullscreen(self.get_popup_window())
+        self.player.play()
+        if position > 0:
+            self.player.set_time(int(position * 1000))  # 转换为毫秒
+        self._publish_track_switch(seq, path)
+        return path
+
+    def adopt_player(self, path: str, player: vlc.MediaPlayer, started: float) -> vlc.MediaPlayer:
+        """
+        无缝切歌：把已预加载 path 的备用播放器换成当前播放器并开始播放（其余同 play_file）
+
+        Returns:
+            vlc.MediaPlayer: 被换下的旧播放器（播完剩余部分后停止，之后作为新的备用播放器）
+        """
+        seq = self._begin_track_switch(path, started)
+        old, self.player = self.player, player
+        PlayerManager.player = player
+        player.play()
+        self._publish_track_switch(seq, path)
+        return old
+
+    def skip_tracks(self, steps: int, started: Optional[float] = None) -> Optional[str]:
+        """
+        跳过 steps 首（负数为上一首），只播放最后一首；
+        中间的曲目只按顺序推进当前位置和播放记录（和逐首切歌的结果一致），不打开媒体
+
+        Returns:
+            Optional[str]: 播放的文件，没有可切换的音轨时返回 None
+
+        Raises:
+            ValueError: 播放列表为空等无法切换的情况
+        """
+        if steps == 0:
+            return self.current_file
+        direction = 1 if steps > 0 else -1
+        target = None
+        for step in range(abs(steps)):
+            path = self.get_next_file(direction)
+            if not path:
+                break
+            target = path
+            if step < abs(steps) - 1:
+                self.current_directory = os.path.dirname(path)
+                self.current_file = path
+                self._record_played(path)
+        if target:
+            self.play_file(target, 0.0, started)
+        return target
+
+    def resume(self):
+        """开始 / 继续播放"""
+        self.player.play()
+        self.stems.sync()
+        self.new_token()
+
+    def pause(self) -> bool:
+        """
+        暂停播放
+
+        Returns:
+            bool: 是否由播放状态暂停（已暂停时返回 False）
+        """
+        if self.player.get_state() != vlc.State.Playing:
+            return False
+        self.player.pause()
+        self.stems.sync()
+        self.new_token()
+        return True
+
+    def stop(self):
+        """停止播放"""
+        self.player.stop()
+        self.stems.sync()
+
+    def seek(self, ratio: float) -> Optional[float]:
+        """
+        跳转到播放位置
+
+        Args:
+            ratio: 位置（0-1）
+
+        Returns:
+            Optional[float]: 跳转后的实际位置（0-1），媒体未加载时返回 None
+        """
+        if self.player.get_media() is None:
+            return None
+        # 停止状态下 set_position 不生效，先激活再暂停
+        state = self.player.get_state()
+        if state not in (vlc.State.Playing, vlc.State.Paused):
+            player_logger.debug(f"[Seek] VLC 状态异常: {state}, 强制激活...")
+            self.player.play()
+            time.sleep(0.2)
+            self.player.pause()
+        self.player.set_position(ratio)
+        # 分轨播放器跟随跳转
+        self.stems.sync()
+        return self.player.get_position()
+
+    def _auto_next(self, seq: int) -> bool:
+        """播放结束后的自动下一首（播放结束之后已经切过歌时忽略）"""
+        if not self.track_switch.is_current(seq):
+            return False
+        return self._check_and_auto_next()
+
+    def _hand_over_player(self, seq: int, path: str, player: vlc.MediaPlayer,
+                          started: float) -> Optional[vlc.MediaPlayer]:
+        """无缝切歌交接（预加载之后已经切过歌时放弃，返回 None）"""
+        if not self.track_switch.is_current(seq):
+            return None
+        if self.settings.get_play_source() == 3:
+            # 预测时没有推进文件夹遍历，交接时才真正取出下一首
+            actual = self._get_next_folder_file(1)
+            if actual != path:
+                # 遍历状态在预测之后发生了变化：按普通方式播放真正的下一首
+                if actual:
+                    self.play_file(actual, 0.0, started)
+                return None
+        return self.adopt_player(path, player, started)
+
+    def _begin_track_switch(self, path: str, started: Optional[float]) -> int:
+        """登记切歌并更新当前文件和内存记录（旧曲目的标签和歌词立即失效，新的在后台读取）"""
+        seq = self.track_switch.begin(path, started)
+        # 分轨属于上一首，新曲目从原曲开始播放
+        self.stems.stop()
+        self.audio_track = 0
+        self.current_directory = os.path.dirname(path)
+        self.current_file = path
+        self.global_lyrics = None
+        self.artist = self.album = self.title = ""
+        self.duration = 0.0
+        self.bitrate = 0
+        self._record_played(path)
+        return seq
+
+    def _publish_track_switch(self, seq: int, path: str):
+        """开始播放后通知客户端，并排队执行延后工作"""
+        # 同步到类属性
+        PlayerManager.current_directory = self.current_directory
+        PlayerManager.current_file = self.current_file
+        PlayerManager.played_files = self.played_files
+        self.new_token()
+        self.track_switch.defer(seq, path)
+
+    def _finish_track_switch(self, seq: int, path: str):
+        """切歌的延后工作（后台线程）：目录索引、标签、歌词，完成后通知客户端"""
+        self._update_file_index(path)
+        if not self.track_switch.is_current(seq):
+            return
+        self.get_AudioMetadata()
+        try:
+            io_scheduler.call(path, self.load_lyrics)
+        except StorageUnavailableError as e:
+            player_logger.warning(f"[PlayerManager] 歌词读取失败: {e}")
+        if self.track_switch.is_current(seq):
+            self.new_token()
+            # 有 AI 分离的分轨时预加载，首次切换轨道也不用等待（会修改当前播放器的静音，由命令队列执行）
+            self.commands.submit(Command.CALL, self.stems.prepare, path)
+
     def set_position(self, position: float):
         """
         设置当前播放位置
@@ -439,6 +669,7 @@ class PlayerManager:
         """
 
         self.player.set_time(int(position * 1000))  # 转换为毫秒
+        self.stems.sync()
 
     def restore_last_playback(self) -> bool:
         """
@@ -463,7 +694,7 @@ class PlayerManager:
         last_position = playback_info["position"]
         
         # 检查文件是否存在
-        if not os.path.exists(last_file):
+        if not io_scheduler.path_exists(last_file):
             print(f"[PlayerManager] 上次播放的文件不存在: {last_file}")
             return False
         
@@ -536,30 +767,45 @@ class PlayerManager:
         print(f"[PlayerManager] 循环切换播放模式: {current_mode} -> {next_mode}")
         return next_mode
 
-    def _setup_vlc_event_manager(self):
+    def _setup_vlc_event_manager(self, player: vlc.MediaPlayer):
         """设置VLC事件监听器，监听播放结束事件"""
         try:
             # 获取VLC事件管理器
-            event_manager = self.player.event_manager()
+            event_manager = player.event_manager()
             
             # 监听播放结束事件
-            event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_media_end_reached)
+            event_manager.event_attach(vlc.EventType.MediaPlayerEndReached,
+                                       lambda event: self._on_media_end_reached(event, player))
+            # 监听开始播放事件（记录切歌的 time-to-first-audio，并放行延后工作）
+            event_manager.event_attach(vlc.EventType.MediaPlayerPlaying,
+                                       lambda event: self._on_media_playing(event, player))
             
             print("[PlayerManager] VLC事件监听器设置完成 - 监听播放结束事件")
         except Exception as e:
             print(f"[PlayerManager] VLC事件监听器设置失败: {e}")
     
-    def _on_media_end_reached(self, event):
+    def _on_media_end_reached(self, event, player=None):
         """VLC播放结束事件回调函数"""
         try:
+            # 无缝切歌已交接给备用播放器，旧播放器结束时不再自动切歌
+            if player is not None and self.gapless.on_end_reached(player):
+                return
+
             print("[PlayerManager] 检测到播放结束事件，触发自动播放检查")
             
-            # 在新线程中执行自动播放检查，避免阻塞事件回调
-            threading.Timer(0.1, lambda: self._check_and_auto_next()).start()
+            # 放入命令队列，由命令线程执行自动播放检查（不能在事件回调中操作播放器）
+            self.commands.submit(Command.AUTO_NEXT, self.track_switch.seq)
             
         except Exception as e:
             print(f"[PlayerManager] 播放结束事件处理错误: {e}")
     
+    def _on_media_playing(self, event, player=None):
+        """VLC开始播放事件回调函数"""
+        if player is not None and player is not self.player:
+            return
+        self.track_switch.on_playing()
+        self.gapless.on_playing(player)
+
     def set_volume(self, volume: int):
         """
         设置VLC播放器音量
@@ -577,6 +823,7 @@ class PlayerManager:
             
             # 同时更新设置中的音量值
             self.settings.set_volume(volume)
+            self.stems.sync()
             
             # 同步到类属性
             PlayerManager.settings = self.settings
@@ -657,12 +904,14 @@ class PlayerManager:
         """
         return self.settings.get_popup_window()
 
-    def get_next_file(self, direction: int = 1) -> Optional[str]: 
+    def get_next_file(self, direction: int = 1, peek: bool = False) -> Optional[str]: 
         """
         根据当前播放模式和播放来源设置获取下一个/上一个要播放的文件
         
         Args:
             direction: 方向（1=下一首，-1=上一首）
+            peek: 只预测下一首，不改变任何播放状态（文件夹遍历、随机顺序、已播放列表），
+                  只有改变状态才能确定下一首时返回 None（用于无缝切歌预加载）
             
         Returns:
             Optional[str]: 下一个/上一个文件路径，如果无法获取则返回None
@@ -673,23 +922,24 @@ class PlayerManager:
         # 获取播放来源和播放模式
         play_source = self.settings.get_play_source()
         
+        if play_source == 3:  # 文件夹递归模式
+            return self._get_next_folder_file(direction, peek)
+
         # 获取音频文件列表
         if play_source == 1:  # 播放列表模式
-            playlist = self.get_playlist()
-            if not playlist:
-                raise ValueError("播放列表为空，无法切换音轨")
-            
-            # 过滤出有效的文件路径（排除网址）
-            valid_files = [item['path'] for item in playlist if item['type'] == 'file' and os.path.exists(item['path'])]
-            if not valid_files:
-                raise ValueError("播放列表中没有有效的音频文件，无法切换音轨")
+            # 不再预先检查所有文件是否存在，只检查沿播放顺序经过的文件
+            with self.playlist_lock:
+                if not self.playlist:
+                    raise ValueError("播放列表为空，无法切换音轨")
+            valid_files = None
                 
         else:  # 磁盘路径模式
             if not self.current_directory:
                 return None
-            valid_files = self.get_audio_files_in_directory(self.current_directory)
-            if not valid_files:
+            tracks = self._get_track_list(self.current_directory)
+            if not tracks:
                 return None
+            valid_files = tracks.paths
         
         # 处理上一曲逻辑
         if direction == -1:
@@ -698,23 +948,23 @@ class PlayerManager:
                 if not self.current_file:
                     return None
                     
+                # 播放列表模式：沿随机顺序回退（O(1)），已回退到本轮开头时再使用播放历史
+                if play_source == 1:
+                    previous = self._find_shuffle_neighbor(-1)
+                    if previous:
+                        return previous
+                
                 # 确保当前文件在历史记录中
                 if not self.playback_history or self.playback_history[-1] != self.current_file:
                     self._add_to_playback_history(self.current_file)
                 
                 return self._get_previous_from_history()
+            elif play_source == 1:
+                # 播放列表模式下的上一曲
+                return self._find_playlist_neighbor(-1)
             else:
-                # 顺序播放模式下的上一曲
-                if self.current_file in valid_files:
-                    current_idx = valid_files.index(self.current_file)
-                    if current_idx > 0:
-                        return valid_files[current_idx - 1]
-                    else:
-                        # 如果是第一首，上一首是最后一首
-                        return valid_files[-1]
-                else:
-                    # 如果当前文件不在播放列表中，获取最后一首
-                    return valid_files[-1] if valid_files else None
+                # 顺序播放模式下的上一曲（第一首的上一首是最后一首，当前文件不在目录中时也取最后一首）
+                return tracks.neighbor(self.current_file, -1)
         
         # 处理下一曲逻辑（direction == 1）
         if self.play_mode == PlayMode.SINGLE:
@@ -728,32 +978,27 @@ class PlayerManager:
         elif self.play_mode == PlayMode.SEQUENTIAL:
             # 顺序播放
             if play_source == 1:  # 播放列表模式
-                if self.current_file in valid_files:
-                    current_idx = valid_files.index(self.current_file)
-                    if current_idx < len(valid_files) - 1:
-                        return valid_files[current_idx + 1]
-                    else:
-                        # 如果是最后一个文件，重新开始
-                        return valid_files[0]
-                else:
-                    # 如果当前文件不在播放列表中，从第一首开始
-                    return valid_files[0]
-            else:  # 磁盘路径模式
-                if self.file_index >= 0 and self.file_index < len(valid_files) - 1:
-                    return valid_files[self.file_index + 1]
-                elif len(valid_files) > 0:
-                    # 如果是最后一个文件，重新开始
-                    return valid_files[0]
-                return None
+                return self._find_playlist_neighbor(1)
+            else:  # 磁盘路径模式（最后一个文件之后重新开始）
+                return tracks.neighbor(self.current_file, 1)
             
         elif self.play_mode == PlayMode.RANDOM:
+            if play_source == 1:  # 播放列表模式
+                if peek:
+                    # 本轮播完时需要重新洗牌，留到真正切歌时处理
+                    return self._find_shuffle_neighbor(1)
+                return self._pick_random_from_playlist()
+
             # 随机播放，避免连续播放同一首歌
             if len(valid_files) == 1:
                 return valid_files[0]
             
             # 过滤掉已播放的文件，如果都已播放，则重置
-            available_files = [f for f in valid_files if f not in self.played_files]
+            played = set(self.played_files)
+            available_files = [f for f in valid_files if f not in played]
             if not available_files:
+                if peek:
+                    return None
                 self.played_files = [self.current_file] if self.current_file else []
                 available_files = [f for f in valid_files if f != self.current_file]
             
@@ -763,6 +1008,104 @@ class PlayerManager:
         
         return None
 
+    def _get_next_folder_file(self, direction: int, peek: bool = False) -> Optional[str]:
+        """文件夹递归模式的下一首 / 上一首（顺序或随机由开始播放文件夹时决定）"""
+        if direction == -1:
+            return None if peek else self.folder_source.previous()
+        if self.play_mode == PlayMode.SINGLE:
+            return None
+        if self.play_mode == PlayMode.LOOP:
+            return self.current_file
+        try:
+            return self.folder_source.peek_next() if peek else self.folder_source.next()
+        except StorageUnavailableError as e:
+            player_logger.warning(f"[PlayerManager] 文件夹播放读取失败: {e}")
+            return None
+
+    def _iter_playlist_files(self, direction: int):
+        """
+        从当前文件在播放列表中的位置开始，按方向循环遍历本地文件路径（最多一圈）
+        当前文件不在播放列表中时，下一首从第一项开始，上一首从最后一项开始
+        每次在锁内取一小批，检查文件是否存在时不持有播放列表锁
+        """
+        with self.playlist_lock:
+            total = len(self.playlist)
+            current = self.playlist.get_by_path(self.current_file) if self.current_file else None
+            cursor_id = current.id if current is not None else None
+
+        visited = 0
+        while visited < total:
+            paths = []
+            with self.playlist_lock:
+                if not self.playlist:
+                    return
+                cursor = self.playlist.get(cursor_id) if cursor_id is not None else None
+                if cursor_id is not None and cursor is None:
+                    # 遍历到的项目已被删除，停止
+                    return
+                for _ in range(self.PLAYLIST_SCAN_BATCH):
+                    if visited >= total:
+                        break
+                    step = None
+                    if cursor is not None:
+                        step = self.playlist.next_item(cursor) if direction > 0 else self.playlist.prev_item(cursor)
+                    # 到头后循环
+                    cursor = step if step is not None else self.playlist.item_at(0 if direction > 0 else -1)
+                    visited += 1
+                    if cursor.type == 'file':
+                        paths.append(cursor.path)
+                cursor_id = cursor.id
+            yield from paths
+
+    def _find_playlist_neighbor(self, direction: int) -> str:
+        """
+        播放列表中当前文件的下一首 / 上一首（跳过不存在的文件，到头后循环）
+        已知不存在的文件直接按缓存跳过，只重新检查选中的文件
+
+        Raises:
+            ValueError: 播放列表中没有有效的音频文件
+        """
+        for path in self._iter_playlist_files(direction):
+            if file_status.get(path) is not False and file_status.check(path):
+                return path
+        raise ValueError("播放列表中没有有效的音频文件，无法切换音轨")
+
+    def _pick_random_from_playlist(self) -> str:
+        """
+        播放列表随机播放：取随机顺序中游标之后的下一首，本轮播完后重新洗牌
+
+        Raises:
+            ValueError: 播放列表中没有有效的音频文件
+        """
+        path = self._find_shuffle_neighbor(1)
+        if path is None:
+            with self.playlist_lock:
+                current = self.playlist.get_by_path(self.current_file) if self.current_file else None
+                self.shuffle_bag.reshuffle(current.id if current is not None else None)
+            path = self._find_shuffle_neighbor(1)
+        if path is None and self.current_file in self.playlist and file_status.check(self.current_file):
+            # 只有当前文件可以播放（如播放列表只有一首）
+            path = self.current_file
+        if path is None:
+            raise ValueError("播放列表中没有有效的音频文件，无法切换音轨")
+        return path
+
+    def _find_shuffle_neighbor(self, direction: int) -> Optional[str]:
+        """
+        随机顺序中游标之后（direction=1）或之前（direction=-1）第一个存在的本地文件，没有时返回 None
+        每次在锁内取一小批，已知不存在的文件按缓存跳过，只检查选中的文件
+        """
+        offset = 0
+        while offset is not None:
+            with self.playlist_lock:
+                ids, offset = self.shuffle_bag.peek(direction, offset, self.PLAYLIST_SCAN_BATCH)
+                paths = [item.path for item in map(self.playlist.get, ids)
+                         if item is not None and item.type == 'file']
+            for path in paths:
+                if file_status.get(path) is not False and file_status.check(path):
+                    return path
+        return None
+
     def set_lyrics(self, lyrics: Optional[str]):
         self.global_lyrics = lyrics
         PlayerManager.global_lyrics = lyrics
@@ -779,45 +1122,39 @@ class PlayerManager:
         Returns:
             dict: 包含添加结果的字典
         """
+        # 检查播放来源设置
+        play_source = self.settings.get_play_source()
+        if play_source == 2:  # 磁盘路径模式
+            return {"status": "error", "message": "当前播放来源为磁盘路径模式，播放列表已被锁定为只读"}
+
+        # 检查路径类型：本地文件或网址
+        is_url = path.startswith(('http://', 'https://', 'ftp://'))
+
+        if not is_url:
+            # 本地文件路径检查（通过存储根线程池，带超时）；不持有播放列表锁，存储卡住时不影响其他播放列表操作
+            try:
+                exists = io_scheduler.call(path, os.path.exists, path)
+            except StorageUnavailableError as e:
+                return {"status": "error", "message": f"存储不可用: {e}"}
+            if not exists:
+                return {"status": "error", "message": "文件路径不存在"}
+        else:
+            # 网址验证（基本格式检查）
+            if not re.match(r'^https?://[^\s/$.?#].[^\s]*$', path):
+                return {"status": "error", "message": "网址格式不正确"}
+
         with self.playlist_lock:
-            # 检查播放来源设置
-            play_source = self.settings.get_play_source()
-            if play_source == 2:  # 磁盘路径模式
-                return {"status": "error", "message": "当前播放来源为磁盘路径模式，播放列表已被锁定为只读"}
+            # 检查是否已存在相同路径的项（路径索引，O(1)；在锁内检查，检查存在性期间可能已被添加）
+            if path in self.playlist:
+                return {"status": "error", "message": "该文件或网址已在播放列表中"}
             
-            # 检查是否已存在相同路径的项
-            for item in self.playlist:
-                if item["path"] == path:
-                    return {"status": "error", "message": "该文件或网址已在播放列表中"}
-            
-            # 检查路径类型：本地文件或网址
-            is_url = path.startswith(('http://', 'https://', 'ftp://'))
-            
-            if not is_url:
-                # 本地文件路径检查
-                if not os.path.exists(path):
-                    return {"status": "error", "message": "文件路径不存在"}
-            else:
-                # 网址验证（基本格式检查）
-                if not re.match(r'^https?://[^\s/$.?#].[^\s]*$', path):
-                    return {"status": "error", "message": "网址格式不正确"}
-            
-            # 生成新ID（自动递增）
-            new_id = max([item["id"] for item in self.playlist], default=0) + 1
-            
-            # 添加新项
-            new_item = {
-                "id": new_id,
-                "name": name,
-                "path": path,
-                "type": "url" if is_url else "file"  # 添加类型标识
-            }
-            self.playlist.append(new_item)
+            # 添加新项（自动分配稳定 ID，type 为类型标识）
+            new_item = self.playlist.append(name, path, "url" if is_url else "file")
             
             # 同步到类属性
             PlayerManager.playlist = self.playlist
             
-            return {"status": "success", "message": "添加成功", "item": new_item}
+            return {"status": "success", "message": "添加成功", "item": new_item.to_dict()}
     
     def remove_from_playlist(self, identifier: Union[int, str]) -> dict:
         """
@@ -835,37 +1172,120 @@ class PlayerManager:
             if play_source == 2:  # 磁盘路径模式
                 return {"status": "error", "message": "当前播放来源为磁盘路径模式，播放列表已被锁定为只读"}
             
-            # 查找要删除的项
-            item_to_remove = None
-            for item in self.playlist:
-                if (isinstance(identifier, int) and item["id"] == identifier) or \
-                   (isinstance(identifier, str) and item["name"] == identifier):
-                    item_to_remove = item
-                    break
+            # 查找要删除的项（ID 或名称索引）
+            if isinstance(identifier, int):
+                item_to_remove = self.playlist.get(identifier)
+            else:
+                item_to_remove = self.playlist.find_by_name(identifier)
             
             if not item_to_remove:
                 return {"status": "error", "message": "未找到指定的播放列表项"}
             
-            # 删除项
-            self.playlist.remove(item_to_remove)
-            
-            # 重新排序ID
-            self._reorder_playlist_ids()
+            # 删除项（其余项目的 ID 保持不变）
+            self.playlist.remove(item_to_remove.id)
             
             # 同步到类属性
             PlayerManager.playlist = self.playlist
             
-            return {"status": "success", "message": "删除成功", "item": item_to_remove}
-    
-    def _reorder_playlist_ids(self):
-        """重新排序播放列表ID"""
-        for i, item in enumerate(self.playlist, 1):
-            item["id"] = i
+            return {"status": "success", "message": "删除成功", "item": item_to_remove.to_dict()}
     
     def get_playlist(self) -> List[dict]:
-        """获取播放列表"""
+        """获取播放列表（本地文件附带缓存的存在状态 exists：true / false / null 表示尚未检查）"""
         with self.playlist_lock:
-            return self.playlist.copy()
+            playlist = self.playlist.to_list()
+        return self._with_file_status(playlist)
+
+    @staticmethod
+    def _with_file_status(items: List[dict]) -> List[dict]:
+        for item in items:
+            if item["type"] == 'file':
+                item["exists"] = file_status.get(item["path"])
+        return items
+
+    def get_playlist_page(self, offset: int = 0, limit: Optional[int] = None) -> dict:
+        """
+        获取播放列表的一页和当前版本（同一次加锁内读取，保证页面与版本一致）
+
+        Args:
+            offset: 起始位置
+            limit: 最多返回的项目数，None 表示到末尾
+
+        Returns:
+            dict: {playlist, count, offset, version, epoch, total_duration}
+        """
+        with self.playlist_lock:
+            count = len(self.playlist)
+            if offset == 0 and limit is None:
+                items = self.playlist.to_list()
+            else:
+                stop = count if limit is None else offset + limit
+                items = [item.to_dict() for item in self.playlist.slice(offset, stop)]
+            version, epoch = self.playlist_changes.version, self.playlist_changes.epoch
+            total_duration = self.playlist.total_duration
+        return {
+            "playlist": self._with_file_status(items),
+            "count": count,
+            "offset": offset,
+            "version": version,
+            "epoch": epoch,
+            "total_duration": round(total_duration, 2),
+        }
+
+    def get_playlist_changes(self, since: int, epoch: Optional[str] = None) -> Optional[dict]:
+        """
+        获取 since 版本之后的播放列表变更
+
+        Returns:
+            Optional[dict]: {ops, version, epoch, count, total_duration}；版本过旧或纪元不同需要全量刷新时返回 None
+        """
+        with self.playlist_lock:
+            ops = self.playlist_changes.since(since, epoch)
+            if ops is None:
+                return None
+            return {
+                "ops": ops,
+                "version": self.playlist_changes.version,
+                "epoch": self.playlist_changes.epoch,
+                "count": len(self.playlist),
+                "total_duration": round(self.playlist.total_duration, 2),
+            }
+
+    def _track_playlist_files(self, record: dict):
+        """播放列表变更监听：维护存在性缓存登记的本地文件（调用方持有 playlist_lock）"""
+        op = record["op"]
+        if op == "insert":
+            if record["item"]["type"] == 'file':
+                file_status.track([record["item"]["path"]])
+        elif op == "extend":
+            file_status.track(item["path"] for item in record["items"] if item["type"] == 'file')
+        elif op == "remove":
+            file_status.untrack([record["path"]])
+        elif op == "clear":
+            file_status.clear()
+
+    def _queue_playlist_metadata(self, record: dict):
+        """播放列表变更监听：缺少时长的本地文件排队补全标签（调用方持有 playlist_lock）"""
+        op = record["op"]
+        if op in ("insert", "extend"):
+            items = [record["item"]] if op == "insert" else record["items"]
+            self.playlist_enricher.enqueue(
+                item["path"] for item in items if item["type"] == 'file' and not item.get("duration")
+            )
+        elif op == "remove":
+            self.playlist_enricher.discard([record["path"]])
+        elif op == "clear":
+            self.playlist_enricher.clear()
+
+    def _apply_playlist_metadata(self, tracks: Dict[str, dict]) -> int:
+        """把媒体库读取的标签写回播放列表项目，返回更新的项目数"""
+        updated = 0
+        with self.playlist_lock:
+            for path, tags in tracks.items():
+                item = self.playlist.get_by_path(path)
+                if item is not None:
+                    self.playlist.update(item.id, tags["artist"], tags["title"], tags["duration"])
+                    updated += 1
+        return updated
     
     def clear_playlist(self) -> dict:
         """清空播放列表"""
@@ -876,10 +1296,158 @@ class PlayerManager:
             self.clear_playback_history()
             return {"status": "success", "message": "播放列表已清空"}
 
+    # ============================= 播放列表批量修改 =============================
+    def _list_folder_media(self, folder: str, recursive: bool = True) -> List[str]:
+        """列出文件夹下的媒体文件（按目录、文件名排序），最多 PLAYLIST_BATCH_MAX_FILES 个"""
+        from app.core.media_types import get_media_type, MEDIA_NONE
+
+        def walk():
+            files = []
+            stack = [folder]
+            while stack and len(files) < self.PLAYLIST_BATCH_MAX_FILES:
+                directory = stack.pop()
+                try:
+                    with os.scandir(directory) as it:
+                        entries = sorted(it, key=lambda e: e.name)
+                except OSError:
+                    continue
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.path)
+                        elif get_media_type(entry.name) != MEDIA_NONE:
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+                if recursive:
+                    stack.extend(reversed(subdirs))
+            return files[:self.PLAYLIST_BATCH_MAX_FILES]
+
+        return io_scheduler.call(folder, walk, timeout=io_scheduler.DEFAULT_TIMEOUT * 6)
+
+    def apply_playlist_batch(self, operations: List[dict]) -> dict:
+        """
+        在一次加锁中批量修改播放列表
+
+        支持的操作（按顺序执行）：
+            {"op": "add", "path": ..., "name": ...}
+            {"op": "remove", "id": ...} 或 {"op": "remove", "name": ...}
+            {"op": "move", "id": ..., "index": ...}
+            {"op": "add_search", "paths": [...]}（搜索结果，由调用方先展开为路径列表）
+            {"op": "add_folder", "path": ..., "recursive": true}
+
+        文件夹展开和存在性检查在加锁前完成（并行、按存储根分组），加锁后只做内存操作
+
+        Returns:
+            dict: 总体结果 + 每个操作的结果
+        """
+        # 1. 展开文件夹，收集需要检查的本地路径
+        expanded: Dict[int, List[str]] = {}
+        to_check: List[str] = []
+        for i, op in enumerate(operations):
+            kind = op.get("op")
+            if kind == "add":
+                path = op.get("path") or ""
+                if path and not path.startswith(('http://', 'https://', 'ftp://')):
+                    to_check.append(path)
+            elif kind == "add_search":
+                expanded[i] = [p for p in op.get("paths") or [] if isinstance(p, str)][:self.PLAYLIST_BATCH_MAX_FILES]
+                to_check.extend(expanded[i])
+            elif kind == "add_folder" and op.get("path"):
+                try:
+                    # 刚从磁盘列出的文件不再单独检查
+                    expanded[i] = self._list_folder_media(os.path.abspath(op["path"]), bool(op.get("recursive", True)))
+                except StorageUnavailableError as e:
+                    expanded[i] = e
+
+        # 2. 并行检查文件是否存在
+        exists = file_status.check_many(to_check)
+
+        # 3. 加锁后按顺序应用
+        results = []
+        summary = {"added": 0, "removed": 0, "moved": 0, "skipped": 0, "failed": 0}
+        with self.playlist_lock:
+            if self.settings.get_play_source() == 2:
+                return {"status": "error", "message": "当前播放来源为磁盘路径模式，播放列表已被锁定为只读"}
+
+            for i, op in enumerate(operations):
+                kind = op.get("op")
+                result = {"index": i, "op": kind}
+                try:
+                    if "error" in op:
+                        # 调用方预处理阶段已失败的操作（如搜索失败）
+                        raise ValueError(op["error"])
+                    if kind == "add":
+                        result.update(self._batch_add_one(op, exists))
+                        if result["status"] == "success":
+                            summary["added"] += 1
+                    elif kind in ("add_search", "add_folder"):
+                        paths = expanded.get(i)
+                        if isinstance(paths, Exception):
+                            raise paths
+                        if paths is None:
+                            raise ValueError("缺少 path 参数")
+                        added = self.playlist.extend(
+                            {"name": os.path.basename(p), "path": p, "type": "file"}
+                            for p in paths if kind == "add_folder" or exists.get(p)
+                        )
+                        skipped = len(paths) - len(added)
+                        summary["added"] += len(added)
+                        summary["skipped"] += skipped
+                        result.update({"status": "success", "added": len(added), "skipped": skipped})
+                    elif kind == "remove":
+                        item = self.playlist.get(op["id"]) if "id" in op else self.playlist.find_by_name(op.get("name", ""))
+                        if item is None:
+                            raise ValueError("未找到指定的播放列表项")
+                        self.playlist.remove(item.id)
+                        summary["removed"] += 1
+                        result.update({"status": "success", "item": item.to_dict()})
+                    elif kind == "move":
+                        item = self.playlist.move(int(op["id"]), int(op["index"]))
+                        if item is None:
+                            raise ValueError("未找到指定的播放列表项")
+                        summary["moved"] += 1
+                        result.update({"status": "success", "id": item.id, "position": self.playlist.index_of(item)})
+                    else:
+                        raise ValueError(f"不支持的操作: {kind}")
+                except (KeyError, TypeError, ValueError, OSError) as e:
+                    result.update({"status": "error", "message": str(e)})
+                if result.get("status") == "skipped":
+                    summary["skipped"] += 1
+                elif result.get("status") != "success":
+                    summary["failed"] += 1
+                results.append(result)
+
+            PlayerManager.playlist = self.playlist
+            count = len(self.playlist)
+
+        return {"status": "success", "message": "批量修改完成", "summary": summary, "results": results, "count": count}
+
+    def _batch_add_one(self, op: dict, exists: Dict[str, Optional[bool]]) -> dict:
+        """批量修改中的单个添加（调用方持有 playlist_lock）"""
+        path = op.get("path") or ""
+        if not path:
+            return {"status": "error", "message": "缺少 path 参数"}
+        if path in self.playlist:
+            return {"status": "skipped", "message": "该文件或网址已在播放列表中"}
+        is_url = path.startswith(('http://', 'https://', 'ftp://'))
+        if is_url:
+            if not re.match(r'^https?://[^\s/$.?#].[^\s]*$', path):
+                return {"status": "error", "message": "网址格式不正确"}
+        elif exists.get(path) is None:
+            return {"status": "error", "message": "存储不可用"}
+        elif not exists[path]:
+            return {"status": "error", "message": "文件路径不存在"}
+        name = op.get("name") or os.path.basename(path) or path
+        item = self.playlist.append(name, path, "url" if is_url else "file")
+        return {"status": "success", "item": item.to_dict()}
+
     # ============================= 播放列表保存和恢复功能 =============================
     def save_playlist_to_file(self, file_path: str = "playlist.json") -> dict:
         """
         保存播放列表到JSON文件
+        保存到日志快照路径时执行一次日志压缩（写入快照并删除已包含的日志），否则导出一份副本
         
         Args:
             file_path: 保存的文件路径，默认为playlist.json
@@ -887,83 +1455,121 @@ class PlayerManager:
         Returns:
             dict: 包含保存结果的字典
         """
+        try:
+            if os.path.abspath(file_path) == os.path.abspath(self.playlist_journal.snapshot_path):
+                count = self.playlist_journal.compact()
+            else:
+                with self.playlist_lock:
+                    items = self.playlist.to_list()
+                # 导出的副本不属于日志，seq 记为 0
+                PlaylistJournal(snapshot_path=file_path).write_snapshot(items, 0)
+                count = len(items)
+            
+            print(f"[PlayerManager] 播放列表已保存到 {file_path}，共 {count} 个项目")
+            return {"status": "success", "message": "播放列表保存成功", "file_path": file_path, "count": count}
+            
+        except Exception as e:
+            print(f"[PlayerManager] 保存播放列表失败: {e}")
+            return {"status": "error", "message": f"保存播放列表失败: {e}"}
+
+    def _playlist_snapshot(self):
+        """供日志压缩使用：在同一次加锁内导出播放列表并切换日志文件"""
         with self.playlist_lock:
-            try:
-                # 准备要保存的数据
-                playlist_data = {
-                    "version": "1.0",
-                    "timestamp": time.time(),
-                    "playlist": self.playlist.copy()
-                }
-                
-                # 保存到文件
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(playlist_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"[PlayerManager] 播放列表已保存到 {file_path}，共 {len(self.playlist)} 个项目")
-                return {"status": "success", "message": "播放列表保存成功", "file_path": file_path, "count": len(self.playlist)}
-                
-            except Exception as e:
-                print(f"[PlayerManager] 保存播放列表失败: {e}")
-                return {"status": "error", "message": f"保存播放列表失败: {e}"}
+            return self.playlist.to_list(), self.playlist_journal.rotate()
+
+    def _add_playlist_listeners(self):
+        """为当前播放列表注册变更监听：存在性缓存、随机顺序、标签补全队列和版本记录"""
+        self.playlist.add_listener(self._track_playlist_files)
+        self.playlist.add_listener(self.shuffle_bag.apply)
+        self.playlist.add_listener(self._queue_playlist_metadata)
+        self.playlist.add_listener(self.playlist_changes.record)
+
+    def _attach_playlist_journal(self):
+        """注册变更监听，并让当前播放列表的每次修改都写入日志（调用方持有 playlist_lock）"""
+        self._add_playlist_listeners()
+        self.playlist.add_listener(self.playlist_journal.append)
+        self.playlist_journal.open(self._playlist_snapshot)
     
     def load_playlist_from_file(self, file_path: str = "playlist.json") -> dict:
         """
-        从JSON文件恢复播放列表
+        从快照和日志恢复播放列表（启动时调用）
+        读取快照 playlist.json 后重放 playlist.journal 中更新的修改，之后的修改都写入日志
         
         Args:
-            file_path: 要加载的文件路径，默认为playlist.json
+            file_path: 快照文件路径，默认为playlist.json
             
         Returns:
             dict: 包含恢复结果的字典
         """
         with self.playlist_lock:
+            restored = False
             try:
-                # 检查文件是否存在
-                if not os.path.exists(file_path):
+                self.playlist_journal.snapshot_path = file_path
+                items, records = self.playlist_journal.load()
+                if items is None and not records:
                     print(f"[PlayerManager] 播放列表文件不存在: {file_path}")
+                    self.shuffle_bag.load(item.id for item in self.playlist)
+                    self._attach_playlist_journal()
                     return {"status": "error", "message": "播放列表文件不存在"}
                 
-                # 读取文件内容
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    playlist_data = json.load(f)
-                
-                # 验证数据格式
-                if "playlist" not in playlist_data:
-                    print(f"[PlayerManager] 播放列表文件格式错误: {file_path}")
-                    return {"status": "error", "message": "播放列表文件格式错误"}
-                
                 # 验证播放列表项格式
                 valid_playlist = []
-                for item in playlist_data["playlist"]:
+                for item in items or []:
                     if isinstance(item, dict) and "name" in item and "path" in item:
-                        # 检查文件是否存在（如果是本地文件）
-                        if not item["path"].startswith(('http://', 'https://', 'ftp://')):
-                            if not os.path.exists(item["path"]):
-                                print(f"[PlayerManager] 文件不存在，跳过: {item['path']}")
-                                continue
-                        
-                        # 确保有必要的字段
-                        valid_item = {
-                            "id": len(valid_playlist) + 1,
+                        # 确保有必要的字段（保留原有 ID，缺失或重复时重新分配）
+                        valid_playlist.append({
+                            "id": item.get("id"),
                             "name": item["name"],
                             "path": item["path"],
                             "type": item.get("type", "file"),
                             "artist": item.get("artist", ""),
                             "title": item.get("title", ""),
                             "duration": item.get("duration", 0)
-                        }
-                        valid_playlist.append(valid_item)
+                        })
+                
+                # 重放快照之后的修改
+                playlist = IndexedPlaylist(valid_playlist)
+                for record in records:
+                    playlist.apply(record)
                 
-                # 更新播放列表
-                self.playlist = valid_playlist
+                restored = True
+                
+                # 更新播放列表（整体替换，客户端需要全量刷新）
+                self.playlist = playlist
                 PlayerManager.playlist = self.playlist
+                self._attach_playlist_journal()
+                self.playlist_changes.reset()
+                
+                # 本地文件是否存在由后台分批检查，不存在的文件保留在列表中，切歌时跳过
+                file_status.clear()
+                file_status.track(item.path for item in playlist if item.type == 'file')
+                # 恢复上次的随机顺序
+                self.shuffle_bag.load(item.id for item in playlist)
+                # 缺少时长的本地文件在后台补全标签
+                self.playlist_enricher.clear()
+                self.playlist_enricher.enqueue(
+                    item.path for item in playlist if item.type == 'file' and not item.duration
+                )
                 
-                print(f"[PlayerManager] 播放列表已从 {file_path} 恢复，共 {len(self.playlist)} 个有效项目")
+                if records:
+                    # 重放过日志：在后台合并为新快照
+                    self.playlist_journal.request_compaction()
+                
+                print(f"[PlayerManager] 播放列表已从 {file_path} 恢复（重放 {len(records)} 条修改），共 {len(self.playlist)} 个有效项目")
                 return {"status": "success", "message": "播放列表恢复成功", "file_path": file_path, "count": len(self.playlist)}
                 
             except Exception as e:
                 print(f"[PlayerManager] 恢复播放列表失败: {e}")
+                if not restored:
+                    # 无法读取或重放的快照和日志移到一旁保留，之后的压缩不会覆盖它们；
+                    # 移动失败时 can_compact 保持 False，退出时也不保存
+                    try:
+                        moved = self.playlist_journal.quarantine()
+                        if moved:
+                            print(f"[PlayerManager] 已将无法恢复的播放列表文件移到: {', '.join(moved)}")
+                    except OSError as move_error:
+                        print(f"[PlayerManager] 移动播放列表文件失败: {move_error}")
+                self._attach_playlist_journal()
                 return {"status": "error", "message": f"恢复播放列表失败: {e}"}
 
     # ============================= 工具方法 =============================
@@ -1077,21 +1683,24 @@ class PlayerManager:
         return [f"{d}" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(f"{d}:\\")]
 
     def extract_album_cover(self, file_path: str) -> Optional[bytes]:
-        """提取封面"""
-        audio = eyed3.load(file_path)
-        if audio and audio.tag and audio.tag.images:
-            return audio.tag.images[0].image_data
-        return None
+        """提取封面（经由按内容寻址的封面缓存）"""
+        return album_art.get_cover_bytes(file_path)
 
     def get_audio_files_in_directory(self, directory: str) -> List[str]:
-        """获取目录下音频文件"""
-        if not directory or not os.path.isdir(directory):
-            return []
-        return [
-            os.path.join(directory, f)
-            for f in os.listdir(directory)
-            if f.lower().endswith(('.mp3', '.flac', '.wav'))
-        ]
+        """获取目录下音频文件（自然排序，存储不可用时返回空列表）"""
+        return list(self._get_track_list(directory).paths)
+
+    def _get_track_list(self, directory: str) -> TrackList:
+        """获取目录的曲目列表缓存（通过存储根线程池，目录不存在或存储不可用时返回空列表）"""
+        if not directory:
+            return TrackList(directory, -1, [])
+        try:
+            return io_scheduler.call(directory, track_list_cache.get, directory)
+        except StorageUnavailableError as e:
+            player_logger.warning(f"[PlayerManager] 读取目录失败: {e}")
+        except OSError:
+            pass
+        return TrackList(directory, -1, [])
 
     async def switch_track(self, direction: int, request=None):
         """
@@ -1107,35 +1716,17 @@ class PlayerManager:
         from quart import jsonify
         from app.core.logging import player_logger
         
-        # 获取目标音轨文件（所有检查逻辑都在get_next_file中处理）
+        started = time.perf_counter()
+        # 放入命令队列（排队中的连续切歌合并为一次跳过 N 首），目标音轨由 get_next_file 决定
         try:
-            next_file_path = self.get_next_file(direction)
-            if not next_file_path:
-                return jsonify({"status": "error", "message": "没有可切换的音轨"}), 400
+            next_file_path = await self.commands.run(Command.SKIP, direction, started=started)
         except ValueError as e:
             # 播放列表为空等异常情况，返回友好错误信息
             return jsonify({"status": "error", "message": str(e)}), 400
-        except Exception as e:
-            return jsonify({"status": "error", "message": f"获取音轨失败: {str(e)}"}), 500
-
-        # 设置新文件并播放
-        try:
-            # 设置新文件
-            self.set_file(next_file_path)
-            
-            # 加载歌词
-            import asyncio
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self.load_lyrics)
-            
-            # 设置媒体并播放
-            await loop.run_in_executor(None, self.player.play)
-            
-            # 生成新token
-            self.new_token()
-
         except Exception as e:
             return jsonify({"status": "error", "message": f"播放文件失败: {str(e)}"}), 500
+        if not next_file_path:
+            return jsonify({"status": "error", "message": "没有可切换的音轨"}), 400
 
         # 返回成功响应
         action = "next" if direction == 1 else "prev"
@@ -1158,7 +1749,8 @@ class PlayerManager:
             "remember_playback": self.settings.get("remember_playback"),
             "last_position": self.settings.get("last_position"),
             "volume": self.settings.get("volume"),
-            "play_mode": self.settings.get("play_mode")
+            "play_mode": self.settings.get("play_mode"),
+            "gapless": self.settings.get_gapless()
         }
     
     def update_playback_position(self, position: float):
@@ -1194,37 +1786,23 @@ class PlayerManager:
         """
         from app.core.logging import player_logger
         
+        started = time.perf_counter()
         # 播放列表模式下的自动播放逻辑
         play_source = self.settings.get_play_source()
         
         if play_source == 1:  # 播放列表模式
             try:
                 # 在自动播放中，如果播放列表为空，直接停止播放
-                playlist = self.get_playlist()
-                if not playlist:
-                    player_logger.debug("[AUTO] 播放列表为空，自动播放停止")
-                    return False
-                
-                valid_files = [item['path'] for item in playlist if item['type'] == 'file' and os.path.exists(item['path'])]
-                if not valid_files:
-                    player_logger.debug("[AUTO] 播放列表中没有有效的音频文件，自动播放停止")
-                    return False
+                with self.playlist_lock:
+                    if not self.playlist:
+                        player_logger.debug("[AUTO] 播放列表为空，自动播放停止")
+                        return False
                 
-                # 获取下一个文件并自动播放
+                # 获取下一个文件并自动播放（没有有效文件时 get_next_file 抛出 ValueError）
                 next_file_path = self.get_next_file()
                 if next_file_path:
-                    self.set_file(next_file_path)
-                    
-                    # 加载歌词（使用线程安全的方式）
-                    import threading
-                    threading.Thread(target=self.load_lyrics, daemon=True).start()
-                    
-                    # 播放
-                    media = vlc.Media(next_file_path)
-                    self.player.play()
-                    
-                    # 生成新token
-                    self.new_token()
+                    # 立即播放，目录索引、标签和歌词由后台补齐
+                    self.play_file(next_file_path, 0.0, started)
                     
                     player_logger.info(f"[AUTO] 自动切换 → {os.path.basename(next_file_path)}")
                     return True
@@ -1245,18 +1823,8 @@ class PlayerManager:
             try:
                 next_file_path = self.get_next_file()
                 if next_file_path:
-                    self.set_file(next_file_path)
-                    
-                    # 加载歌词（使用线程安全的方式）
-                    import threading
-                    threading.Thread(target=self.load_lyrics, daemon=True).start()
-                    
-                    # 播放
-                    media = vlc.Media(next_file_path)
-                    self.player.play()
-                    
-                    # 生成新token
-                    self.new_token()
+                    # 立即播放，目录索引、标签和歌词由后台补齐
+                    self.play_file(next_file_path, 0.0, started)
                     
                     player_logger.info(f"[AUTO] 自动切换 → {os.path.basename(next_file_path)}")
                     return True
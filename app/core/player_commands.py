@@ -0,0 +1,209 @@
+# app/core/player_commands.py
+"""
+播放器命令队列
+控制路由、VLC 自动下一首和无缝交接都把改变播放状态的操作放入同一个队列，由单个工作线程依次执行，
+不再在多个线程池线程和 VLC 回调线程中同时修改 PlayerManager。
+排队中的命令会合并：连续 N 次下一首合并为一次跳过 N 首，连续跳转只保留最后一次，
+音量和切换音轨以最后一次为准，有切歌命令排队时自动下一首直接丢弃；被合并的请求共享同一个执行结果
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from app.core.logging import player_logger
+
+
+class Command(Enum):
+    """播放器命令"""
+    SKIP = "skip"                # 跳过 N 首（负数为上一首）
+    PLAY_FILE = "play_file"      # 播放指定文件
+    PLAY = "play"
+    PAUSE = "pause"
+    STOP = "stop"
+    SEEK = "seek"                # 跳转到位置（0-1）
+    VOLUME = "volume"
+    AUDIO_TRACK = "audio_track"  # 切换原曲 / 人声 / 伴奏
+    AUTO_NEXT = "auto_next"      # 播放结束后的自动下一首（VLC 回调）
+    HANDOFF = "handoff"          # 无缝切歌交接
+    CALL = "call"                # 其他需要串行执行的操作（不合并）
+
+
+# 改变当前曲目的命令：排在它们之前的跳转 / 切换音轨不能和之后的合并
+_TRACK_CHANGES = (Command.SKIP, Command.PLAY_FILE, Command.AUTO_NEXT, Command.HANDOFF, Command.STOP)
+
+
+class _Command:
+    __slots__ = ("kind", "args", "started", "futures")
+
+    def __init__(self, kind: Command, args: tuple, started: float):
+        self.kind = kind
+        self.args = args
+        self.started = started
+        self.futures: List[Future] = []
+
+
+class PlayerCommandQueue:
+    """
+    播放器命令队列（单个工作线程）
+    - submit(kind, *args)：放入队列（可能与排队中的命令合并），返回 Future
+    - call / run：同步 / 异步等待执行结果
+    """
+    # 保留的最近命令耗时记录数
+    MAX_RECORDS = 100
+
+    def __init__(self, handlers: Dict[Command, Callable]):
+        """
+        Args:
+            handlers: 命令 -> 处理函数（在工作线程中执行，SKIP 和 PLAY_FILE 的处理函数额外接收 started 参数）
+        """
+        self._handlers = handlers
+        self._queue: "deque[_Command]" = deque()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"submitted": 0, "executed": 0, "coalesced": 0, "dropped": 0, "max_pending": 0}
+        self._records: "deque[dict]" = deque(maxlen=self.MAX_RECORDS)
+
+    # ============================= 提交 =============================
+    def submit(self, kind: Command, *args, started: Optional[float] = None) -> Future:
+        """放入队列并返回 Future（结果为处理函数的返回值，被丢弃的命令结果为 None）"""
+        future = Future()
+        command = _Command(kind, args, time.perf_counter() if started is None else started)
+        command.futures.append(future)
+        with self._lock:
+            self._stats["submitted"] += 1
+            if not self._merge(command):
+                self._queue.append(command)
+                self._stats["max_pending"] = max(self._stats["max_pending"], len(self._queue))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="player-commands", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    def call(self, kind: Command, *args, started: Optional[float] = None, timeout: Optional[float] = None):
+        """提交并等待结果（在工作线程中调用时直接执行，避免自己等待自己）"""
+        if threading.current_thread() is self._worker:
+            return self._execute(_Command(kind, args, time.perf_counter() if started is None else started))
+        return self.submit(kind, *args, started=started).result(timeout)
+
+    async def run(self, kind: Command, *args, started: Optional[float] = None):
+        """提交并在事件循环中等待结果"""
+        return await asyncio.wrap_future(self.submit(kind, *args, started=started))
+
+    def _merge(self, command: _Command) -> bool:
+        """
+        与排队中的命令合并（调用方持有 _lock）
+
+        Returns:
+            bool: 是否已合并或丢弃（不需要再入队）
+        """
+        kind = command.kind
+        tail = self._queue[-1] if self._queue else None
+
+        if kind == Command.AUTO_NEXT:
+            # 已有切歌命令排队时，播放结束后的自动下一首没有意义
+            if any(c.kind in (Command.SKIP, Command.PLAY_FILE, Command.AUTO_NEXT, Command.HANDOFF) for c in self._queue):
+                self._stats["dropped"] += 1
+                self._resolve(command.futures, None)
+                return True
+            return False
+
+        if kind == Command.SKIP and tail is not None:
+            if tail.kind == Command.SKIP:
+                # N 次下一首 / 上一首合并为一次跳过 N 首
+                tail.args = (tail.args[0] + command.args[0],)
+                return self._join(tail, command)
+            if tail.kind == Command.AUTO_NEXT:
+                # 用户切歌取代尚未执行的自动下一首
+                tail.kind, tail.args = kind, command.args
+                return self._join(tail, command)
+            return False
+
+        if kind == Command.PLAY_FILE and tail is not None and tail.kind in (Command.SKIP, Command.PLAY_FILE, Command.AUTO_NEXT):
+            # 指定的曲目取代尚未执行的切歌（之前的请求得到最终播放的文件）
+            tail.kind, tail.args = kind, command.args
+            return self._join(tail, command)
+
+        if kind in (Command.SEEK, Command.AUDIO_TRACK):
+            # 同一首曲目上的多次跳转 / 切换音轨只执行最后一次
+            for pending in reversed(self._queue):
+                if pending.kind in _TRACK_CHANGES:
+                    break
+                if pending.kind == kind:
+                    pending.args = command.args
+                    return self._join(pending, command)
+            return False
+
+        if kind == Command.VOLUME:
+            # 音量以最后一次为准
+            for pending in self._queue:
+                if pending.kind == kind:
+                    pending.args = command.args
+                    return self._join(pending, command)
+            return False
+
+        if kind in (Command.PLAY, Command.PAUSE, Command.STOP) and tail is not None and tail.kind == kind:
+            return self._join(tail, command)
+        return False
+
+    def _join(self, pending: _Command, command: _Command) -> bool:
+        """被合并的请求等待同一个执行结果"""
+        pending.futures.extend(command.futures)
+        self._stats["coalesced"] += 1
+        return True
+
+    # ============================= 执行 =============================
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._cond.wait()
+                command = self._queue.popleft()
+            try:
+                result = self._execute(command)
+            except BaseException as e:
+                self._resolve(command.futures, error=e)
+            else:
+                self._resolve(command.futures, result)
+
+    @staticmethod
+    def _resolve(futures: List[Future], result=None, error: Optional[BaseException] = None):
+        """设置等待者的结果（请求已断开时 Future 可能已被取消，命令照常执行）"""
+        for future in futures:
+            try:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            except InvalidStateError:
+                pass
+
+    def _execute(self, command: _Command):
+        handler = self._handlers[command.kind]
+        begin = time.perf_counter()
+        try:
+            if command.kind in (Command.SKIP, Command.PLAY_FILE):
+                return handler(*command.args, started=command.started)
+            return handler(*command.args)
+        except Exception as e:
+            player_logger.error(f"[PlayerCommands] 命令 {command.kind.value} 执行失败: {e}")
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._stats["executed"] += 1
+                self._records.append({
+                    "command": command.kind.value,
+                    "requests": max(len(command.futures), 1),
+                    "wait_ms": round((begin - command.started) * 1000, 1),
+                    "run_ms": round((end - begin) * 1000, 1),
+                })
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return dict(self._stats, pending=len(self._queue), recent=list(self._records)[-10:])
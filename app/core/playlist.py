@@ -0,0 +1,403 @@
+# app/core/playlist.py
+"""
+带索引的播放列表
+- 每个项目有稳定的 id（删除、移动后不重新编号）
+- path -> id、name -> id 哈希索引，去重和按名称查找为 O(1)
+- 顺序用隐式 treap（带父指针）维护，插入 / 删除 / 移动 / 求位置 / 按位置取项目均为 O(log n)
+对外的 JSON 结构与原来的 list[dict] 保持一致
+每次修改都会生成一条变更记录（dict）通知监听者，用于日志持久化和增量同步，
+同样的记录可以通过 apply() 重放
+"""
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+
+class PlaylistItem:
+    """播放列表项目（同时作为 treap 节点）"""
+    __slots__ = ("id", "name", "path", "type", "artist", "title", "duration",
+                 "_left", "_right", "_parent", "_priority", "_size")
+
+    def __init__(self, item_id: int, name: str, path: str, item_type: str = "file",
+                 artist: Optional[str] = None, title: Optional[str] = None, duration: Optional[float] = None):
+        self.id = item_id
+        self.name = name
+        self.path = path
+        self.type = item_type
+        self.artist = artist
+        self.title = title
+        self.duration = duration
+        self._left: Optional["PlaylistItem"] = None
+        self._right: Optional["PlaylistItem"] = None
+        self._parent: Optional["PlaylistItem"] = None
+        self._priority = random.random()
+        self._size = 1
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "name": self.name, "path": self.path, "type": self.type}
+        # 标签字段只在有值时输出（与原来添加 / 恢复时的结构一致）
+        if self.artist is not None:
+            data["artist"] = self.artist
+        if self.title is not None:
+            data["title"] = self.title
+        if self.duration is not None:
+            data["duration"] = self.duration
+        return data
+
+
+def _size(node: Optional[PlaylistItem]) -> int:
+    return node._size if node is not None else 0
+
+
+def _update(node: PlaylistItem):
+    """重新计算子树大小并修正子节点的父指针"""
+    node._size = 1 + _size(node._left) + _size(node._right)
+    if node._left is not None:
+        node._left._parent = node
+    if node._right is not None:
+        node._right._parent = node
+
+
+def _merge(a: Optional[PlaylistItem], b: Optional[PlaylistItem]) -> Optional[PlaylistItem]:
+    """合并两棵树（a 中所有项目排在 b 之前）"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a._priority > b._priority:
+        a._right = _merge(a._right, b)
+        _update(a)
+        return a
+    b._left = _merge(a, b._left)
+    _update(b)
+    return b
+
+
+def _build(nodes: List[PlaylistItem]) -> Optional[PlaylistItem]:
+    """由有序节点直接构建平衡 treap（O(n)），优先级按层重新分配以满足堆序"""
+    if not nodes:
+        return None
+    priorities = sorted((random.random() for _ in nodes), reverse=True)
+
+    def build(lo: int, hi: int, depth_nodes: List[List[PlaylistItem]], depth: int) -> Optional[PlaylistItem]:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        if len(depth_nodes) <= depth:
+            depth_nodes.append([])
+        depth_nodes[depth].append(node)
+        node._left = build(lo, mid, depth_nodes, depth + 1)
+        node._right = build(mid + 1, hi, depth_nodes, depth + 1)
+        _update(node)
+        return node
+
+    levels: List[List[PlaylistItem]] = []
+    root = build(0, len(nodes), levels, 0)
+    # 越靠近根的层优先级越高
+    i = 0
+    for level in levels:
+        for node in level:
+            node._priority = priorities[i]
+            i += 1
+    root._parent = None
+    return root
+
+
+def _split(node: Optional[PlaylistItem], count: int):
+    """按位置拆分：返回（前 count 个项目, 其余项目）"""
+    if node is None:
+        return None, None
+    if _size(node._left) >= count:
+        left, node._left = _split(node._left, count)
+        _update(node)
+        if left is not None:
+            left._parent = None
+        return left, node
+    node._right, right = _split(node._right, count - _size(node._left) - 1)
+    _update(node)
+    if right is not None:
+        right._parent = None
+    return node, right
+
+
+class IndexedPlaylist:
+    """带索引的播放列表（非线程安全，由 PlayerManager.playlist_lock 保护）"""
+
+    def __init__(self, items: Optional[Iterable[dict]] = None):
+        self._root: Optional[PlaylistItem] = None
+        self._by_id: Dict[int, PlaylistItem] = {}
+        self._by_path: Dict[str, int] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._next_id = 1
+        self._total_duration = 0.0
+        self._listeners: List[Callable[[dict], None]] = []
+        if items:
+            self.extend(items)
+
+    # ============================= 变更通知 =============================
+    def add_listener(self, listener: Callable[[dict], None]):
+        """注册变更监听者（在修改方法内同步调用，调用方持有的锁同样覆盖监听者；重复注册忽略）"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, record: dict):
+        for listener in self._listeners:
+            listener(record)
+
+    def apply(self, record: dict):
+        """重放一条变更记录（不存在的 id 忽略）"""
+        op = record.get("op")
+        if op == "insert":
+            data = record["item"]
+            if data["path"] not in self._by_path:
+                self.insert(record["index"], data["name"], data["path"], data.get("type", "file"),
+                            data.get("artist"), data.get("title"), data.get("duration"), data.get("id"))
+        elif op == "extend":
+            self.extend(record["items"])
+        elif op == "remove":
+            self.remove(record["id"])
+        elif op == "move":
+            self.move(record["id"], record["index"])
+        elif op == "update":
+            self.update(record["id"], record.get("artist"), record.get("title"), record.get("duration"))
+        elif op == "clear":
+            self.clear()
+
+    # ============================= 基本信息 =============================
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __iter__(self) -> Iterator[PlaylistItem]:
+        """按播放顺序遍历项目"""
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            node = stack.pop()
+            yield node
+            node = node._right
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._by_path
+
+    @property
+    def total_duration(self) -> float:
+        """所有项目的总时长（秒），增删和更新项目时增量维护"""
+        return self._total_duration
+
+    # ============================= 查找 =============================
+    def get(self, item_id: int) -> Optional[PlaylistItem]:
+        return self._by_id.get(item_id)
+
+    def get_by_path(self, path: str) -> Optional[PlaylistItem]:
+        item_id = self._by_path.get(path)
+        return self._by_id[item_id] if item_id is not None else None
+
+    def find_by_name(self, name: str) -> Optional[PlaylistItem]:
+        """按名称查找（有重名时返回位置最靠前的项目）"""
+        ids = self._by_name.get(name)
+        if not ids:
+            return None
+        return min((self._by_id[i] for i in ids), key=self.index_of)
+
+    def index_of(self, item: PlaylistItem) -> int:
+        """项目的位置（从 0 开始），沿父指针向上累加，O(log n)"""
+        index = _size(item._left)
+        node = item
+        while node._parent is not None:
+            parent = node._parent
+            if node is parent._right:
+                index += _size(parent._left) + 1
+            node = parent
+        return index
+
+    def item_at(self, index: int) -> PlaylistItem:
+        """按位置取项目，支持负数下标"""
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("播放列表位置超出范围")
+        node = self._root
+        while True:
+            left = _size(node._left)
+            if index < left:
+                node = node._left
+            elif index == left:
+                return node
+            else:
+                index -= left + 1
+                node = node._right
+
+    def next_item(self, item: PlaylistItem) -> Optional[PlaylistItem]:
+        """下一个项目（中序后继），没有时返回 None"""
+        if item._right is not None:
+            node = item._right
+            while node._left is not None:
+                node = node._left
+            return node
+        node = item
+        while node._parent is not None and node is node._parent._right:
+            node = node._parent
+        return node._parent
+
+    def prev_item(self, item: PlaylistItem) -> Optional[PlaylistItem]:
+        """上一个项目（中序前驱），没有时返回 None"""
+        if item._left is not None:
+            node = item._left
+            while node._right is not None:
+                node = node._right
+            return node
+        node = item
+        while node._parent is not None and node is node._parent._left:
+            node = node._parent
+        return node._parent
+
+    # ============================= 修改 =============================
+    def _attach(self, item: PlaylistItem, index: int):
+        left, right = _split(self._root, index)
+        self._root = _merge(_merge(left, item), right)
+        self._root._parent = None
+
+    def _create(self, item_id, name, path, item_type, artist, title, duration) -> PlaylistItem:
+        """创建项目并登记索引（item_id 无效或已被占用时分配新 id），不放入顺序树"""
+        if not isinstance(item_id, int) or item_id <= 0 or item_id in self._by_id:
+            item_id = self._next_id
+        self._next_id = max(self._next_id, item_id + 1)
+        item = PlaylistItem(item_id, name, path, item_type, artist, title, duration)
+        self._by_id[item_id] = item
+        self._by_path[path] = item_id
+        self._by_name.setdefault(name, set()).add(item_id)
+        self._total_duration += duration or 0.0
+        return item
+
+    def _detach(self, item: PlaylistItem):
+        left, rest = _split(self._root, self.index_of(item))
+        _, right = _split(rest, 1)
+        item._left = item._right = item._parent = None
+        item._size = 1
+        self._root = _merge(left, right)
+        if self._root is not None:
+            self._root._parent = None
+
+    def insert(self, index: int, name: str, path: str, item_type: str = "file",
+               artist: Optional[str] = None, title: Optional[str] = None,
+               duration: Optional[float] = None, item_id: Optional[int] = None) -> PlaylistItem:
+        """
+        在 index 处插入项目（index 超出范围时追加到末尾）
+
+        Raises:
+            ValueError: 路径已在播放列表中
+        """
+        if path in self._by_path:
+            raise ValueError("该文件或网址已在播放列表中")
+        item = self._create(item_id, name, path, item_type, artist, title, duration)
+        index = max(0, min(index, len(self)))
+        self._attach(item, index)
+        if self._listeners:
+            self._notify({"op": "insert", "index": index, "item": item.to_dict()})
+        return item
+
+    def append(self, name: str, path: str, item_type: str = "file", **kwargs) -> PlaylistItem:
+        return self.insert(len(self), name, path, item_type, **kwargs)
+
+    def extend(self, items: Iterable[dict]) -> List[PlaylistItem]:
+        """
+        批量追加（dict 结构同 to_dict），已存在的路径跳过
+        新项目先构建成平衡子树再整体合并，导入大量项目时为 O(n)
+
+        Returns:
+            List[PlaylistItem]: 实际追加的项目
+        """
+        added: List[PlaylistItem] = []
+        for data in items:
+            path = data["path"]
+            if path in self._by_path:
+                continue
+            added.append(self._create(data.get("id"), data["name"], path, data.get("type", "file"),
+                                      data.get("artist"), data.get("title"), data.get("duration")))
+        if added:
+            self._root = _merge(self._root, _build(added))
+            self._root._parent = None
+            if self._listeners:
+                self._notify({"op": "extend", "items": [item.to_dict() for item in added]})
+        return added
+
+    def remove(self, item_id: int) -> Optional[PlaylistItem]:
+        """删除项目，返回被删除的项目（不存在时返回 None）"""
+        item = self._by_id.pop(item_id, None)
+        if item is None:
+            return None
+        self._detach(item)
+        del self._by_path[item.path]
+        self._total_duration -= item.duration or 0.0
+        ids = self._by_name.get(item.name)
+        if ids is not None:
+            ids.discard(item_id)
+            if not ids:
+                del self._by_name[item.name]
+        if self._listeners:
+            self._notify({"op": "remove", "id": item_id, "path": item.path})
+        return item
+
+    def move(self, item_id: int, new_index: int) -> Optional[PlaylistItem]:
+        """把项目移动到 new_index（移动后的位置），不存在时返回 None"""
+        item = self._by_id.get(item_id)
+        if item is None:
+            return None
+        self._detach(item)
+        new_index = max(0, min(new_index, len(self)))
+        self._attach(item, new_index)
+        if self._listeners:
+            self._notify({"op": "move", "id": item_id, "index": new_index})
+        return item
+
+    def update(self, item_id: int, artist: Optional[str] = None, title: Optional[str] = None,
+               duration: Optional[float] = None) -> Optional[PlaylistItem]:
+        """更新项目的标签字段（None 表示不修改），不存在时返回 None"""
+        item = self._by_id.get(item_id)
+        if item is None:
+            return None
+        changes = {}
+        for field, value in (("artist", artist), ("title", title), ("duration", duration)):
+            if value is not None and getattr(item, field) != value:
+                changes[field] = value
+        if "duration" in changes:
+            self._total_duration += duration - (item.duration or 0.0)
+        for field, value in changes.items():
+            setattr(item, field, value)
+        if changes and self._listeners:
+            self._notify(dict({"op": "update", "id": item_id}, **changes))
+        return item
+
+    def clear(self):
+        self._root = None
+        self._by_id.clear()
+        self._by_path.clear()
+        self._by_name.clear()
+        self._total_duration = 0.0
+        if self._listeners:
+            self._notify({"op": "clear"})
+
+    # ============================= 导出 =============================
+    def to_list(self) -> List[dict]:
+        """按顺序导出为 list[dict]（与原来的播放列表结构一致）"""
+        return [item.to_dict() for item in self]
+
+    def slice(self, start: int, stop: int) -> List[PlaylistItem]:
+        """按位置取一段项目（从 start 定位一次，之后顺序遍历后继）"""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        result = []
+        if start >= stop:
+            return result
+        item = self.item_at(start)
+        while item is not None and len(result) < stop - start:
+            result.append(item)
+            item = self.next_item(item)
+        return result
@@ -0,0 +1,82 @@
+# app/core/playlist_changes.py
+"""
+播放列表版本与增量变更
+每条播放列表变更记录使版本号加一，最近的记录保存在内存中，
+客户端带上已有的版本号即可只取之后的变更；版本太旧（记录已丢弃）或纪元不同（服务重启、重新加载）时需要全量刷新
+"""
+import threading
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Callable, List, Optional
+
+
+class PlaylistChangeLog:
+    """
+    播放列表变更记录（record() 作为播放列表变更监听，调用方持有 playlist_lock）
+    epoch 在创建和 reset() 时重新生成，客户端的纪元不同时必须全量刷新
+    """
+    # 最多保留的变更记录数
+    MAX_RECORDS = 1000
+    # 保留的记录中最多包含的项目数（extend 记录可能包含大量项目）
+    MAX_ITEMS = 5000
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self._records: "deque[dict]" = deque()
+        self._items = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[int], None]] = []
+
+    @staticmethod
+    def _weight(record: dict) -> int:
+        return len(record["items"]) if record.get("op") == "extend" else 1
+
+    def record(self, record: dict):
+        """追加一条变更记录并通知订阅者"""
+        with self._lock:
+            self.version += 1
+            entry = dict(record, version=self.version)
+            self._records.append(entry)
+            self._items += self._weight(entry)
+            while len(self._records) > self.MAX_RECORDS or (self._items > self.MAX_ITEMS and len(self._records) > 1):
+                self._items -= self._weight(self._records.popleft())
+            version = self.version
+        self._notify(version)
+
+    def reset(self):
+        """整个播放列表被替换：开始新的纪元，之前的增量全部失效"""
+        with self._lock:
+            self.epoch = uuid.uuid4().hex[:12]
+            self.version += 1
+            self._records.clear()
+            self._items = 0
+            version = self.version
+        self._notify(version)
+
+    def since(self, version: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        取 version 之后的变更记录
+
+        Returns:
+            Optional[List[dict]]: 按顺序的变更记录；需要全量刷新时返回 None
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            if version == self.version:
+                return []
+            if version > self.version or not self._records or version < self._records[0]["version"] - 1:
+                return None
+            start = version - self._records[0]["version"] + 1
+            return list(islice(self._records, start, None))
+
+    # ============================= 订阅 =============================
+    def add_subscriber(self, callback: Callable[[int], None]):
+        """订阅版本变化（回调参数为新版本号，在修改播放列表的线程中调用，不能阻塞）"""
+        self._subscribers.append(callback)
+
+    def _notify(self, version: int):
+        for callback in self._subscribers:
+            callback(version)
@@ -0,0 +1,248 @@
+# app/core/playlist_journal.py
+"""
+播放列表日志持久化
+- 每次修改追加一行 JSON 到 playlist.journal（O(1)），后台线程批量 fsync
+- 日志达到一定条数后在后台压缩：写入新的快照 playlist.json（临时文件 + os.replace 原子替换），再删除旧日志
+- 启动时读取快照并重放日志中序号更大的记录
+快照格式与原来的 playlist.json 相同，额外记录 seq（快照包含的最后一条日志序号）
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.core.logging import player_logger
+
+
+class PlaylistJournal:
+    """
+    播放列表日志
+    append() 由播放列表变更监听调用（调用方持有 playlist_lock），只写缓冲区；
+    刷盘线程每 FLUSH_INTERVAL 秒批量 fsync 一次
+    """
+    # 批量 fsync 间隔（秒）
+    FLUSH_INTERVAL = 0.2
+    # 日志记录数达到该值后触发后台压缩
+    COMPACT_THRESHOLD = 2000
+
+    def __init__(self, snapshot_path: str = "playlist.json", journal_path: str = "playlist.journal"):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compacting_path = journal_path + ".compacting"
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._records = 0
+        self._dirty = False
+        self._snapshot_provider: Optional[Callable[[], Tuple[List[dict], int]]] = None
+        self._compact_event = threading.Event()
+        self._compact_lock = threading.Lock()
+        self._threads_started = False
+        # 读取失败的快照 / 日志还在原位置时为 False：不压缩，避免用空播放列表覆盖它们
+        self.can_compact = True
+
+    # ============================= 读取 =============================
+    def load(self) -> Tuple[Optional[List[dict]], List[dict]]:
+        """
+        读取快照和需要重放的日志记录
+
+        Returns:
+            tuple: (快照中的播放列表，没有快照时为 None；按顺序需要重放的记录)
+
+        Raises:
+            ValueError: 快照格式错误（之后需调用 quarantine() 才能压缩）
+        """
+        self.can_compact = False
+        records = []
+        # 先读上次未完成压缩的旧日志，再读当前日志
+        for path in (self.compacting_path, self.journal_path):
+            records.extend(self._read_records(path))
+        # 先按日志恢复序号，快照损坏时之后追加的记录也不会复用旧序号
+        self._seq = max([self._seq] + [r.get("seq", 0) for r in records])
+
+        items, snapshot_seq = None, 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or "playlist" not in data:
+                raise ValueError("播放列表文件格式错误")
+            items = data["playlist"]
+            snapshot_seq = int(data.get("seq", 0))
+
+        self._seq = max(self._seq, snapshot_seq)
+        self.can_compact = True
+        return items, [r for r in records if r.get("seq", 0) > snapshot_seq]
+
+    def quarantine(self) -> List[str]:
+        """
+        把无法恢复的快照和日志移到一旁（<文件名>.corrupt），保留给用户手动恢复，
+        之后的压缩从空播放列表重新开始，不会覆盖它们（在 open() 之前调用）
+
+        Returns:
+            List[str]: 移动后的文件路径
+        """
+        self.can_compact = False
+        moved = []
+        for path in (self.snapshot_path, self.compacting_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            target = path + ".corrupt"
+            if os.path.exists(target):
+                target = f"{path}.{int(time.time())}.corrupt"
+            os.replace(path, target)
+            moved.append(target)
+        self.can_compact = True
+        return moved
+
+    @staticmethod
+    def _read_records(path: str) -> List[dict]:
+        """读取日志文件（末尾未写完的一行及之后的内容忽略）"""
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if not isinstance(record, dict):
+                    player_logger.warning(f"[PlaylistJournal] 忽略损坏的日志记录: {path}")
+                    break
+                records.append(record)
+        return records
+
+    # ============================= 写入 =============================
+    def open(self, snapshot_provider: Callable[[], Tuple[List[dict], int]]):
+        """
+        打开日志准备追加，并启动刷盘和压缩线程
+
+        Args:
+            snapshot_provider: 返回 (播放列表 list[dict], rotate() 的返回值)，
+                               必须在 playlist_lock 内同时完成两步以保证快照与日志一致
+        """
+        self._snapshot_provider = snapshot_provider
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                self._records = len(self._read_records(self.journal_path))
+        if not self._threads_started:
+            self._threads_started = True
+            threading.Thread(target=self._flush_loop, name="playlist-journal-flush", daemon=True).start()
+            threading.Thread(target=self._compact_loop, name="playlist-journal-compact", daemon=True).start()
+
+    def append(self, record: dict):
+        """追加一条变更记录（只写缓冲区，由刷盘线程批量 fsync）"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._seq += 1
+            record = dict(record, seq=self._seq)
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._dirty = True
+            self._records += 1
+            if self._records >= self.COMPACT_THRESHOLD:
+                self._compact_event.set()
+
+    def flush(self):
+        """把缓冲区写入磁盘并 fsync"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                player_logger.error(f"[PlaylistJournal] 日志刷盘失败: {e}")
+
+    # ============================= 压缩 =============================
+    def rotate(self) -> int:
+        """
+        把当前日志改名为待压缩日志并开始新日志（调用方持有 playlist_lock）
+
+        Returns:
+            int: 新快照应包含的最后一条记录序号
+        """
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked()
+                self._file.close()
+                if os.path.exists(self.journal_path):
+                    if os.path.exists(self.compacting_path):
+                        # 上次压缩未完成：把旧日志合并进待压缩日志
+                        with open(self.compacting_path, "a", encoding="utf-8") as dst, \
+                                open(self.journal_path, "r", encoding="utf-8") as src:
+                            dst.write(src.read())
+                        os.remove(self.journal_path)
+                    else:
+                        os.replace(self.journal_path, self.compacting_path)
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+                self._records = 0
+            return self._seq
+
+    def write_snapshot(self, items: List[dict], seq: int):
+        """原子写入快照（临时文件 fsync 后 os.replace）"""
+        data = {"version": "1.0", "timestamp": time.time(), "seq": seq, "playlist": items}
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def compact(self) -> int:
+        """
+        立即压缩：取快照、写入 playlist.json、删除已包含在快照中的旧日志
+
+        Returns:
+            int: 快照中的项目数
+
+        Raises:
+            RuntimeError: 日志尚未打开，或读取失败的文件还在原位置
+        """
+        if self._snapshot_provider is None:
+            raise RuntimeError("播放列表日志尚未打开")
+        if not self.can_compact:
+            raise RuntimeError("播放列表文件未能成功读取，不覆盖原文件")
+        with self._compact_lock:
+            items, seq = self._snapshot_provider()
+            self.write_snapshot(items, seq)
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+            return len(items)
+
+    def request_compaction(self):
+        """请求在后台压缩"""
+        self._compact_event.set()
+
+    def _compact_loop(self):
+        while True:
+            self._compact_event.wait()
+            self._compact_event.clear()
+            if self._file is None or self._snapshot_provider is None or not self.can_compact:
+                continue
+            try:
+                count = self.compact()
+                player_logger.debug(f"[PlaylistJournal] 日志压缩完成，快照包含 {count} 个项目")
+            except Exception as e:
+                player_logger.error(f"[PlaylistJournal] 日志压缩失败: {e}")
+
+    def close(self):
+        """刷盘并关闭日志（之后的 append 被忽略，直到再次 open）"""
+        with self._lock:
+            if self._file is not None:
+                self._flush_locked()
+                self._file.close()
+                self._file = None
@@ -0,0 +1,103 @@
+# app/core/playlist_metadata.py
+"""
+播放列表标签补全
+播放列表中缺少时长的本地文件排队后，由后台低优先级线程分批（按存储根分组）通过元数据缓存读取标签，
+元数据缓存按 path + size + mtime 判断失效，文件未变化时只查缓存；
+结果通过 IndexedPlaylist.update() 写回播放列表（同样写入日志，重启后不再重复读取）
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError
+from app.core.metadata_cache import metadata_cache
+from app.core.logging import player_logger
+
+
+class PlaylistMetadataEnricher:
+    """
+    播放列表标签补全器
+    enqueue() 只写内存队列（O(1)，可在持有 playlist_lock 的变更监听中调用）
+    """
+    # 每批读取的文件数
+    BATCH_SIZE = 50
+    # 两批之间的停顿（秒），避免和播放、用户请求争抢存储
+    BATCH_PAUSE = 0.2
+
+    def __init__(self, apply_tracks: Callable[[Dict[str, dict]], int]):
+        """
+        Args:
+            apply_tracks: 把 {path: {title, artist, album, duration}} 写回播放列表，返回更新的项目数
+        """
+        self._apply_tracks = apply_tracks
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"enriched": 0, "failed": 0}
+
+    def enqueue(self, paths: Iterable[str]):
+        """排队补全标签（已在队列中的路径忽略）"""
+        with self._lock:
+            for path in paths:
+                self._pending[path] = None
+            if self._pending:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="playlist-metadata", daemon=True)
+                    self._worker.start()
+                self._wakeup.set()
+
+    def discard(self, paths: Iterable[str]):
+        with self._lock:
+            for path in paths:
+                self._pending.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def _take_batch(self) -> List[str]:
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.BATCH_SIZE:
+                batch.append(self._pending.popitem(last=False)[0])
+            return batch
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                try:
+                    self._enrich(batch)
+                except Exception as e:
+                    self._stats["failed"] += len(batch)
+                    player_logger.warning(f"[PlaylistMetadata] 标签补全失败: {e}")
+                time.sleep(self.BATCH_PAUSE)
+
+    def _enrich(self, paths: List[str]):
+        # 按存储根分组，每组在对应的线程池中读取
+        groups: Dict[str, List[str]] = {}
+        for path in paths:
+            groups.setdefault(io_scheduler.root_of(path), []).append(path)
+        for group in groups.values():
+            try:
+                tracks = io_scheduler.call(group[0], metadata_cache.get_many, group,
+                                           timeout=io_scheduler.DEFAULT_TIMEOUT * 3)
+            except StorageUnavailableError as e:
+                # 存储不可用时跳过，下次启动或重新添加时再补全
+                self._stats["failed"] += len(group)
+                player_logger.debug(f"[PlaylistMetadata] 存储不可用，跳过 {len(group)} 个文件: {e}")
+                continue
+            self._stats["enriched"] += self._apply_tracks(tracks)
+            self._stats["failed"] += len(group) - len(tracks)
+
+    def get_status(self) -> dict:
+        """补全统计"""
+        with self._lock:
+            pending = len(self._pending)
+        return dict(self._stats, pending=pending)
@@ -1,14 +1,95 @@
 import os
 
-import marisa_trie
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from threading import Lock, Event, Thread
 import re
+import time
+import uuid
 import asyncio
+from array import array
+from typing import List, Optional, Tuple
+
+from app.core.path_store import PathStore, PathStoreBuilder, SearchCancelled
+
+
+class SearchResultCache:
+    """
+    搜索结果 LRU 缓存：查询 -> 匹配的文件 id
+    缓存与索引代数（generation）绑定，索引重建后整体失效
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, array]" = OrderedDict()
+        self._generation = -1
+        self._lock = Lock()
+
+    def _check_generation(self, generation: int) -> bool:
+        """
+        索引代数变新时清空缓存，调用方需持有 _lock
+        读到旧索引的查询（代数比缓存旧）不使用也不清空缓存
+
+        Returns:
+            bool: generation 是否为缓存当前的代数
+        """
+        if generation > self._generation:
+            self._entries.clear()
+            self._generation = generation
+        return generation == self._generation
+
+    def get(self, generation: int, key: tuple) -> Optional[array]:
+        with self._lock:
+            if not self._check_generation(generation):
+                return None
+            ids = self._entries.get(key)
+            if ids is not None:
+                self._entries.move_to_end(key)
+            return ids
+
+    def find_refinable(self, generation: int, pattern_lower: str) -> Optional[array]:
+        """
+        查找可用于增量过滤的缓存结果：
+        新关键词包含某个已缓存的关键词时（如 周 -> 周杰 -> 周杰伦），
+        新结果一定是旧结果的子集，选择其中候选最少的一个
+        """
+        best = None
+        with self._lock:
+            if not self._check_generation(generation):
+                return None
+            for (kind, cached_pattern), ids in self._entries.items():
+                if kind == "substring" and cached_pattern in pattern_lower:
+                    if best is None or len(ids) < len(best):
+                        best = ids
+        return best
+
+    def put(self, generation: int, key: tuple, ids: array):
+        with self._lock:
+            # 计算期间索引已被替换，结果作废
+            if not self._check_generation(generation):
+                return
+            self._entries[key] = ids
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class IndexBuildCancelled(Exception):
+    """索引构建任务被新的构建任务取代"""
+
 
 class FileNameIndexerSingleton:
     _instance = None
-    _trie = None
+    # (索引存储, 索引代数) 作为一个整体发布，读取方一次取出，不会拿到旧存储和新代数的组合
+    _index: Tuple[Optional[PathStore], int] = (None, 0)
+    _index_lock = Lock()
+    _search_cache = SearchResultCache()
+    _build_job: Optional[dict] = None
+    _build_cancel: Optional[Event] = None
     _executor = ThreadPoolExecutor()
     _lock = Lock()
 
@@ -31,6 +112,14 @@ class FileNameIndexerSingleton:
         """设置要索引的文件夹路径"""
         self._root = root
 
+    def is_ready(self) -> bool:
+        """索引是否已构建"""
+        return self._store is not None
+
+    def file_count(self) -> int:
+        """已索引的文件数"""
+        return len(self._store) if self._store is not None else 0
+
     async def count_files(self):
         """异步统计文件总数"""
         if not self._root:
@@ -38,119 +127,254 @@ class FileNameIndexerSingleton:
 
         loop = asyncio.get_running_loop()
 
-        # 使用 followlinks=True 来支持符号链接
-        walk_result = await loop.run_in_executor(
+        # 使用 followlinks=True 来支持符号链接，只计数不保存遍历结果
+        total = await loop.run_in_executor(
             self._executor,
-            lambda: list(os.walk(self._root, followlinks=True))
+            lambda: sum(len(files) for _, _, files in os.walk(self._root, followlinks=True))
         )
 
-        total = 0
-        for r, d, files in walk_result:
-            total += len(files)
-
         self._total_files = total
         self._processed_files = 0
 
-    async def build_trie(self):
-        """异步构建 Trie 索引"""
+    def _walk_and_build(self, root: Optional[str] = None, job: Optional[dict] = None, cancel: Optional[Event] = None) -> PathStore:
+        """遍历目录并按目录追加到紧凑存储（在线程池或后台线程中执行）"""
+        builder = PathStoreBuilder()
+        # 使用 followlinks=True 支持符号链接
+        for r, d, files in os.walk(root or self._root, followlinks=True):
+            if cancel is not None and cancel.is_set():
+                raise IndexBuildCancelled()
+            builder.add_directory(r, files)
+            if job is not None:
+                job["processed_files"] = builder.file_count
+                job["scanned_dirs"] += 1
+            else:
+                self._processed_files = builder.file_count
+                self.show_progress()
+        return builder.build()
+
+    async def build_index(self):
+        """异步构建索引（构建期间旧索引继续提供搜索，完成后原子替换）"""
         if not self._root:
             raise ValueError("文件夹路径未设置！")
 
         loop = asyncio.get_running_loop()
-
-        # 通过线程池执行 os.walk，使用 followlinks=True 支持符号链接
-        walk_result = await loop.run_in_executor(
-            self._executor,
-            lambda: list(os.walk(self._root, followlinks=True))
-        )
-
-        file_list = []
-        for r, d, files in walk_result:
-            for f in files:
-                file_list.append(os.path.join(r, f))
-                self._processed_files += 1
-                self.show_progress()
-
-        # 构建 Trie
-        self._trie = await loop.run_in_executor(
-            self._executor,
-            lambda: marisa_trie.Trie(file_list)
-        )
+        self._processed_files = 0
+        self._set_store(await loop.run_in_executor(self._executor, self._walk_and_build))
+
+    @property
+    def _store(self) -> Optional[PathStore]:
+        return self._index[0]
+
+    def _set_store(self, store: Optional[PathStore]):
+        """替换索引存储并递增索引代数（搜索缓存随之失效）"""
+        with self._index_lock:
+            FileNameIndexerSingleton._index = (store, self._index[1] + 1)
+
+    # ============================= 后台构建任务 =============================
+    def start_build(self, root: str, on_complete=None) -> str:
+        """
+        在后台线程中构建新索引，旧索引在构建期间继续提供搜索，完成后原子替换
+        已有构建任务时取消旧任务
+
+        Args:
+            root: 要索引的目录
+            on_complete: 构建成功后的回调（在后台线程中调用）
+
+        Returns:
+            str: 构建任务 id
+        """
+        with self._lock:
+            if self._build_cancel is not None:
+                self._build_cancel.set()
+            # 同一目录重建时用旧索引的文件数估算进度
+            estimated_total = len(self._store) if self._store is not None and self._root == root else None
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "root": root,
+                "state": "running",  # running / done / error / cancelled
+                "processed_files": 0,
+                "scanned_dirs": 0,
+                "estimated_total": estimated_total,
+                "file_count": None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "message": "",
+            }
+            cancel = Event()
+            self._build_job = job
+            self._build_cancel = cancel
+
+        Thread(target=self._run_build_job, args=(job, cancel, on_complete), daemon=True).start()
+        return job["job_id"]
+
+    def _run_build_job(self, job: dict, cancel: Event, on_complete=None):
+        """后台构建任务主体"""
+        try:
+            store = self._walk_and_build(job["root"], job, cancel)
+            with self._lock:
+                if cancel.is_set():
+                    raise IndexBuildCancelled()
+                # 原子替换：新索引就绪前搜索一直使用旧索引
+                self._root = job["root"]
+                self._total_files = self._processed_files = len(store)
+                self._set_store(store)
+                if self._build_cancel is cancel:
+                    self._build_cancel = None
+            job["file_count"] = len(store)
+            job["state"] = "done"
+            print(f"[FileIndexer] 索引构建完成: {job['root']} 共 {len(store)} 个文件")
+        except IndexBuildCancelled:
+            job["state"] = "cancelled"
+            return
+        except Exception as e:
+            job["state"] = "error"
+            job["message"] = str(e)
+            print(f"[FileIndexer] 索引构建失败: {e}")
+            return
+        finally:
+            job["finished_at"] = time.time()
+
+        if on_complete is not None:
+            try:
+                on_complete()
+            except Exception as e:
+                print(f"[FileIndexer] 索引构建完成回调失败: {e}")
+
+    def get_build_status(self, job_id: Optional[str] = None) -> Optional[dict]:
+        """
+        获取构建任务状态
+
+        Args:
+            job_id: 任务 id，为空时返回最近一次任务
+
+        Returns:
+            Optional[dict]: 任务状态，任务不存在时返回 None
+        """
+        job = self._build_job
+        if job is None or (job_id and job["job_id"] != job_id):
+            return None
+        status = dict(job)
+        if status["estimated_total"]:
+            status["progress"] = round(min(status["processed_files"] / status["estimated_total"], 1.0) * 100, 2)
+        else:
+            status["progress"] = 100.0 if status["state"] == "done" else None
+        return status
 
     def show_progress(self):
         """显示进度"""
-        progress = (self._processed_files / self._total_files) * 100
+        progress = (self._processed_files / self._total_files) * 100 if self._total_files else 0.0
         print(f"\r建立索引中... {self._processed_files}/{self._total_files} ({progress:.2f}%)", end="")
 
-    async def search(self, pattern: str):
-        """普通搜索：前后匹配任意字符（不区分大小写）"""
-        if not self._trie:
-            raise ValueError("索引尚未构建！")
-
-        loop = asyncio.get_running_loop()
-
-        # 获取所有文件名
-        all_files = await loop.run_in_executor(self._executor, self._trie.keys, "")
+    def _require_store(self) -> PathStore:
+        return self._require_index()[0]
 
-        # 使用正则表达式过滤文件名，添加 re.IGNORECASE 标志
-        regex = re.compile(".*" + re.escape(pattern) + ".*", re.IGNORECASE)  # 使用 .* 来匹配任意字符，不区分大小写
-        matched_files = [f for f in all_files if regex.search(f)]  # 用 search 而非 match
+    def _require_index(self) -> Tuple[PathStore, int]:
+        """当前的 (索引存储, 索引代数)"""
+        store, generation = self._index
+        if store is None:
+            raise ValueError("索引尚未构建！")
+        return store, generation
 
-        return matched_files
+    async def search_ids(self, pattern: str, use_regex: bool = False, media_only: bool = False, cancel=None):
+        """
+        搜索并返回匹配的文件 id（不拼接路径）
 
-    async def regex_search(self, pattern: str):
-        """完全遵守正则表达式的搜索"""
-        if not self._trie:
-            raise ValueError("索引尚未构建！")
+        Args:
+            cancel: 取消标记（threading.Event），被设置后匹配循环抛出 SearchCancelled
 
+        Returns:
+            tuple: (PathStore, 匹配的文件 id 数组)
+        """
+        store, generation = self._require_index()
         loop = asyncio.get_running_loop()
 
-        # 获取所有文件名
-        all_files = await loop.run_in_executor(self._executor, self._trie.keys, "")
-
-        # 使用正则表达式进行精确匹配
-        try:
-            regex = re.compile(pattern)
-        except re.error as e:
-            raise ValueError(f"无效的正则表达式: {e}")
+        if use_regex:
+            # 完全遵守正则表达式，使用 match 进行严格的前缀匹配
+            key = ("regex", pattern)
+            ids = self._search_cache.get(generation, key)
+            if ids is None:
+                try:
+                    regex = re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"无效的正则表达式: {e}")
+                ids = await loop.run_in_executor(
+                    self._executor, store.search_regex, regex, False, None, cancel
+                )
+                self._search_cache.put(generation, key, ids)
+        else:
+            # 普通搜索：前后匹配任意字符（不区分大小写）
+            pattern_lower = pattern.lower()
+            key = ("substring", pattern_lower)
+            ids = self._search_cache.get(generation, key)
+            if ids is None:
+                # 输入延长时只在上一次的结果中过滤，避免扫描整个索引
+                candidates = self._search_cache.find_refinable(generation, pattern_lower)
+                ids = await loop.run_in_executor(
+                    self._executor, store.search_substring, pattern, False, candidates, cancel
+                )
+                self._search_cache.put(generation, key, ids)
+
+        if media_only:
+            ids = await loop.run_in_executor(self._executor, store.filter_media, ids)
+        return store, ids
+
+    async def ranked_search(self, pattern: str, use_regex: bool = False, media_only: bool = False, cancel=None):
+        """
+        搜索并按相关度排序（正则搜索保持路径顺序）
+
+        Returns:
+            tuple: (PathStore, 排序后的文件 id 列表)
+        """
+        store, ids = await self.search_ids(pattern, use_regex, media_only, cancel)
+        if use_regex:
+            return store, ids
+        loop = asyncio.get_running_loop()
+        ranked = await loop.run_in_executor(self._executor, store.rank, ids, pattern, cancel)
+        return store, ranked
+
+    async def search_page(self, pattern: str, use_regex: bool = False, media_only: bool = False,
+                          page: int = 1, page_size: int = 0) -> Tuple[int, List[str]]:
+        """
+        分页搜索，只为返回的这一页拼接完整路径
+
+        Args:
+            page_size: 每页数量，0 表示返回全部匹配
+
+        Returns:
+            tuple: (匹配总数, 当前页的文件路径)
+        """
+        store, ids = await self.search_ids(pattern, use_regex, media_only)
+        total = len(ids)
+        if page_size > 0:
+            start = (max(page, 1) - 1) * page_size
+            ids = ids[start:start + page_size]
+        return total, store.paths(ids)
 
-        matched_files = [f for f in all_files if regex.match(f)]  # 使用 match 进行严格的前缀匹配
+    async def search(self, pattern: str):
+        """普通搜索：前后匹配任意字符（不区分大小写）"""
+        store, ids = await self.search_ids(pattern)
+        return store.paths(ids)
 
-        return matched_files
+    async def regex_search(self, pattern: str):
+        """完全遵守正则表达式的搜索"""
+        store, ids = await self.search_ids(pattern, use_regex=True)
+        return store.paths(ids)
 
     async def update_index(self):
-        """异步更新索引（在已有的索引下继续添加文件）"""
+        """异步更新索引（重新遍历目录生成新的存储）"""
         if not self._root:
             raise ValueError("文件夹路径未设置！")
-        if not self._trie:
-            raise ValueError("索引尚未构建！")
-
-        file_list = []
-        loop = asyncio.get_running_loop()
-
-        # 遍历文件夹，获取新文件路径，使用 followlinks=True 支持符号链接
-        walk_result = await loop.run_in_executor(
-            self._executor,
-            lambda: list(os.walk(self._root, followlinks=True))
-        )
-
-        for r, d, files in walk_result:
-            for f in files:
-                file_list.append(os.path.join(r, f))
-                self._processed_files += 1
-
-        # 将新文件加入索引
-        await loop.run_in_executor(self._executor, self._trie.update, file_list)
+        self._require_store()
+        await self.build_index()
 
     async def rebuild_index(self):
-        """异步重建索引（删除旧索引并重新建立）"""
-        self._trie = None
+        """异步重建索引（新索引构建完成前旧索引继续可用）"""
         self._processed_files = 0
-        await self.build_trie()
+        await self.build_index()
 
     def delete_index(self):
         """删除索引（清理索引，重新初始化）"""
-        self._trie = None
+        self._set_store(None)
         self._processed_files = 0
 
     def clear_and_exit(self):
@@ -160,27 +384,36 @@ class FileNameIndexerSingleton:
 
     def get_index_status(self):
         """获取索引状态（包括进度）"""
-        if self._trie:
-            progress = (self._processed_files / self._total_files) * 100
+        if self._store:
+            progress = (self._processed_files / self._total_files) * 100 if self._total_files else 100.0
             return f"索引已完成 {self._processed_files}/{self._total_files} ({progress:.2f}%)"
         else:
             return "索引尚未开始或已被清理。"
 
     def save_index(self, save_path: str):
         """将索引保存到磁盘"""
-        if not self._trie:
-            raise ValueError("索引尚未构建！")
-        self._trie.save(save_path)
+        self._require_store().save(save_path)
         print(f"索引已保存到: {save_path}")
 
     def load_index(self, load_path: str):
-        """从磁盘加载索引"""
-        if os.path.exists(load_path):
-            self._trie = marisa_trie.Trie()
-            self._trie.load(load_path)
-            print(f"索引已从 {load_path} 加载。")
-        else:
+        """
+        从磁盘加载索引
+        旧版本（marisa-trie）或损坏的索引文件无法读取，已设置索引目录时在后台重建
+        """
+        if not os.path.exists(load_path):
             print(f"索引文件 {load_path} 不存在！")
+            return
+        try:
+            store = PathStore.load(load_path)
+        except ValueError as e:
+            if self._root:
+                print(f"索引文件 {load_path} 无法读取（{e}），在后台重建索引: {self._root}")
+                self.start_build(self._root)
+            else:
+                print(f"索引文件 {load_path} 无法读取（{e}），请重新设置索引目录")
+            return
+        self._set_store(store)
+        print(f"索引已从 {load_path} 加载。")
 
 
 # 导出单例实例
@@ -190,7 +423,7 @@ if __name__ == "__main__":
     async def main():
         file_indexer.set_root("Z:\\Jun_多媒体库_公开")
         await file_indexer.count_files()
-        await file_indexer.build_trie()
+        await file_indexer.build_index()
         data = await file_indexer.regex_search(r".*周杰伦.*\.mp3$")
         print("搜索完成", data)
 
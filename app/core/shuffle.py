@@ -0,0 +1,220 @@
+# app/core/shuffle.py
+"""
+播放列表随机播放顺序（shuffle bag）
+- 对播放列表项目 id 做一次 Fisher–Yates 洗牌得到排列，用游标记录当前位置，
+  下一首 / 上一首只需移动游标（O(1)），一轮播完后重新洗牌
+- 播放列表增删项目时就地修改排列，不重新洗牌：
+  新项目与尚未播放部分中的随机位置交换；删除尚未播放的项目时与末尾交换后弹出，
+  删除已播放的项目时留下空位（上一首时跳过，保存或重新洗牌时清除）
+- 排列和游标保存到 shuffle_state.json，重启后继续原来的顺序
+"""
+import json
+import os
+import random
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.logging import player_logger
+
+
+class ShuffleBag:
+    """
+    随机播放排列（内部加锁，可在播放列表变更监听中调用）
+    order[:cursor + 1] 为本轮已播放的部分，order[cursor + 1:] 为尚未播放的部分
+    """
+    # 排列变化后延迟保存的时间（秒），合并连续的修改
+    SAVE_DELAY = 2.0
+
+    def __init__(self, state_path: str = "shuffle_state.json"):
+        self.state_path = state_path
+        self._order: List[Optional[int]] = []
+        self._pos = {}
+        self._cursor = -1
+        self._holes = 0
+        self._lock = threading.RLock()
+        self._save_timer: Optional[threading.Timer] = None
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    # ============================= 排列维护 =============================
+    def _shuffle(self, ids: List[int], first: Optional[int] = None):
+        """Fisher–Yates 洗牌，first 不为 None 时放在第一位并作为当前项目"""
+        for i in range(len(ids) - 1, 0, -1):
+            j = random.randint(0, i)
+            ids[i], ids[j] = ids[j], ids[i]
+        self._order = ids
+        self._pos = {item_id: i for i, item_id in enumerate(ids)}
+        self._holes = 0
+        self._cursor = -1
+        if first is not None and first in self._pos:
+            self._swap(0, self._pos[first])
+            self._cursor = 0
+
+    def _swap(self, i: int, j: int):
+        order = self._order
+        order[i], order[j] = order[j], order[i]
+        if order[i] is not None:
+            self._pos[order[i]] = i
+        if order[j] is not None:
+            self._pos[order[j]] = j
+
+    def _add(self, item_id: int):
+        """新项目放到尚未播放部分的随机位置"""
+        if item_id in self._pos:
+            return
+        self._order.append(item_id)
+        self._pos[item_id] = len(self._order) - 1
+        self._swap(len(self._order) - 1, random.randint(self._cursor + 1, len(self._order) - 1))
+
+    def _remove(self, item_id: int):
+        index = self._pos.get(item_id)
+        if index is None:
+            return
+        if index > self._cursor:
+            # 尚未播放的部分顺序本来就是随机的，与末尾交换不影响分布
+            self._swap(index, len(self._order) - 1)
+            self._order.pop()
+        else:
+            self._order[index] = None
+            self._holes += 1
+        # 交换时会重新登记位置，最后再删除
+        del self._pos[item_id]
+
+    def apply(self, record: dict):
+        """播放列表变更监听：按变更记录修改排列"""
+        with self._lock:
+            op = record.get("op")
+            if op == "insert":
+                self._add(record["item"]["id"])
+            elif op == "extend":
+                for item in record["items"]:
+                    self._add(item["id"])
+            elif op == "remove":
+                self._remove(record["id"])
+            elif op == "clear":
+                self._order, self._pos, self._cursor, self._holes = [], {}, -1, 0
+            else:
+                # 移动项目不影响随机顺序
+                return
+        self._schedule_save()
+
+    def sync(self, ids: Iterable[int]):
+        """
+        与播放列表对齐（加载播放列表后调用）：保留排列中仍存在的项目及其顺序，
+        删除已不存在的项目，新出现的项目插入尚未播放的部分
+        """
+        ids = list(ids)
+        with self._lock:
+            wanted = set(ids)
+            for item_id in [i for i in self._pos if i not in wanted]:
+                self._remove(item_id)
+            for item_id in ids:
+                self._add(item_id)
+        self._schedule_save()
+
+    # ============================= 游标 =============================
+    def exhausted(self) -> bool:
+        """本轮是否已播放完（之后没有尚未播放的项目）"""
+        with self._lock:
+            return self._cursor + 1 >= len(self._order)
+
+    def reshuffle(self, current_id: Optional[int] = None):
+        """开始新的一轮：重新洗牌，current_id 作为本轮第一首（已播放）"""
+        with self._lock:
+            self._shuffle([i for i in self._order if i is not None], current_id)
+        self._schedule_save()
+
+    def peek(self, direction: int, offset: int, count: int) -> Tuple[List[int], Optional[int]]:
+        """
+        从游标开始按方向取出最多 count 个项目 id（跳过空位），不移动游标
+
+        Args:
+            direction: 1=之后尚未播放的项目，-1=之前已播放的项目（由近到远）
+            offset: 从游标起已跳过的位置数（上一次调用返回的值，首次为 0）
+
+        Returns:
+            tuple: (项目 id 列表, 下一次调用的 offset；已到头时为 None)
+        """
+        with self._lock:
+            ids = []
+            step = 1 if direction > 0 else -1
+            index = self._cursor + step * (offset + 1)
+            while 0 <= index < len(self._order) and len(ids) < count:
+                if self._order[index] is not None:
+                    ids.append(self._order[index])
+                index += step
+            offset = abs(index - self._cursor) - 1
+            return ids, (offset if 0 <= index < len(self._order) else None)
+
+    def mark_played(self, item_id: int):
+        """
+        项目开始播放时移动游标：
+        尚未播放的项目换到游标后一位并前进；已播放的项目（上一首 / 点播历史项目）游标回到它的位置
+        """
+        with self._lock:
+            index = self._pos.get(item_id)
+            if index is None or index == self._cursor:
+                return
+            if index > self._cursor:
+                self._swap(index, self._cursor + 1)
+                self._cursor += 1
+            else:
+                self._cursor = index
+        self._schedule_save()
+
+    # ============================= 持久化 =============================
+    def _compact(self):
+        """清除已播放部分的空位（调用方持有 _lock）"""
+        if not self._holes:
+            return
+        played = [i for i in self._order[:self._cursor + 1] if i is not None]
+        self._order = played + self._order[self._cursor + 1:]
+        self._pos = {item_id: i for i, item_id in enumerate(self._order)}
+        self._cursor = len(played) - 1
+        self._holes = 0
+
+    def load(self, ids: Iterable[int]):
+        """读取保存的排列并与当前播放列表对齐，没有保存的状态时重新洗牌"""
+        ids = list(ids)
+        with self._lock:
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                order = [i for i in data.get("order", []) if isinstance(i, int)]
+                self._order = list(dict.fromkeys(order))
+                self._pos = {item_id: i for i, item_id in enumerate(self._order)}
+                self._cursor = max(-1, min(int(data.get("cursor", -1)), len(self._order) - 1))
+                self._holes = 0
+            except FileNotFoundError:
+                self._shuffle(list(ids))
+            except (OSError, ValueError, TypeError) as e:
+                player_logger.warning(f"[Shuffle] 随机播放状态读取失败，重新洗牌: {e}")
+                self._shuffle(list(ids))
+        self.sync(ids)
+
+    def save(self):
+        """原子写入随机播放状态（临时文件 + os.replace）"""
+        with self._lock:
+            self._compact()
+            data = {"version": "1.0", "cursor": self._cursor, "order": list(self._order)}
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.state_path)
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self._delayed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _delayed_save(self):
+        with self._lock:
+            self._save_timer = None
+        try:
+            self.save()
+        except OSError as e:
+            player_logger.error(f"[Shuffle] 随机播放状态保存失败: {e}")
@@ -0,0 +1,232 @@
+# app/core/stems.py
+"""
+分轨同步播放（原曲 / 人声 / 伴奏）
+人声和伴奏分别在 PlayerManager.Vocal / PlayerManager.Instrumental 中与当前播放器同时播放（静音），
+切换轨道时只做短交叉淡化并切换静音，不再 stop → 重新打开文件 → set_time。
+当前播放器（原曲）始终作为主时钟：进度、歌词、自动切歌都不受影响；
+后台线程定期通过播放器命令队列让分轨播放器跟随主播放器的播放 / 暂停 / 停止、音量和位置（偏差超过阈值时校正）
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import vlc
+
+from app.core.io_scheduler import io_scheduler
+from app.core.player_commands import Command
+from app.core.logging import player_logger
+
+# 轨道索引
+TRACK_ORIGINAL = 0
+TRACK_VOCAL = 1
+TRACK_INSTRUMENTAL = 2
+
+
+def stem_paths(path: str) -> Dict[int, str]:
+    """AI 分离生成的分轨文件路径（与原曲同目录，<名称>_Vocal.mp3 / <名称>_Instrumental.mp3）"""
+    if not path or not path.endswith(".mp3"):
+        return {}
+    base = path[:-len(".mp3")]
+    return {TRACK_VOCAL: f"{base}_Vocal.mp3", TRACK_INSTRUMENTAL: f"{base}_Instrumental.mp3"}
+
+
+class StemPlayback:
+    """
+    分轨同步播放（内部加锁）
+    - prepare(path)：分轨文件存在时预加载并静音播放（切歌的延后工作中调用，首次切换也无需等待）
+    - select(track)：切换可听见的轨道
+    - sync()：让分轨播放器立即跟随主播放器（播放控制、跳转、音量变化后调用）
+    - stop()：切歌时停止分轨播放
+    """
+    # 位置偏差超过多少毫秒时校正
+    DRIFT_TOLERANCE_MS = 100
+    # 同步检查间隔（秒）
+    SYNC_INTERVAL = 1.0
+    # 交叉淡化时长（秒）及步数
+    CROSSFADE = 0.08
+    FADE_STEPS = 8
+    # 加载分轨时等待开始播放的最长时间（秒）
+    LOAD_WAIT = 1.0
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.players = {TRACK_VOCAL: manager.Vocal, TRACK_INSTRUMENTAL: manager.Instrumental}
+        self.track = TRACK_ORIGINAL
+        self._file: Optional[str] = None  # 已加载分轨对应的原曲
+        self._loaded: Dict[int, str] = {}  # 轨道 -> 分轨文件
+        self._lock = threading.RLock()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"loads": 0, "switches": 0, "corrections": 0, "last_drift_ms": None}
+
+    def _player_of(self, track: int) -> vlc.MediaPlayer:
+        return self.manager.player if track == TRACK_ORIGINAL else self.players[track]
+
+    # ============================= 加载 / 停止 =============================
+    def prepare(self, path: str) -> bool:
+        """
+        预加载 path 的分轨（已加载时直接返回）
+
+        Returns:
+            bool: 是否有可用的分轨
+        """
+        available = {track: stem for track, stem in stem_paths(path).items() if io_scheduler.path_exists(stem)}
+        with self._lock:
+            if path != self.manager.current_file:
+                return False
+            if self._file == path and set(self._loaded) >= set(available):
+                return bool(self._loaded)
+            if not available:
+                return False
+            self._release()
+            self._file = path
+            self._loaded = available
+            volume = self.manager.get_volume()
+            for track, stem in available.items():
+                player = self.players[track]
+                player.set_media(vlc.Media(stem))
+                player.audio_set_volume(volume)
+                player.audio_set_mute(True)
+                player.play()
+            self._wait_started()
+            self._stats["loads"] += 1
+            self.sync()
+        player_logger.debug(f"[Stems] 已预加载分轨: {path} {sorted(available)}")
+        self._start_worker()
+        return True
+
+    def _wait_started(self):
+        """等待分轨播放器开始播放（之后 set_time 才会生效）"""
+        deadline = time.perf_counter() + self.LOAD_WAIT
+        pending = [self.players[track] for track in self._loaded]
+        while pending and time.perf_counter() < deadline:
+            pending = [p for p in pending if p.get_state() != vlc.State.Playing]
+            if pending:
+                time.sleep(0.01)
+
+    def stop(self):
+        """停止分轨播放并恢复原曲（切歌时调用）"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._release()
+            player_logger.debug("[Stems] 已停止分轨播放")
+
+    def _release(self):
+        """停止已加载的分轨并取消原曲静音（调用方持有 _lock）"""
+        for track in self._loaded:
+            self.players[track].stop()
+        self.manager.player.audio_set_mute(False)
+        self._file = None
+        self._loaded = {}
+        self.track = TRACK_ORIGINAL
+
+    # ============================= 切换 =============================
+    def select(self, track: int):
+        """
+        切换可听见的轨道（0 原曲，1 人声，2 伴奏）
+
+        Raises:
+            FileNotFoundError: 对应的分轨文件不存在
+        """
+        path = self.manager.current_file
+        if track != TRACK_ORIGINAL:
+            name = "人声" if track == TRACK_VOCAL else "伴奏"
+            if track not in stem_paths(path) or not self.prepare(path) or track not in self._loaded:
+                raise FileNotFoundError(f"没有{name}轨道文件")
+        with self._lock:
+            previous = self.track
+            if previous == track:
+                return
+            if self._file is not None:
+                self.sync()
+                self._crossfade(self._player_of(previous), self._player_of(track))
+            self.track = track
+            self._stats["switches"] += 1
+        player_logger.debug(f"[Stems] 切换轨道 {previous} → {track}")
+
+    def _crossfade(self, old: vlc.MediaPlayer, new: vlc.MediaPlayer):
+        """短交叉淡化后静音旧轨道（调用方持有 _lock）"""
+        volume = self.manager.get_volume()
+        new.audio_set_volume(0)
+        new.audio_set_mute(False)
+        for step in range(1, self.FADE_STEPS + 1):
+            new.audio_set_volume(volume * step // self.FADE_STEPS)
+            old.audio_set_volume(volume * (self.FADE_STEPS - step) // self.FADE_STEPS)
+            time.sleep(self.CROSSFADE / self.FADE_STEPS)
+        old.audio_set_mute(True)
+        old.audio_set_volume(volume)
+
+    # ============================= 同步 =============================
+    def sync(self):
+        """让分轨播放器跟随主播放器的状态、音量和位置"""
+        with self._lock:
+            if self._file is None:
+                return
+            master = self.manager.player
+            if self._file != self.manager.current_file:
+                self._release()
+                return
+            state = master.get_state()
+            volume = self.manager.get_volume()
+            master.audio_set_mute(self.track != TRACK_ORIGINAL)
+            master_time = master.get_time()
+            for track in self._loaded:
+                player = self.players[track]
+                # 静音 / 音量在开始播放前设置可能不生效，每次同步时重新设置
+                player.audio_set_volume(volume)
+                player.audio_set_mute(track != self.track)
+                stem_state = player.get_state()
+                if state == vlc.State.Playing:
+                    if stem_state != vlc.State.Playing:
+                        player.play()
+                elif state == vlc.State.Paused:
+                    if stem_state == vlc.State.Playing:
+                        player.set_pause(1)
+                else:
+                    if stem_state in (vlc.State.Playing, vlc.State.Paused):
+                        player.stop()
+                    continue
+                if master_time >= 0:
+                    self._correct_drift(player, master_time)
+
+    def _correct_drift(self, player: vlc.MediaPlayer, master_time: int):
+        position = player.get_time()
+        if position < 0:
+            return
+        drift = position - master_time
+        self._stats["last_drift_ms"] = drift
+        if abs(drift) > self.DRIFT_TOLERANCE_MS:
+            player.set_time(master_time)
+            self._stats["corrections"] += 1
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="stems", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.SYNC_INTERVAL)
+            with self._lock:
+                if self._file is None:
+                    self._worker = None
+                    return
+            # 同步会修改当前播放器的静音和分轨位置，由播放器命令队列执行
+            future = self.manager.commands.submit(Command.CALL, self.sync)
+            future.add_done_callback(self._log_sync_error)
+
+    @staticmethod
+    def _log_sync_error(future):
+        if future.exception() is not None:
+            player_logger.error(f"[Stems] 分轨同步失败: {future.exception()}")
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                track=self.track,
+                file=self._file,
+                stems=sorted(self._loaded),
+            )
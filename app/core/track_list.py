@@ -0,0 +1,110 @@
+# app/core/track_list.py
+"""
+磁盘路径模式的曲目列表缓存
+每个目录的音频文件按自然顺序（数字按数值比较，文本按当前 locale 排序规则）排序一次，
+以目录 mtime 判断是否失效（目录读取复用 directory_cache 的 scandir 快照），
+路径 -> 位置索引使求位置、上一首 / 下一首为 O(1)
+"""
+import locale
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.dir_cache import directory_cache
+from app.core.media_types import MEDIA_AUDIO
+
+_NATURAL_SPLIT_RE = re.compile(r'(\d+)')
+
+
+def natural_sort_key(name: str) -> Tuple[tuple, ...]:
+    """
+    自然排序键：'2.mp3' 排在 '10.mp3' 之前，大小写不敏感，文本部分使用 locale.strxfrm
+    每个分段都是 (类型, 数值, 文本) 三元组，数字段和文本段可以直接比较
+    """
+    key = []
+    for i, part in enumerate(_NATURAL_SPLIT_RE.split(name)):
+        if not part:
+            continue
+        if i % 2:
+            key.append((0, int(part), ""))
+        else:
+            key.append((1, 0, locale.strxfrm(part.casefold())))
+    # 自然顺序相同（如 '01' 和 '1'）时按原名区分，保证顺序稳定
+    key.append((2, 0, name))
+    return tuple(key)
+
+
+class TrackList:
+    """单个目录排好序的音频文件列表（只读）"""
+    __slots__ = ("directory", "mtime_ns", "paths", "_index")
+
+    def __init__(self, directory: str, mtime_ns: int, paths: List[str]):
+        self.directory = directory
+        self.mtime_ns = mtime_ns
+        self.paths = tuple(paths)
+        self._index: Dict[str, int] = {path: i for i, path in enumerate(self.paths)}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._index
+
+    def index_of(self, path: str) -> int:
+        """文件的位置，不在列表中时返回 -1"""
+        return self._index.get(path, -1)
+
+    def neighbor(self, path: Optional[str], direction: int) -> Optional[str]:
+        """
+        下一首（direction=1）/ 上一首（direction=-1），到头后循环
+        文件不在列表中时，下一首为第一首，上一首为最后一首
+        """
+        if not self.paths:
+            return None
+        index = self._index.get(path, -1) if path else -1
+        if index < 0:
+            return self.paths[0] if direction > 0 else self.paths[-1]
+        return self.paths[(index + direction) % len(self.paths)]
+
+
+class TrackListCache:
+    """曲目列表缓存（LRU，目录 mtime 变化时重新生成）"""
+
+    def __init__(self, max_dirs: int = 64):
+        self.max_dirs = max_dirs
+        self._lists: "OrderedDict[str, TrackList]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, directory: str) -> TrackList:
+        """
+        获取目录的曲目列表（访问文件系统，需在存储根线程池中调用）
+
+        Raises:
+            FileNotFoundError / NotADirectoryError / PermissionError
+        """
+        snapshot = directory_cache.get_snapshot(directory)
+        with self._lock:
+            tracks = self._lists.get(directory)
+            if tracks is not None and tracks.mtime_ns == snapshot.mtime_ns:
+                self._lists.move_to_end(directory)
+                return tracks
+
+        audio = [e for e in snapshot.entries if not e.is_dir and e.media_type == MEDIA_AUDIO]
+        audio.sort(key=lambda e: natural_sort_key(e.name))
+        tracks = TrackList(directory, snapshot.mtime_ns, [e.path for e in audio])
+        with self._lock:
+            self._lists[directory] = tracks
+            self._lists.move_to_end(directory)
+            while len(self._lists) > self.max_dirs:
+                self._lists.popitem(last=False)
+        return tracks
+
+    def peek(self, directory: str) -> Optional[TrackList]:
+        """只读取缓存中的曲目列表，不访问文件系统"""
+        with self._lock:
+            return self._lists.get(directory)
+
+
+# 导出单例实例
+track_list_cache = TrackListCache()
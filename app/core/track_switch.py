@@ -0,0 +1,129 @@
+# app/core/track_switch.py
+"""
+切歌延迟跟踪
+切歌时先开始播放，目录索引、标签和歌词等非音频工作延后到第一帧音频之后（或等待超时后）
+由单个后台线程执行；连续切歌时只执行最后一次切歌的延后工作。
+每次切歌记录 time-to-first-audio（请求开始到 VLC MediaPlayerPlaying 事件）和延后工作完成的耗时
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from app.core.logging import player_logger
+
+
+class TrackSwitchTracker:
+    """
+    切歌跟踪器（内部加锁）
+    begin() -> 播放 -> defer()；VLC 的 MediaPlayerPlaying 回调中调用 on_playing()
+    """
+    # 等待第一帧音频的最长时间（秒），超时后照常执行延后工作
+    FIRST_AUDIO_WAIT = 1.0
+    # 保留的切歌记录数
+    MAX_RECORDS = 100
+
+    def __init__(self, finish: Callable[[int, str], None]):
+        """
+        Args:
+            finish: 延后工作 finish(seq, path)，在后台线程中执行，可用 is_current(seq) 判断是否已被新的切歌取代
+        """
+        self._finish = finish
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._seq = 0
+        self._first_audio = threading.Event()
+        self._current: Optional[dict] = None
+        self._pending: Optional[tuple] = None
+        self._records: "deque[dict]" = deque(maxlen=self.MAX_RECORDS)
+        self._worker: Optional[threading.Thread] = None
+
+    def begin(self, path: str, started: Optional[float] = None) -> int:
+        """
+        开始一次切歌
+
+        Args:
+            started: 切歌请求开始的 time.perf_counter()（默认为现在）
+
+        Returns:
+            int: 本次切歌的序号
+        """
+        with self._lock:
+            self._seq += 1
+            # 唤醒上一次切歌仍在等待第一帧的延后工作，让它发现自己已过期
+            self._first_audio.set()
+            self._first_audio = threading.Event()
+            self._current = {
+                "seq": self._seq,
+                "file": path,
+                "started": time.perf_counter() if started is None else started,
+                "first_audio_ms": None,
+                "ready_ms": None,
+            }
+            self._records.append(self._current)
+            return self._seq
+
+    def defer(self, seq: int, path: str):
+        """排队执行本次切歌的延后工作（替换尚未开始的旧任务）"""
+        with self._lock:
+            self._pending = (seq, path, self._first_audio)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="track-switch", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def on_playing(self):
+        """VLC MediaPlayerPlaying 事件：记录本次切歌的第一帧音频时间（暂停后继续播放不计入）"""
+        with self._lock:
+            current = self._current
+            if current is not None and current["first_audio_ms"] is None:
+                current["first_audio_ms"] = round((time.perf_counter() - current["started"]) * 1000, 1)
+            self._first_audio.set()
+
+    @property
+    def seq(self) -> int:
+        """最近一次切歌的序号"""
+        return self._seq
+
+    def is_current(self, seq: int) -> bool:
+        return seq == self._seq
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._pending is None:
+                    self._cond.wait()
+                seq, path, first_audio = self._pending
+                self._pending = None
+            first_audio.wait(self.FIRST_AUDIO_WAIT)
+            if not self.is_current(seq):
+                continue
+            try:
+                self._finish(seq, path)
+            except Exception as e:
+                player_logger.error(f"[TrackSwitch] 切歌后续处理失败: {e}")
+            with self._lock:
+                current = self._current
+                if current is not None and current["seq"] == seq:
+                    current["ready_ms"] = round((time.perf_counter() - current["started"]) * 1000, 1)
+
+    def get_stats(self) -> dict:
+        """最近切歌的延迟统计（毫秒）"""
+        with self._lock:
+            records = [dict(r) for r in self._records]
+        records = [{k: v for k, v in r.items() if k != "started"} for r in records]
+        samples = sorted(r["first_audio_ms"] for r in records if r["first_audio_ms"] is not None)
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else None
+
+        return {
+            "switches": len(records),
+            "first_audio_ms": {
+                "last": records[-1]["first_audio_ms"] if records else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": samples[-1] if samples else None,
+            },
+            "recent": records[-10:],
+        }
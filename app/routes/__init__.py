@@ -11,15 +11,15 @@ player_bp = Blueprint('player', __name__, url_prefix='')
 
 # 导入视图类（延迟导入，避免循环依赖）
 from .player import (
-    IndexView, ListDirectoryView, SetDirectoryView, SetFileView,
+    IndexView, ListDirectoryView, ListTreeView, SetDirectoryView, SetFileView, PlayFolderView,
     PlayView, PauseView, StopView,
     NextTrackView, PrevTrackView, SetPositionView,
-    LyricsView, AlbumCoverView, AudioMetadataView, ProgressView,
+    LyricsView, AlbumCoverView, CoverView, AudioMetadataView, MetadataBatchView, ProgressView,
     SetDeviceView, DevicesView, OnlineUsersView, SetPlayModeView,
     SettingsView, RestorePlaybackView, SavePlaybackView, UpdatePositionView,
     VolumeView, SetVolumeView,
-    AddToPlaylistView, RemoveFromPlaylistView, GetPlaylistView, ClearPlaylistView,
-    SearchView, SetIndexView,
+    AddToPlaylistView, PlaylistBatchView, RemoveFromPlaylistView, GetPlaylistView, ClearPlaylistView,
+    SearchView, SetIndexView, IndexStatusView, LibraryStatusView, StorageStatusView, SwitchStatsView,
     # 重启路由
     RestartView,
     # 播放历史记录路由
@@ -46,15 +46,23 @@ def _register_routes():
     player_bp.add_url_rule("/api/current_lyrics", view_func=LyricsView.as_view('current_lyrics'))
     player_bp.add_url_rule("/api/full_lyrics", view_func=LyricsView.as_view('full_lyrics'))
     player_bp.add_url_rule("/api/album_cover", view_func=AlbumCoverView.as_view('album_cover'))
+    # 按内容 hash 寻址的封面 / 缩略图（可长期缓存）
+    player_bp.add_url_rule("/api/cover/<cover_hash>/<size>", view_func=CoverView.as_view('cover'))
     player_bp.add_url_rule("/api/audio_metadata", view_func=AudioMetadataView.as_view('audio_metadata'))
+    # 批量获取标签 / 时长 / 封面缩略图地址（列表视图）
+    player_bp.add_url_rule("/api/metadata/batch", view_func=MetadataBatchView.as_view('metadata_batch'))
     player_bp.add_url_rule("/api/progress", view_func=ProgressView.as_view('progress'))
     player_bp.add_url_rule("/api/volume", view_func=VolumeView.as_view('volume'))
     player_bp.add_url_rule("/api/set_volume", view_func=SetVolumeView.as_view('set_volume'))
 
     #文件操作类
     player_bp.add_url_rule("/api/list_directory", view_func=ListDirectoryView.as_view('list_directory'))
+    # 多级目录树路由
+    player_bp.add_url_rule("/api/list_tree", view_func=ListTreeView.as_view('list_tree'))
     player_bp.add_url_rule("/api/set_directory", view_func=SetDirectoryView.as_view('set_directory'))
     player_bp.add_url_rule("/api/set_file", view_func=SetFileView.as_view('set_file'))
+    # 文件夹递归播放路由
+    player_bp.add_url_rule("/api/play_folder", view_func=PlayFolderView.as_view('play_folder'))
     player_bp.add_url_rule("/api/set_device", view_func=SetDeviceView.as_view('set_device'))
     player_bp.add_url_rule("/api/devices", view_func=DevicesView.as_view('devices'))
     #用户类
@@ -66,6 +74,7 @@ def _register_routes():
     player_bp.add_url_rule("/api/update_position", view_func=UpdatePositionView.as_view('update_position'))
     # 播放列表管理路由
     player_bp.add_url_rule("/api/add_to_playlist", view_func=AddToPlaylistView.as_view('add_to_playlist'))
+    player_bp.add_url_rule("/api/playlist/batch", view_func=PlaylistBatchView.as_view('playlist_batch'))
     player_bp.add_url_rule("/api/remove_from_playlist", view_func=RemoveFromPlaylistView.as_view('remove_from_playlist'))
     player_bp.add_url_rule("/api/playlist", view_func=GetPlaylistView.as_view('playlist'))
     player_bp.add_url_rule("/api/clear_playlist", view_func=ClearPlaylistView.as_view('clear_playlist'))
@@ -75,6 +84,14 @@ def _register_routes():
     player_bp.add_url_rule("/api/search", view_func=SearchView.as_view('search'))
     # 设置索引路由
     player_bp.add_url_rule("/api/set_index", view_func=SetIndexView.as_view('set_index'))
+    # 索引构建状态路由
+    player_bp.add_url_rule("/api/index_status", view_func=IndexStatusView.as_view('index_status'))
+    # 媒体库标签扫描状态路由
+    player_bp.add_url_rule("/api/library_status", view_func=LibraryStatusView.as_view('library_status'))
+    # 存储 I/O 状态路由
+    player_bp.add_url_rule("/api/storage_status", view_func=StorageStatusView.as_view('storage_status'))
+    # 切歌延迟统计路由
+    player_bp.add_url_rule("/api/switch_stats", view_func=SwitchStatsView.as_view('switch_stats'))
     # 重启路由
     player_bp.add_url_rule("/api/restart", view_func=RestartView.as_view('restart'))
     # 播放历史记录路由
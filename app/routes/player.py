@@ -17,7 +17,18 @@ from app.core.error_handler import PlayerErrorHandler
 from app.core.logging import player_logger
 from app.core.sync_manager import get_sync_manager  # 导入同步管理器
 from app.core.search_file import file_indexer  # 导入搜索索引器单例
+from app.core.media_library import media_library, is_field_query  # 导入媒体库标签索引
+from app.core.dir_cache import directory_cache  # 导入目录列表缓存
+from app.core.io_scheduler import io_scheduler, StorageUnavailableError  # 导入按存储根隔离的 I/O 调度器
+from app.core.dir_prefetch import dir_prefetcher, attach_tags  # 导入目录预读
+from app.core.folder_stats import folder_stats  # 导入文件夹统计
+from app.core.file_status import file_status  # 导入文件存在性缓存
+from app.core.album_art import album_art, sniff_mimetype, THUMBNAIL_SIZES  # 导入专辑封面缓存
+from app.core.metadata_cache import metadata_cache  # 导入音频元数据缓存
+from app.core.media_types import is_audio_file  # 导入媒体类型判断
+from app.core.player_commands import Command  # 导入播放器命令
 from app.core.UVR5.process import VocalSeparationAsync  # 导入音频分离模块
+COVER_HASH_RE = re.compile(r'^[0-9a-f]{40}$')
 # ================== 类视图定义 ==================
 class IndexView(MethodView):
     @PlayerErrorHandler.create_error_handler
@@ -38,56 +49,96 @@ class ListDirectoryView(MethodView):
 
         # 获取完整的路径
         full_path = os.path.abspath(path)
-        if not os.path.exists(full_path):
-            return jsonify({"status": "error", "message": "Directory does not exist"}), 404
 
-        # 获取目录下的文件和文件夹
+        # 获取目录下的文件和文件夹（scandir 快照按目录 mtime 缓存，分页只切片快照）
+        # 在目录所属存储根的线程池中执行，网络存储卡住时超时返回 503/504
         try:
-            files_and_folders = []
-            for entry in os.listdir(full_path):
-                entry_path = os.path.join(full_path, entry)
-                if os.path.isdir(entry_path):
-                    entry_info = {"name": entry, "type": "folder", "path": entry_path}
-                else:
-                    entry_info = {"name": entry, "type": "file", "path": entry_path}
-                files_and_folders.append(entry_info)
-
-            # 按文件名排序
-            files_and_folders.sort(key=lambda x: x["name"])
+            total, paginated_files = await io_scheduler.run(
+                full_path, directory_cache.list_page, full_path, page, page_size
+            )
+            # 附加已入库的标签摘要，并在后台预读子文件夹和可见音频文件的标签
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, attach_tags, paginated_files)
+            dir_prefetcher.prefetch_directory(full_path, paginated_files)
 
-            # 计算分页起始位置
-            start = (page - 1) * page_size
-            end = start + page_size
-            paginated_files = files_and_folders[start:end]
+            # 附加后台已算好的文件夹统计（大小 / 媒体文件数 / 总时长），并排队刷新当前目录
+            folder_paths = [f["path"] for f in paginated_files if f["type"] == "folder"]
+            stats = folder_stats.get_many(folder_paths)
+            for f in paginated_files:
+                if f["path"] in stats:
+                    f["stats"] = stats[f["path"]]
+            folder_stats.request(full_path)
 
             return jsonify({
                 "status": "success",
                 "directory": full_path,
+                "directory_stats": folder_stats.get(full_path),
                 "page": page,
                 "page_size": page_size,
-                "total_files": len(files_and_folders),
+                "total_files": total,
                 "files": paginated_files
             }), 200
 
+        except (FileNotFoundError, NotADirectoryError):
+            return jsonify({"status": "error", "message": "Directory does not exist"}), 404
         except PermissionError:
             return jsonify({"status": "error", "message": "Permission denied"}), 403
+        except StorageUnavailableError as e:
+            return jsonify({"status": "error", "message": str(e)}), 503
         except Exception as e:
             return jsonify({"status": "error", "message": str(e)}), 500
-class PlayView(MethodView):
+class ListTreeView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
-        if not player_manager.current_file:
-            return jsonify({"status": "error", "message": "No file loaded"}), 400
+        """
+        一次返回多级目录
+        路由：/api/list_tree?path=...&depth=2&max_entries=500
+        返回：目录树（已展开的文件夹带 children），达到条目上限时 truncated=True
+        """
+        path = request.args.get('path', default='', type=str)
+        depth = request.args.get('depth', default=2, type=int)
+        max_entries = request.args.get('max_entries', default=500, type=int)
+
+        if not path:
+            return jsonify({"status": "error", "message": "No path provided"}), 400
+
+        depth = max(1, min(depth, 5))
+        max_entries = max(1, min(max_entries, 5000))
+        full_path = os.path.abspath(path)
+
+        try:
+            tree, count, truncated = await io_scheduler.run(
+                full_path, directory_cache.list_tree, full_path, depth, max_entries
+            )
+        except (FileNotFoundError, NotADirectoryError):
+            return jsonify({"status": "error", "message": "Directory does not exist"}), 404
+        except PermissionError:
+            return jsonify({"status": "error", "message": "Permission denied"}), 403
+        except StorageUnavailableError as e:
+            return jsonify({"status": "error", "message": str(e)}), 503
 
         loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, attach_tags, tree["children"])
+        dir_prefetcher.prefetch_directory(full_path, tree["children"])
 
-        # 获取当前状态
-        state = await loop.run_in_executor(None, player_manager.player.get_state)
+        return jsonify({
+            "status": "success",
+            "directory": full_path,
+            "depth": depth,
+            "entries": count,
+            "truncated": truncated,
+            "tree": tree
+        }), 200
+class PlayView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        if not player_manager.current_file:
+            return jsonify({"status": "error", "message": "No file loaded"}), 400
 
-        await loop.run_in_executor(None, player_manager.player.play)
+        # 由命令队列执行（同时生成新 token）
+        await player_manager.commands.run(Command.PLAY)
 
         player_logger.debug(f"[Play] 正在播放: {player_manager.current_file}")
-        player_manager.new_token()  # 生成新 token
 
         return jsonify({"status": "playing"}), 200
 class PauseView(MethodView):
@@ -97,20 +148,17 @@ class PauseView(MethodView):
         if not player_manager.current_file:
             return jsonify({"status": "error", "message": "No file loaded"}), 400
 
-        loop = asyncio.get_running_loop()
-        state = await loop.run_in_executor(None, player_manager.player.get_state)
-
-        if state != vlc.State.Playing:
+        # 由命令队列执行（同时生成新 token）
+        if not await player_manager.commands.run(Command.PAUSE):
             return jsonify({"status": "already paused"}), 200
 
-        await loop.run_in_executor(None, player_manager.player.pause)
-        refresh_token = player_manager.new_token()
+        refresh_token = player_manager.refresh_token
         player_logger.debug(f"[Pause] 已暂停: {player_manager.current_file}")
         return jsonify({"status": "paused"}), 200
 class StopView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
-        await asyncio.get_running_loop().run_in_executor(None, player_manager.player.stop)
+        await player_manager.commands.run(Command.STOP)
         player_logger.debug(f"[Stop] 已停止: {player_manager.current_file}")
         return jsonify({"status": "stopped"}), 200
 class NextTrackView(MethodView):
@@ -140,10 +188,10 @@ class SettingsView(MethodView):
         # 处理播放来源设置
         if "play_source" in data:
             play_source = data["play_source"]
-            if play_source in [1, 2]:
+            if play_source in [1, 2, 3]:
                 player_manager.settings.set_play_source(play_source)
             else:
-                return jsonify({"status": "error", "message": "播放来源值无效，必须为1或2"}), 400
+                return jsonify({"status": "error", "message": "播放来源值无效，必须为1、2或3"}), 400
         
         # 处理记住播放进度设置
         if "remember_playback" in data:
@@ -156,13 +204,17 @@ class SettingsView(MethodView):
         # 处理播放模式设置
         if "play_mode" in data:
             player_manager.settings.set_play_mode(data["play_mode"])
+
+        # 处理无缝切歌设置
+        if "gapless" in data:
+            player_manager.settings.set_gapless(bool(data["gapless"]))
         
         return jsonify({"status": "success", "message": "Settings updated"}), 200
 class RestorePlaybackView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
         """恢复上次播放"""
-        success = player_manager.restore_last_playback()
+        success = await player_manager.commands.run(Command.CALL, player_manager.restore_last_playback)
         if success:
             return jsonify({"status": "success", "message": "Playback restored"}), 200
         else:
@@ -193,7 +245,7 @@ class SetDirectoryView(MethodView):
 
         # 安全处理路径
         directory = os.path.abspath(directory)
-        if not os.path.isdir(directory):
+        if not await io_scheduler.run(directory, os.path.isdir, directory):
             return jsonify({"status": "error", "message": "Directory does not exist"}), 404
 
         # 直接设置全局目录
@@ -208,31 +260,55 @@ class SetDirectoryView(MethodView):
 class SetFileView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
+        started = time.perf_counter()
         file_path = request.args.get('file')
 
         if not file_path:
             return jsonify({"status": "error", "message": "No file provided"}), 400
 
         file_path = os.path.abspath(file_path)
-        if not os.path.isfile(file_path):
+        if not await io_scheduler.run(file_path, os.path.isfile, file_path):
             return jsonify({"status": "error", "message": "File not exists"}), 404
 
-        loop = asyncio.get_running_loop()
-        # === 1. 使用set_file方法设置文件（这会自动更新播放记录）===
-        await loop.run_in_executor(None, player_manager.set_file, file_path)
-        player_logger.debug(f"[SetFile] 准备加载: {player_manager.current_file}")
-        # === 2. 异步加载歌词（使用工具函数）===
-        global_lyrics = await loop.run_in_executor(None, player_manager.load_lyrics)
-        player_logger.debug(f"[SetFile] 歌词加载: {len(global_lyrics) if global_lyrics else 0} 字符")
-        # === 3. 设置媒体 + 播放 ===
-        await loop.run_in_executor(None, player_manager.player.play)
-        # === 4. 生成新 token ===
-        player_manager.new_token()
-        player_logger.debug(f"[SetFile] 成功加载并播放: {os.path.basename(player_manager.current_file)}")
+        # 由命令队列设置媒体并立即播放（自动更新播放记录），目录索引、标签和歌词在开始出声后由后台补齐并刷新 token
+        await player_manager.commands.run(Command.PLAY_FILE, file_path, 0.0, started=started)
+        player_logger.debug(f"[SetFile] 成功加载并播放: {os.path.basename(file_path)}")
         return jsonify({
             "status": "loaded",
-            "file": player_manager.current_file,
-            "lyrics_loaded": bool(global_lyrics),
+            "file": file_path,
+        }), 200
+class PlayFolderView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        """
+        递归播放整个文件夹（切换到播放来源 3）
+        路由：/api/play_folder?path=...&shuffle=0|1（不带 path 时返回当前文件夹播放状态）
+        shuffle 默认跟随当前播放模式（随机模式时为 1）
+        返回：第一首文件和遍历状态
+        """
+        started = time.perf_counter()
+        path = request.args.get('path', default='', type=str)
+        if not path:
+            return jsonify({"status": "success", "folder_source": player_manager.folder_source.get_status()}), 200
+
+        full_path = os.path.abspath(path)
+        if not await io_scheduler.run(full_path, os.path.isdir, full_path):
+            return jsonify({"status": "error", "message": "Directory does not exist"}), 404
+        shuffle = request.args.get('shuffle', default=None, type=str)
+        shuffle = player_manager.play_mode == PlayMode.RANDOM if shuffle is None else shuffle in ('1', 'true')
+
+        # 只读取到第一首为止，不需要先遍历整个目录树
+        first_file = await io_scheduler.run(full_path, player_manager.folder_source.start, full_path, shuffle)
+        if not first_file:
+            return jsonify({"status": "error", "message": "文件夹中没有音频文件"}), 404
+
+        player_manager.settings.set_play_source(3)
+        await player_manager.commands.run(Command.PLAY_FILE, first_file, 0.0, started=started)
+        player_logger.debug(f"[PlayFolder] 开始递归播放: {full_path} → {os.path.basename(first_file)}")
+        return jsonify({
+            "status": "loaded",
+            "file": first_file,
+            "folder_source": player_manager.folder_source.get_status()
         }), 200
 class LyricsView(MethodView):
     @PlayerErrorHandler.create_error_handler
@@ -279,18 +355,51 @@ class AlbumCoverView(MethodView):
         if not player_manager.current_file:
             return jsonify({"status": "error", "message": "No file selected"}), 400
 
-        # 使用 player_manager 实例调用 extract_album_cover
-        cover = await asyncio.get_running_loop().run_in_executor(
-            None, player_manager.extract_album_cover, player_manager.current_file  # 正确传文件路径
-        )
+        size = request.args.get("size", default="original", type=str)
+        if size != "original" and (not size.isdigit() or int(size) not in THUMBNAIL_SIZES):
+            return jsonify({"status": "error", "message": "Invalid cover size"}), 400
 
-        if cover:
-            return await send_file(
-                io.BytesIO(cover),
-                mimetype="image/jpeg"
-            )
+        # 提取（或读取缓存的）封面 hash（在文件所属存储根的线程池中执行），再重定向到可长期缓存的封面地址
+        current_file = player_manager.current_file
+        cover_hash = await io_scheduler.run(current_file, album_art.get_cover_hash, current_file)
+
+        if cover_hash:
+            return redirect(f"/api/cover/{cover_hash}/{size}")
 
         return jsonify({"status": "no_cover", "message": "No album cover found"}), 200
+class CoverView(MethodView):
+    # 封面内容由 hash 决定，地址不变则内容不变
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    @PlayerErrorHandler.create_error_handler
+    async def get(self, cover_hash, size):
+        """按内容 hash 获取封面原图或缩略图（/api/cover/<hash>/<original|64|128|256|512>）"""
+        if not COVER_HASH_RE.match(cover_hash):
+            return jsonify({"status": "error", "message": "Invalid cover hash"}), 400
+        if size != "original":
+            if not size.isdigit() or int(size) not in THUMBNAIL_SIZES:
+                return jsonify({"status": "error", "message": "Invalid cover size"}), 400
+            size = int(size)
+
+        etag = f'"{cover_hash}-{size}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            return "", 304, {"ETag": etag, "Cache-Control": self.CACHE_CONTROL}
+
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, album_art.get_file, cover_hash, size)
+        if path is None:
+            return jsonify({"status": "error", "message": "Cover not found"}), 404
+
+        def read_cover():
+            with open(path, "rb") as f:
+                return f.read()
+
+        data = await loop.run_in_executor(None, read_cover)
+        mimetype = sniff_mimetype(data) if size == "original" else "image/jpeg"
+        response = await send_file(io.BytesIO(data), mimetype=mimetype)
+        response.headers["Cache-Control"] = self.CACHE_CONTROL
+        response.headers["ETag"] = etag
+        return response
 class AudioMetadataView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
@@ -299,8 +408,9 @@ class AudioMetadataView(MethodView):
 
         loop = asyncio.get_running_loop()
 
-        # 复用你的 extract_album_cover
-        cover_data = await loop.run_in_executor(None, player_manager.extract_album_cover, player_manager.current_file)
+        # 封面只返回 hash 和地址，图片本身由 /api/cover 提供
+        current_file = player_manager.current_file
+        cover_hash = await io_scheduler.run(current_file, album_art.get_cover_hash, current_file)
         # 简单获取时长（你原来的逻辑）
         duration = await loop.run_in_executor(None, lambda: player_manager.player.get_length() / 1000)
         return jsonify({
@@ -311,8 +421,125 @@ class AudioMetadataView(MethodView):
             "album": player_manager.album,
             "duration": player_manager.duration,
             "bitrate": player_manager.bitrate,
+            "cover": cover_hash,
+            "cover_url": f"/api/cover/{cover_hash}/original" if cover_hash else None,
             "file_path": player_manager.current_file
         }), 200
+class MetadataBatchView(MethodView):
+    # 单次请求最多的路径数
+    MAX_PATHS = 200
+    # 每次提交到存储根线程池的文件数
+    CHUNK_SIZE = 4
+    # 同时进行的提取批次数（小于存储根线程池的线程数，给播放和其他请求留出线程）
+    MAX_CONCURRENCY = 2
+    # 默认最多等待提取的时间（秒），超时的文件作为 pending 返回，提取在后台继续
+    WAIT_TIMEOUT = 5.0
+
+    @staticmethod
+    def _describe(meta: dict, size) -> dict:
+        cover = meta.get("cover") or None
+        return {
+            "title": meta["title"],
+            "artist": meta["artist"],
+            "album": meta["album"],
+            "duration": meta["duration"],
+            "bitrate": meta["bitrate"],
+            "cover": cover,
+            "cover_url": f"/api/cover/{cover}/{size}" if cover else None,
+        }
+
+    @staticmethod
+    def _load_chunk(paths):
+        """读取一批文件的元数据和封面 hash（在存储根线程池中执行）"""
+        metas = metadata_cache.get_many(paths)
+        for path, meta in metas.items():
+            try:
+                meta["cover"] = album_art.get_cover_hash(path) or ""
+            except Exception as e:
+                player_logger.debug(f"[MetadataBatch] 提取封面失败 {path}: {e}")
+                meta["cover"] = ""
+        return metas
+
+    @PlayerErrorHandler.create_error_handler
+    async def post(self):
+        """
+        批量获取音频文件的标签、时长和封面缩略图地址（用于搜索结果、目录和播放列表）
+        路由：/api/metadata/batch
+        参数（JSON）：
+            paths - 文件路径列表（最多 MAX_PATHS 个）
+            size - 封面尺寸（64/128/256/512/original，默认 128）
+            wait - 最多等待提取的秒数（默认 WAIT_TIMEOUT，0 表示只返回已缓存的结果）
+        返回：tracks（path -> 元数据）、pending（仍在提取中的路径）、missing（无法读取的路径）
+        """
+        data = await request.get_json()
+        paths = data.get("paths") if isinstance(data, dict) else None
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            return jsonify({"status": "error", "message": "paths must be a list of strings"}), 400
+        if len(paths) > self.MAX_PATHS:
+            return jsonify({"status": "error", "message": f"Too many paths (max {self.MAX_PATHS})"}), 400
+        size = str(data.get("size", 128))
+        if size != "original" and (not size.isdigit() or int(size) not in THUMBNAIL_SIZES):
+            return jsonify({"status": "error", "message": "Invalid cover size"}), 400
+        try:
+            wait = min(max(float(data.get("wait", self.WAIT_TIMEOUT)), 0.0), io_scheduler.DEFAULT_TIMEOUT)
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "Invalid wait"}), 400
+
+        paths = list(dict.fromkeys(paths))
+        audio = [p for p in paths if is_audio_file(p)]
+        missing = [p for p in paths if not is_audio_file(p)]
+
+        # 已缓存（含封面）的条目直接返回，不访问媒体文件
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, metadata_cache.lookup, audio)
+        tracks = {p: self._describe(cached[p], size) for p in audio if p in cached and cached[p]["cover"] is not None}
+
+        # 其余文件按存储根分批，并发提取
+        groups = {}
+        for path in audio:
+            if path not in tracks:
+                groups.setdefault(io_scheduler.root_of(path), []).append(path)
+        chunks = [group[i:i + self.CHUNK_SIZE] for group in groups.values()
+                  for i in range(0, len(group), self.CHUNK_SIZE)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def load(chunk):
+            async with semaphore:
+                return await io_scheduler.run(chunk[0], self._load_chunk, chunk,
+                                              timeout=io_scheduler.DEFAULT_TIMEOUT * 3)
+
+        tasks = {}
+        for chunk in chunks:
+            task = asyncio.ensure_future(load(chunk))
+            # 超时返回后提取在后台继续（结果写入缓存），这里只消费异常
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            tasks[task] = chunk
+        done = set()
+        if tasks and wait > 0:
+            done, _ = await asyncio.wait(tasks, timeout=wait)
+
+        pending = []
+        for task, chunk in tasks.items():
+            if task not in done:
+                pending.extend(chunk)
+                continue
+            try:
+                metas = task.result()
+            except StorageUnavailableError:
+                missing.extend(chunk)
+                continue
+            for path in chunk:
+                if path in metas:
+                    tracks[path] = self._describe(metas[path], size)
+                else:
+                    missing.append(path)
+
+        return jsonify({
+            "status": "success",
+            "tracks": tracks,
+            "pending": pending,
+            "missing": missing
+        }), 200
 class ProgressView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
@@ -397,25 +624,10 @@ class SetPositionView(MethodView):
         if not player_manager.current_file:
             return jsonify({"status": "error", "message": "No file selected"}), 400
 
-        loop = asyncio.get_running_loop()
-
-        # 检查媒体是否加载
-        media = await loop.run_in_executor(None, player_manager.player.get_media)
-        if media is None:
+        # 由命令队列执行跳转（排队中的连续跳转只执行最后一次），返回实际位置
+        actual_pos = await player_manager.commands.run(Command.SEEK, position / 100)
+        if actual_pos is None:
             return jsonify({"status": "error", "message": "Media not loaded"}), 400
-
-        # 检查播放器状态
-        state = await loop.run_in_executor(None, player_manager.player.get_state)
-        if state not in (vlc.State.Playing, vlc.State.Paused):
-            player_logger.debug(f"[SetPosition] VLC 状态异常: {state}, 强制激活...")
-            await loop.run_in_executor(None, player_manager.player.play)
-            await asyncio.sleep(0.2)
-            await loop.run_in_executor(None, player_manager.player.pause)
-
-        # 执行跳转
-        await loop.run_in_executor(None, player_manager.player.set_position, position / 100)
-        # 验证实际位置
-        actual_pos = await loop.run_in_executor(None, player_manager.player.get_position)
         player_logger.debug(f"[SetPosition] 目标: {position}% → 实际: {actual_pos*100:.2f}%")
 
         return jsonify({
@@ -489,9 +701,8 @@ class SetPlayModeView(MethodView):
         
         # 如果没有传入mode参数，则按顺序循环切换播放模式
         if not mode:
-            # 调用PlayerManager的循环切换方法
-            loop = asyncio.get_running_loop()
-            new_mode = await loop.run_in_executor(None, player_manager.cycle_play_mode)
+            # 调用PlayerManager的循环切换方法（由命令队列执行，播放模式决定下一首的预测）
+            new_mode = await player_manager.commands.run(Command.CALL, player_manager.cycle_play_mode)
             
             # 映射回前端可识别的模式名称
             mode_mapping = {
@@ -530,8 +741,7 @@ class SetPlayModeView(MethodView):
         
         # 设置播放模式
         play_mode_enum = mode_mapping[mode]
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, player_manager.set_play_mode, play_mode_enum)
+        await player_manager.commands.run(Command.CALL, player_manager.set_play_mode, play_mode_enum)
         player_logger.debug(f"[SetPlayMode] 已设置播放模式: {mode} -> {play_mode_enum}")
         
         # 返回当前播放模式和所有支持的模式
@@ -580,10 +790,8 @@ class SetVolumeView(MethodView):
                 "message": "Volume must be between 0 and 100"
             }), 400
         
-        loop = asyncio.get_running_loop()
-        
-        # 设置音量
-        success = await loop.run_in_executor(None, player_manager.set_volume, volume)
+        # 设置音量（命令队列中以最后一次为准）
+        success = await player_manager.commands.run(Command.VOLUME, volume)
         
         if success:
             return jsonify({
@@ -624,6 +832,60 @@ class AddToPlaylistView(MethodView):
         
         return jsonify(result), 200 if result["status"] == "success" else 400
 
+class PlaylistBatchView(MethodView):
+    # 单次请求最多的操作数
+    MAX_OPERATIONS = 5000
+    # add_search 单个操作最多添加的搜索结果数
+    MAX_SEARCH_HITS = 20000
+
+    @PlayerErrorHandler.create_error_handler
+    async def post(self):
+        """
+        批量修改播放列表（一次加锁内按顺序执行）
+        路由：/api/playlist/batch
+        参数（JSON）：
+            operations - 操作列表，每项为：
+                {"op": "add", "path": ..., "name": ...}
+                {"op": "remove", "id": ...} / {"op": "remove", "name": ...}
+                {"op": "move", "id": ..., "index": ...}
+                {"op": "add_search", "keyword": ..., "re": false, "media_only": true}
+                {"op": "add_folder", "path": ..., "recursive": true}
+        返回：汇总结果和每个操作的结果
+        """
+        data = await request.get_json()
+        operations = data.get("operations") if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({"status": "error", "message": "operations must be a non-empty list"}), 400
+        if len(operations) > self.MAX_OPERATIONS:
+            return jsonify({"status": "error", "message": f"Too many operations (max {self.MAX_OPERATIONS})"}), 400
+
+        # 搜索在事件循环中展开为路径列表，其余操作交给 PlayerManager
+        prepared = []
+        for op in operations:
+            if not isinstance(op, dict):
+                prepared.append({"op": None, "error": "操作格式错误"})
+                continue
+            op = dict(op)
+            if op.get("op") == "add_search":
+                keyword = str(op.get("keyword", "")).strip()
+                if not keyword:
+                    op["error"] = "搜索关键词不能为空"
+                elif not file_indexer.is_ready():
+                    op["error"] = "搜索索引尚未构建"
+                else:
+                    try:
+                        _, op["paths"] = await file_indexer.search_page(
+                            keyword, bool(op.get("re", False)), bool(op.get("media_only", True)),
+                            1, self.MAX_SEARCH_HITS
+                        )
+                    except ValueError as e:
+                        op["error"] = str(e)
+            prepared.append(op)
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, player_manager.apply_playlist_batch, prepared)
+
+        return jsonify(result), 200 if result["status"] == "success" else 400
 class RemoveFromPlaylistView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
@@ -655,23 +917,41 @@ class RemoveFromPlaylistView(MethodView):
         
         return jsonify(result), 200 if result["status"] == "success" else 400
 class GetPlaylistView(MethodView):
+    # 单页最多返回的项目数
+    MAX_PAGE_SIZE = 5000
+
     @PlayerErrorHandler.create_error_handler
     async def get(self):
         """
         获取播放列表
-        路由：/api/playlist
-        返回：播放列表内容
+        路由：/api/playlist[?offset=0&limit=500][&since=<version>&epoch=<epoch>]
+        返回：
+            - 不带 since：播放列表内容（可分页）、版本号 version 和纪元 epoch
+            - 带 since：since 之后的变更 ops（reset=False）；版本过旧或纪元不同时 reset=True 并返回全量（或第一页）
+        标签由后台补全，不在请求中读取
         """
         loop = asyncio.get_running_loop()
-        
+        since = request.args.get('since', default=None, type=int)
+        epoch = request.args.get('epoch', default=None, type=str)
+        offset = max(0, request.args.get('offset', default=0, type=int))
+        limit = request.args.get('limit', default=None, type=int)
+        if limit is not None:
+            limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+
+        if since is not None:
+            changes = await loop.run_in_executor(None, player_manager.get_playlist_changes, since, epoch)
+            if changes is not None:
+                return jsonify(dict({"status": "success", "reset": False}, **changes)), 200
+
         # 调用播放列表获取方法
-        playlist = await loop.run_in_executor(None, player_manager.get_playlist)
+        page = await loop.run_in_executor(None, player_manager.get_playlist_page, offset, limit)
         
-        return jsonify({
+        return jsonify(dict({
             "status": "success",
-            "playlist": playlist,
-            "count": len(playlist)
-        }), 200
+            "reset": since is not None,
+            "limit": limit,
+            "metadata": player_manager.playlist_enricher.get_status()
+        }, **page)), 200
 class ClearPlaylistView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
@@ -702,24 +982,52 @@ class SearchView(MethodView):
         # 检查是否启用正则搜索
         use_regex = data.get('re', False)
 
+        # 分页参数（page_size 为 0 时返回全部匹配），media_only 只返回音视频文件
+        page = int(data.get('page', 1) or 1)
+        page_size = int(data.get('page_size', 0) or 0)
+        media_only = bool(data.get('media_only', False))
+
+        # 字段查询（artist: / album: / title:）走媒体库标签索引
+        if not use_regex and is_field_query(keyword):
+            try:
+                loop = asyncio.get_running_loop()
+                match_count, tracks = await loop.run_in_executor(
+                    None, media_library.search_page, keyword, page, page_size
+                )
+                return jsonify({
+                    "status": "success",
+                    "keyword": keyword,
+                    "match_count": match_count,
+                    "files": [track["path"] for track in tracks],
+                    "tracks": tracks,
+                    "page": page,
+                    "page_size": page_size,
+                    "search_type": "tags"
+                }), 200
+            except Exception as e:
+                player_logger.error(f"标签搜索失败: {str(e)}")
+                return jsonify({"status": "error", "message": f"标签搜索失败: {str(e)}"}), 500
+
         # 检查索引是否已构建
-        if not file_indexer._trie:
+        if not file_indexer.is_ready():
             return jsonify({"status": "error", "message": "搜索索引尚未构建"}), 400
 
         try:
-            # 根据re参数选择搜索方法
             if use_regex:
                 print("输入的正则表达式:",keyword)
-                matched_files = await file_indexer.regex_search(keyword)
-            else:
-                matched_files = await file_indexer.search(keyword)
+            # 只为当前页拼接完整路径
+            match_count, matched_files = await file_indexer.search_page(
+                keyword, use_regex=use_regex, media_only=media_only, page=page, page_size=page_size
+            )
             
             # 返回搜索结果
             return jsonify({
                 "status": "success",
                 "keyword": keyword,
-                "match_count": len(matched_files),
+                "match_count": match_count,
                 "files": matched_files,
+                "page": page,
+                "page_size": page_size,
                 "search_type": "regex" if use_regex else "normal"
             }), 200
             
@@ -749,22 +1057,87 @@ class SetIndexView(MethodView):
             return jsonify({"status": "error", "message": f"路径不是目录: {path}"}), 400
 
         try:
-            # 使用单例索引器设置索引路径并构建索引
-            file_indexer.set_root(path)
-            await file_indexer.count_files()
-            await file_indexer.build_trie()
+            # 在后台构建新索引，构建期间旧索引继续提供搜索，完成后原子替换
+            # 构建完成后再扫描媒体库标签（只读取新增或变化的文件）
+            job_id = file_indexer.start_build(
+                path, on_complete=lambda: media_library.start_scan(path)
+            )
             
-            # 返回成功结果
+            # 立即返回构建任务 id，通过 /api/index_status 查询进度
             return jsonify({
-                "status": "success",
-                "message": f"索引路径设置成功: {path}",
+                "status": "building",
+                "message": f"索引开始构建: {path}",
                 "indexed_path": path,
-                "file_count": len(file_indexer._trie) if file_indexer._trie else 0
-            }), 200
+                "job_id": job_id
+            }), 202
             
         except Exception as e:
             player_logger.error(f"设置索引路径失败: {str(e)}")
             return jsonify({"status": "error", "message": f"设置索引路径失败: {str(e)}"}), 500
+class IndexStatusView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        """
+        获取索引构建状态
+        路由：/api/index_status
+        参数：
+            job_id - 构建任务 id（可选，为空时返回最近一次任务）
+        返回：构建状态、进度，以及当前可用索引的文件数
+        """
+        job_id = request.args.get('job_id', type=str)
+        job = file_indexer.get_build_status(job_id)
+        if job_id and job is None:
+            return jsonify({"status": "error", "message": f"构建任务不存在: {job_id}"}), 404
+
+        return jsonify({
+            "status": "success",
+            "job": job,
+            "index_ready": file_indexer.is_ready(),
+            "file_count": file_indexer.file_count()
+        }), 200
+class LibraryStatusView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        """
+        获取媒体库标签扫描状态
+        路由：/api/library_status
+        返回：扫描状态和进度
+        """
+        return jsonify({
+            "status": "success",
+            "library": media_library.get_status()
+        }), 200
+class StorageStatusView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        """
+        获取各存储根的 I/O 状态
+        路由：/api/storage_status
+        返回：每个存储根的熔断状态、排队数和失败/超时计数，以及播放列表文件存在性缓存和元数据缓存的统计
+        """
+        return jsonify({
+            "status": "success",
+            "storages": io_scheduler.get_status(),
+            "playlist_files": file_status.get_stats(),
+            "metadata_cache": metadata_cache.get_status()
+        }), 200
+class SwitchStatsView(MethodView):
+    @PlayerErrorHandler.create_error_handler
+    async def get(self):
+        """
+        获取最近切歌的延迟统计
+        路由：/api/switch_stats
+        返回：time-to-first-audio（请求开始到开始出声）的最近值 / p50 / p95 / 最大值，以及最近的切歌记录；
+              无缝切歌的提前量和交接间隙；分轨播放的当前轨道、位置校正次数和最近偏差；
+              播放器命令队列的合并 / 丢弃次数和最近命令的排队与执行耗时
+        """
+        return jsonify({
+            "status": "success",
+            "switch_stats": player_manager.track_switch.get_stats(),
+            "gapless": player_manager.gapless.get_stats(),
+            "stems": player_manager.stems.get_status(),
+            "commands": player_manager.commands.get_status()
+        }), 200
 class RestartView(MethodView):
     @PlayerErrorHandler.create_error_handler
     async def get(self):
@@ -937,6 +1310,9 @@ class AIseparatesaudioView(MethodView):
             
             # 返回结果
             if result.get("status") == "success":
+                # 正在播放的曲目分离完成后立即预加载分轨
+                if file_path == player_manager.current_file:
+                    await player_manager.commands.run(Command.CALL, player_manager.stems.prepare, file_path)
                 return jsonify({
                     "status": "success",
                     "message": "音频分离完成",
@@ -981,8 +1357,8 @@ class SetAudioTrackView(MethodView):
                 "message": "无效的音频轨道索引，必须为0、1或2"
             }), 400
         try:
-            # 调用播放器设置音频轨道方法
-            player_manager.switch_audio_track(track)
+            # 由命令队列调用播放器设置音频轨道方法（交叉淡化需要几十毫秒）
+            await player_manager.commands.run(Command.AUDIO_TRACK, track)
             
             return jsonify({
                 "status": "success",
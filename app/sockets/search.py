@@ -0,0 +1,121 @@
+# app/sockets/search.py
+"""
+Socket.IO 边输入边搜索
+每个客户端同时只有一个进行中的查询，新查询会取消旧查询，结果按相关度分批推送
+"""
+import asyncio
+import threading
+from typing import Dict
+
+from app.core.search_file import file_indexer, SearchCancelled
+from app.core.media_library import media_library, is_field_query
+from app.core.logging import player_logger
+
+# sid -> 当前查询的取消标记
+_active_searches: Dict[str, threading.Event] = {}
+
+# 每批推送的结果数
+DEFAULT_BATCH_SIZE = 100
+# 单次查询最多推送的结果数
+DEFAULT_LIMIT = 2000
+
+
+def cancel_client_search(sid: str):
+    """取消指定客户端进行中的查询（客户端断开或发起新查询时调用）"""
+    cancel = _active_searches.pop(sid, None)
+    if cancel:
+        cancel.set()
+
+
+def register_search_events(sio):
+
+    @sio.on('search')
+    async def handle_search(sid, data):
+        """
+        处理搜索请求
+        参数：keyword, query_id, re, media_only, batch_size, limit
+        推送：search_results（分批，最后一批 done=True）/ search_error
+        """
+        data = data or {}
+        keyword = str(data.get('keyword', '')).strip()
+        query_id = data.get('query_id')
+        use_regex = bool(data.get('re', False))
+        media_only = bool(data.get('media_only', False))
+        batch_size = max(1, min(int(data.get('batch_size', DEFAULT_BATCH_SIZE) or DEFAULT_BATCH_SIZE), 1000))
+        limit = max(1, int(data.get('limit', DEFAULT_LIMIT) or DEFAULT_LIMIT))
+
+        # 取消该客户端上一个查询，登记新查询
+        cancel_client_search(sid)
+        cancel = threading.Event()
+        _active_searches[sid] = cancel
+
+        async def emit_error(message):
+            await sio.emit('search_error', {"query_id": query_id, "keyword": keyword, "message": message}, to=sid)
+
+        try:
+            if not keyword:
+                await emit_error("搜索关键词不能为空")
+                return
+
+            loop = asyncio.get_running_loop()
+
+            # 字段查询走媒体库标签索引，一次返回
+            if not use_regex and is_field_query(keyword):
+                tracks = await loop.run_in_executor(None, media_library.search, keyword, limit)
+                if cancel.is_set():
+                    return
+                await sio.emit('search_results', {
+                    "query_id": query_id,
+                    "keyword": keyword,
+                    "search_type": "tags",
+                    "offset": 0,
+                    "total": len(tracks),
+                    "files": [track["path"] for track in tracks],
+                    "tracks": tracks,
+                    "done": True
+                }, to=sid)
+                return
+
+            if not file_indexer.is_ready():
+                await emit_error("搜索索引尚未构建")
+                return
+
+            store, ranked = await file_indexer.ranked_search(keyword, use_regex, media_only, cancel)
+            total = len(ranked)
+            count = min(total, limit)
+
+            # 按相关度分批推送，每批之间检查是否已被新查询取消
+            offset = 0
+            while True:
+                if cancel.is_set():
+                    return
+                end = min(offset + batch_size, count)
+                await sio.emit('search_results', {
+                    "query_id": query_id,
+                    "keyword": keyword,
+                    "search_type": "regex" if use_regex else "normal",
+                    "offset": offset,
+                    "total": total,
+                    "files": store.paths(ranked[offset:end]),
+                    "done": end >= count
+                }, to=sid)
+                if end >= count:
+                    return
+                offset = end
+                await asyncio.sleep(0)
+
+        except SearchCancelled:
+            player_logger.debug(f"[Search] 查询已取消: {keyword} ({sid})")
+        except ValueError as e:
+            await emit_error(str(e))
+        except Exception as e:
+            player_logger.error(f"[Search] 搜索失败: {e}")
+            await emit_error(f"搜索失败: {e}")
+        finally:
+            if _active_searches.get(sid) is cancel:
+                del _active_searches[sid]
+
+    @sio.on('search_cancel')
+    async def handle_search_cancel(sid, data=None):
+        """客户端主动取消查询"""
+        cancel_client_search(sid)
@@ -4,6 +4,7 @@ import asyncio
 from quart import current_app
 from app.core.player import player_manager  # 导入单例实例
 from app.core.sync_manager import get_sync_manager  # 导入同步管理器
+from app.sockets.search import cancel_client_search  # 断开时取消进行中的搜索
 
 # 全局变量：保存 sio 实例
 _sio = None
@@ -15,6 +16,9 @@ def register_socket_events(sio):
     @sio.on('connect')
     async def handle_connect(sid, environ):
         print(f"[Socket.IO] 客户端连接: {sid}")
+        # 仅用于搜索的连接（文件管理器）不加入同步广播
+        if 'channel=search' in environ.get('QUERY_STRING', ''):
+            return
         await sio.enter_room(sid, 'sync')
         await sio.enter_room(sid, 'control')
         await broadcast_sync()
@@ -22,6 +26,7 @@ def register_socket_events(sio):
     @sio.on('disconnect')
     async def handle_disconnect(sid):
         print(f"[Socket.IO] 客户端断开: {sid}")
+        cancel_client_search(sid)
 
     @sio.on('control')
     async def handle_control(sid, data):
@@ -43,6 +48,69 @@ def register_socket_events(sio):
         asyncio.create_task(_force_sync_loop())
 
     sio.start_force_sync = start_force_sync
+    sio.start_playlist_patches = start_playlist_patches
+
+
+# ============================= 播放列表增量推送 =============================
+# 合并短时间内的多次修改后再推送（秒）
+PLAYLIST_PATCH_DELAY = 0.05
+_patch_loop = None
+_patch_pending = False
+_patch_version = 0
+_patch_epoch = None
+
+
+def start_playlist_patches():
+    """订阅播放列表版本变化（在事件循环中调用），之后每次修改都推送 playlist_patch 事件"""
+    global _patch_loop, _patch_version, _patch_epoch
+    _patch_loop = asyncio.get_running_loop()
+    _patch_version = player_manager.playlist_changes.version
+    _patch_epoch = player_manager.playlist_changes.epoch
+    player_manager.playlist_changes.add_subscriber(_on_playlist_version)
+
+
+def _on_playlist_version(version):
+    """播放列表变更回调（在修改播放列表的线程中调用，只把推送任务交给事件循环）"""
+    try:
+        _patch_loop.call_soon_threadsafe(_schedule_playlist_patch)
+    except RuntimeError:
+        # 事件循环已关闭
+        pass
+
+
+def _schedule_playlist_patch():
+    global _patch_pending
+    if not _patch_pending:
+        _patch_pending = True
+        asyncio.ensure_future(broadcast_playlist_patch())
+
+
+async def broadcast_playlist_patch():
+    """
+    推送上次推送之后的播放列表变更：
+    {reset: False, from_version, version, epoch, ops, count, total_duration}；
+    记录已丢弃或播放列表被整体替换时推送 {reset: True, version, epoch}，客户端需要全量刷新
+    """
+    global _patch_pending, _patch_version, _patch_epoch
+    await asyncio.sleep(PLAYLIST_PATCH_DELAY)
+    _patch_pending = False
+    if not _sio:
+        return
+
+    loop = asyncio.get_running_loop()
+    changes = await loop.run_in_executor(None, player_manager.get_playlist_changes, _patch_version, _patch_epoch)
+    if changes is None:
+        patch = {
+            "reset": True,
+            "version": player_manager.playlist_changes.version,
+            "epoch": player_manager.playlist_changes.epoch,
+        }
+    elif changes["ops"]:
+        patch = dict({"reset": False, "from_version": _patch_version}, **changes)
+    else:
+        return
+    _patch_version, _patch_epoch = patch["version"], patch["epoch"]
+    await _sio.emit('playlist_patch', patch, room='sync')
 
 
 async def broadcast_sync():
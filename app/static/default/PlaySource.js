@@ -20,6 +20,7 @@ async function initPlaySource() {
 function updatePlaySourceDisplay(playSource) {
     const playlistRadio = document.getElementById('play_source_playlist');
     const directoryRadio = document.getElementById('play_source_directory');
+    const folderRadio = document.getElementById('play_source_folder');
     const hint = document.getElementById('play-source-hint');
     
     if (playSource === 1) {
@@ -36,6 +37,13 @@ function updatePlaySourceDisplay(playSource) {
             hint.textContent = '当前模式：磁盘路径模式（播放列表已锁定为只读）';
             hint.className = 'play-source-hint directory-mode';
         }
+    } else if (playSource === 3) {
+        // 文件夹递归模式
+        if (folderRadio) folderRadio.checked = true;
+        if (hint) {
+            hint.textContent = '当前模式：文件夹递归模式（播放整个文件夹及其子文件夹）';
+            hint.className = 'play-source-hint directory-mode';
+        }
     }
 }
 
@@ -47,7 +55,7 @@ async function updatePlaySource(playSource) {
     
     if (success) {
         updatePlaySourceDisplay(playSource);
-        show.log(`播放来源已更新为: ${playSource === 1 ? '播放列表' : '磁盘路径'}`);
+        show.log(`播放来源已更新为: ${{1: '播放列表', 2: '磁盘路径', 3: '文件夹递归'}[playSource]}`);
         
         // 显示成功提示
         const hint = document.getElementById('play-source-hint');
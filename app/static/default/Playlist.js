@@ -3,25 +3,82 @@
 // 播放列表数据结构
 let playlist = [];
 let currentPlaylistIndex = -1;
+// 本地播放列表对应的服务端版本（用于增量更新）
+let playlistVersion = null;
+let playlistEpoch = null;
 
 // 初始化播放列表
 async function initPlaylist() {
     await refreshPlaylist();
 }
 
-// 刷新播放列表
-async function refreshPlaylist() {
+// 刷新播放列表（已有版本时只取之后的变更，服务端要求时全量刷新）
+async function refreshPlaylist(full = false) {
+    if (!full && playlistVersion !== null) {
+        const { success, data } = await apiGet('api/playlist', { since: playlistVersion, epoch: playlistEpoch });
+        if (success && data && data.reset === false) {
+            applyPlaylistOps(data.ops, data.version, data.epoch);
+            return;
+        }
+        if (success && data && data.playlist) {
+            setPlaylist(data);
+            return;
+        }
+    }
     const { success, data } = await api('api/playlist');
     if (success && data && data.playlist) {
-        playlist = data.playlist;
-        renderPlaylist();
+        setPlaylist(data);
     } else {
         show.log('获取播放列表失败，使用空列表');
         playlist = [];
+        playlistVersion = null;
         renderPlaylist();
     }
 }
 
+// 用全量数据替换本地播放列表
+function setPlaylist(data) {
+    playlist = data.playlist;
+    playlistVersion = data.version ?? null;
+    playlistEpoch = data.epoch ?? null;
+    renderPlaylist();
+}
+
+// 应用服务端的播放列表变更记录
+function applyPlaylistOps(ops, version, epoch) {
+    for (const op of ops) {
+        const index = 'id' in op ? playlist.findIndex(item => item.id === op.id) : -1;
+        if (op.op === 'insert') {
+            playlist.splice(op.index, 0, op.item);
+        } else if (op.op === 'extend') {
+            playlist.push(...op.items);
+        } else if (op.op === 'remove' && index >= 0) {
+            playlist.splice(index, 1);
+        } else if (op.op === 'move' && index >= 0) {
+            const [item] = playlist.splice(index, 1);
+            playlist.splice(op.index, 0, item);
+        } else if (op.op === 'update' && index >= 0) {
+            const { op: _, id, version: __, ...fields } = op;
+            Object.assign(playlist[index], fields);
+        } else if (op.op === 'clear') {
+            playlist = [];
+        }
+    }
+    playlistVersion = version;
+    playlistEpoch = epoch;
+    if (ops.length > 0) renderPlaylist();
+}
+
+// 处理 Socket.IO 推送的播放列表变更
+function handlePlaylistPatch(patch) {
+    if (patch.reset || patch.epoch !== playlistEpoch || patch.from_version !== playlistVersion) {
+        // 本地版本与推送不连续：按版本补齐或全量刷新
+        refreshPlaylist();
+        return;
+    }
+    applyPlaylistOps(patch.ops, patch.version, patch.epoch);
+}
+
 // 渲染播放列表
 function renderPlaylist() {
     const playlistContainer = document.getElementById('playlist-items');
@@ -115,9 +115,9 @@ document.addEventListener('keydown', function(event) {
     }
     // 播放列表快捷键
     else if (event.ctrlKey && event.key === 'r') {
-        // Ctrl+R 刷新播放列表
+        // Ctrl+R 刷新播放列表（全量）
         event.preventDefault();
-        refreshPlaylist();
+        refreshPlaylist(true);
     }
 });
 
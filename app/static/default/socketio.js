@@ -74,6 +74,11 @@ function connectSocket() {
             handleTraditionalChineseToggle(data);
         });
 
+        socket.on('playlist_patch', (data) => {
+            // 处理播放列表增量变更
+            handlePlaylistPatch(data);
+        });
+
         socket.on('disconnect', () => {
             show.log('Socket.IO 断开连接');
             // 检查是否应该恢复轮询
@@ -157,6 +157,9 @@ window.onload = function() {
     if (window.opener) {
         parentWindow = window.opener;
     }
+
+    // 连接搜索通道（Socket.IO 不可用时使用 HTTP 搜索）
+    initSearchSocket();
     
     // 恢复之前的状态
     restorePreviousState();
@@ -666,6 +669,58 @@ let isSearching = false;
 let searchTimeout = null;
 let useRegexSearch = false;
 
+// ===== Socket.IO 边输入边搜索 =====
+// 每次输入只发送一个查询，服务端会取消同一客户端的旧查询并分批推送结果
+let searchSocket = null;
+let searchQueryId = 0;
+let socketSearchFiles = [];
+
+function initSearchSocket() {
+    if (typeof io === 'undefined') return;
+    searchSocket = io(baseApiUrl, {
+        query: { channel: 'search' },
+        transports: ['websocket'],
+        reconnection: true
+    });
+
+    searchSocket.on('search_results', (data) => {
+        // 忽略已被新查询取代的结果
+        if (data.query_id !== searchQueryId) return;
+        if (data.offset === 0) socketSearchFiles = [];
+        socketSearchFiles = socketSearchFiles.concat(data.files);
+
+        const keyword = document.getElementById('searchInput').value.trim();
+        displaySearchResults(socketSearchFiles, keyword, data.total, data.search_type);
+
+        const searchStatus = document.getElementById('searchStatus');
+        const typeText = data.search_type === 'regex' ? '正则' : (data.search_type === 'tags' ? '标签' : '普通');
+        searchStatus.textContent = data.done
+            ? `找到 ${data.total} 个匹配文件 (${typeText}搜索)`
+            : `找到 ${data.total} 个匹配文件，正在加载 ${socketSearchFiles.length}...`;
+        searchStatus.className = data.done ? 'search-status success' : 'search-status searching';
+    });
+
+    searchSocket.on('search_error', (data) => {
+        if (data.query_id !== searchQueryId) return;
+        const searchStatus = document.getElementById('searchStatus');
+        searchStatus.textContent = `搜索失败: ${data.message || '未知错误'}`;
+        searchStatus.className = 'search-status error';
+    });
+}
+
+// 通过 Socket.IO 发送查询，返回是否已发送
+function performSocketSearch(keyword, cleanedKeyword) {
+    if (!searchSocket || !searchSocket.connected) return false;
+    searchQueryId += 1;
+    socketSearchFiles = [];
+    searchSocket.emit('search', {
+        keyword: cleanedKeyword,
+        re: useRegexSearch,
+        query_id: searchQueryId
+    });
+    return true;
+}
+
 // 切换搜索框显示/隐藏
 function toggleSearch() {
     const searchContainer = document.getElementById('searchContainer');
@@ -706,6 +761,19 @@ function toggleRegexSearch() {
 }
 
 // 构建索引
+// 轮询索引构建任务直到结束，返回最终任务状态
+async function waitForIndexJob(jobId, searchStatus) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 500));
+        const { success, data } = await apiGet('api/index_status', { job_id: jobId });
+        if (!success || !data.job) return null;
+        const job = data.job;
+        if (job.state !== 'running') return job;
+        const progressText = job.progress !== null ? ` (${job.progress}%)` : '';
+        searchStatus.textContent = `正在构建索引... 已扫描 ${job.processed_files} 个文件${progressText}`;
+    }
+}
+
 async function buildIndex() {
     if (!currentPath || currentPath === '') {
         showError('请先选择一个目录');
@@ -724,9 +792,18 @@ async function buildIndex() {
         const { success, data } = await apiGet('api/set_index', { path: currentPath });
         
         if (success) {
-            searchStatus.textContent = `索引构建成功！已索引 ${data.file_count || 0} 个文件`;
-            searchStatus.className = 'search-status success';
-            showSuccess(`索引构建成功，可开始搜索`);
+            // 索引在后台构建（旧索引仍可搜索），轮询构建进度
+            const job = await waitForIndexJob(data.job_id, searchStatus);
+            if (job && job.state === 'done') {
+                searchStatus.textContent = `索引构建成功！已索引 ${job.file_count || 0} 个文件`;
+                searchStatus.className = 'search-status success';
+                showSuccess(`索引构建成功，可开始搜索`);
+            } else {
+                const message = job ? (job.message || job.state) : '未知错误';
+                searchStatus.textContent = `索引构建失败: ${message}`;
+                searchStatus.className = 'search-status error';
+                showError(`索引构建失败: ${message}`);
+            }
         } else {
             searchStatus.textContent = `索引构建失败: ${data.message || '未知错误'}`;
             searchStatus.className = 'search-status error';
@@ -752,8 +829,9 @@ function handleSearch() {
         clearTimeout(searchTimeout);
     }
     
-    // 如果关键词为空，显示正常文件列表
+    // 如果关键词为空，显示正常文件列表（并丢弃进行中查询的结果）
     if (!keyword) {
+        searchQueryId += 1;
         if (currentPath && currentPath !== '') {
             loadDirectory(currentPath);
         } else {
@@ -790,6 +868,11 @@ async function performSearch(keyword) {
         
         // 保存搜索状态到本地存储
         saveSearchState(keyword, useRegexSearch ? 'regex' : 'normal');
+
+        // 优先使用 Socket.IO 搜索，结果由 search_results 事件分批推送
+        if (performSocketSearch(keyword, cleanedKeyword)) {
+            return;
+        }
         
         const { success, data } = await apiPost('api/search', { 
             keyword: cleanedKeyword,
@@ -943,6 +1026,12 @@ function clearSearch() {
         clearTimeout(searchTimeout);
         searchTimeout = null;
     }
+
+    // 取消进行中的 Socket.IO 查询
+    searchQueryId += 1;
+    if (searchSocket && searchSocket.connected) {
+        searchSocket.emit('search_cancel');
+    }
     
     if (currentPath && currentPath !== '') {
         loadDirectory(currentPath);
@@ -2,7 +2,9 @@
 import uvicorn
 from app import create_app
 
-app, socketio_app, sio = create_app()
+# 媒体库扫描的进程池子进程（spawn / forkserver）会以 __mp_main__ 重新导入本模块，子进程中不创建应用
+if __name__ != "__mp_main__":
+    app, socketio_app, sio = create_app()
 
 if __name__ == "__main__":
     print("局域网音频远程控制播放系统（Quart + Socket.IO ASGI）启动中...")
@@ -0,0 +1,129 @@
+# tests/test_dir_cache.py
+"""目录列表缓存的测试（mtime 失效、手动失效、LRU 淘汰、分页与多级展开）"""
+import os
+
+import pytest
+
+from app.core.dir_cache import DirectoryListingCache
+
+
+@pytest.fixture
+def music(tmp_path):
+    root = tmp_path / "music"
+    (root / "album").mkdir(parents=True)
+    (root / "album" / "01.mp3").write_bytes(b"x" * 10)
+    (root / "b.flac").write_bytes(b"")
+    (root / "a.mp3").write_bytes(b"")
+    (root / "cover.jpg").write_bytes(b"")
+    return root
+
+
+def _touch_dir(directory, mtime_ns):
+    """显式设置目录 mtime，避免依赖文件系统的时间精度"""
+    os.utime(directory, ns=(mtime_ns, mtime_ns))
+
+
+def _names(cache, directory):
+    return [e.name for e in cache.get_snapshot(str(directory)).entries]
+
+
+def test_snapshot_reused_while_mtime_unchanged(music):
+    cache = DirectoryListingCache()
+    first = cache.get_snapshot(str(music))
+    assert [e.name for e in first.entries] == ["a.mp3", "album", "b.flac", "cover.jpg"]
+    assert cache.get_snapshot(str(music)) is first
+
+    # 目录 mtime 不变时不重新读取，新文件不可见
+    mtime_ns = os.stat(music).st_mtime_ns
+    (music / "c.mp3").write_bytes(b"")
+    _touch_dir(music, mtime_ns)
+    assert cache.get_snapshot(str(music)) is first
+
+
+def test_mtime_change_triggers_rescan(music):
+    cache = DirectoryListingCache()
+    mtime_ns = os.stat(music).st_mtime_ns
+    first = cache.get_snapshot(str(music))
+
+    (music / "a.mp3").unlink()
+    _touch_dir(music, mtime_ns + 1_000_000_000)
+    second = cache.get_snapshot(str(music))
+    assert second is not first
+    assert [e.name for e in second.entries] == ["album", "b.flac", "cover.jpg"]
+    assert cache.peek(str(music)) is second
+
+
+def test_invalidate_single_and_all(music):
+    cache = DirectoryListingCache()
+    album = music / "album"
+    root_snapshot = cache.get_snapshot(str(music))
+    album_snapshot = cache.get_snapshot(str(album))
+
+    cache.invalidate(str(album))
+    assert cache.peek(str(album)) is None
+    assert cache.peek(str(music)) is root_snapshot
+    assert cache.get_snapshot(str(album)) is not album_snapshot
+
+    cache.invalidate()
+    assert cache.peek(str(music)) is None
+    assert cache.peek(str(album)) is None
+    # 失效后重新读取可以看到 mtime 未变时的新增文件
+    mtime_ns = os.stat(music).st_mtime_ns
+    (music / "c.mp3").write_bytes(b"")
+    _touch_dir(music, mtime_ns)
+    assert "c.mp3" in _names(cache, music)
+
+
+def test_lru_eviction(tmp_path):
+    dirs = []
+    for name in "abc":
+        (tmp_path / name).mkdir()
+        dirs.append(str(tmp_path / name))
+    cache = DirectoryListingCache(max_dirs=2)
+    cache.get_snapshot(dirs[0])
+    cache.get_snapshot(dirs[1])
+    # 访问 a 使 b 成为最久未使用的目录
+    cache.get_snapshot(dirs[0])
+    cache.get_snapshot(dirs[2])
+    assert cache.peek(dirs[1]) is None
+    assert cache.peek(dirs[0]) is not None
+    assert cache.peek(dirs[2]) is not None
+
+
+def test_list_page(music):
+    cache = DirectoryListingCache()
+    total, page1 = cache.list_page(str(music), page=1, page_size=3)
+    assert total == 4
+    assert [e["name"] for e in page1] == ["a.mp3", "album", "b.flac"]
+    assert page1[1]["type"] == "folder"
+    assert page1[0]["media_type"] != page1[1]["media_type"]
+
+    total, page2 = cache.list_page(str(music), page=2, page_size=3)
+    assert total == 4
+    assert [e["name"] for e in page2] == ["cover.jpg"]
+    assert cache.list_page(str(music), page=3, page_size=3) == (4, [])
+    # 页码小于 1 按第一页处理
+    assert cache.list_page(str(music), page=0, page_size=3)[1] == page1
+
+
+def test_list_page_missing_directory(tmp_path):
+    cache = DirectoryListingCache()
+    with pytest.raises(FileNotFoundError):
+        cache.list_page(str(tmp_path / "missing"))
+
+
+def test_list_tree_depth_and_truncation(music):
+    cache = DirectoryListingCache()
+    root, count, truncated = cache.list_tree(str(music), depth=2)
+    assert (count, truncated) == (5, False)
+    album = next(c for c in root["children"] if c["name"] == "album")
+    assert [c["name"] for c in album["children"]] == ["01.mp3"]
+    assert album["children"][0]["size"] == 10
+
+    root, count, truncated = cache.list_tree(str(music), depth=1)
+    album = next(c for c in root["children"] if c["name"] == "album")
+    assert "children" not in album and count == 4
+
+    root, count, truncated = cache.list_tree(str(music), depth=2, max_entries=2)
+    assert (count, truncated) == (2, True)
+    assert root["truncated"] is True
@@ -0,0 +1,131 @@
+# tests/test_folder_source.py
+"""文件夹递归播放来源的测试（遍历顺序、游标恢复、下一首预测）"""
+import os
+import shutil
+
+import pytest
+
+from app.core.folder_source import FolderPlaySource
+
+TREE = [
+    "01.mp3", "02.mp3", "10.mp3",
+    "A/a1.mp3", "A/a2.mp3", "A/deep/d1.mp3",
+    "B/b1.mp3", "B/b2.mp3",
+    "C/c1.mp3", "C/notes.txt",
+]
+ORDER = [p for p in TREE if p.endswith(".mp3")]
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "music"
+    for rel in TREE:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    return root
+
+
+def _source(tmp_path, window=2):
+    source = FolderPlaySource(state_path=str(tmp_path / "folder_source.json"))
+    # 小窗口，让游标在遍历中途就超过已播放的位置
+    source.WINDOW = window
+    source.SHUFFLE_WINDOW = window * 2
+    return source
+
+
+def _rel(root, path):
+    return os.path.relpath(path, root).replace(os.sep, "/") if path else None
+
+
+def _play(source, root, count):
+    return [_rel(root, source.next()) for _ in range(count)]
+
+
+def test_sequential_order_and_wraparound(tmp_path, root):
+    source = _source(tmp_path)
+    first = _rel(root, source.start(str(root)))
+    played = [first] + _play(source, root, len(ORDER) - 1)
+    assert played == ORDER
+    # 一轮播完从头开始
+    assert _play(source, root, 2) == ORDER[:2]
+
+
+def test_previous_then_next_returns_to_same_tracks(tmp_path, root):
+    source = _source(tmp_path)
+    source.start(str(root))
+    _play(source, root, 3)
+    assert _rel(root, source.previous()) == ORDER[2]
+    assert _rel(root, source.previous()) == ORDER[1]
+    assert _play(source, root, 3) == ORDER[2:5]
+
+
+def _resume_after(tmp_path, root, played_count, folder):
+    """
+    播放 played_count 首后保存，删除游标指向的文件（folder 为 True 时删除它所在的文件夹），
+    再从保存的状态继续播放剩余曲目
+    """
+    source = _source(tmp_path)
+    played = [_rel(root, source.start(str(root)))] + _play(source, root, played_count - 1)
+    source.save()
+    cursor = _rel(root, source.get_status()["cursor"])
+    remove = cursor.rsplit("/", 1)[0] if folder else cursor
+
+    target = root / remove
+    if target.is_dir():
+        shutil.rmtree(target)
+    else:
+        target.unlink()
+
+    restored = _source(tmp_path)
+    restored.load()
+    expected = [p for p in ORDER[played_count:] if not (p == remove or p.startswith(remove + "/"))]
+    played += _play(restored, root, len(expected))
+    return cursor, played, expected
+
+
+def test_resume_when_cursor_file_deleted(tmp_path, root):
+    cursor, played, expected = _resume_after(tmp_path, root, 3, folder=False)
+    # 游标是已生成（预读）的最后一个文件，位于尚未播放的部分
+    assert cursor in ORDER[3:]
+    assert played == ORDER[:3] + expected
+    assert cursor not in played
+
+
+def test_resume_when_cursor_folder_deleted(tmp_path, root):
+    cursor, played, expected = _resume_after(tmp_path, root, 4, folder=True)
+    assert cursor.startswith("A/")
+    assert played[4:] == expected
+    assert not any(p.startswith("A/") for p in played[4:])
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_peek_next_agrees_with_next(tmp_path, root, shuffle):
+    source = _source(tmp_path)
+    played = [source.start(str(root), shuffle=shuffle)]
+    peeked = 0
+    for _ in range(3 * len(ORDER)):
+        predicted = source.peek_next()
+        # 预测不改变状态：重复预测结果相同
+        assert source.peek_next() == predicted
+        actual = source.next()
+        if predicted is not None:
+            peeked += 1
+            assert predicted == actual
+        played.append(actual)
+    # 只在一轮结束、需要重新开始时无法预测
+    assert peeked >= 3 * len(ORDER) - 3
+    # 每一轮都恰好播放每个文件一次
+    for start in range(0, len(played) - len(ORDER) + 1, len(ORDER)):
+        assert sorted(_rel(root, p) for p in played[start:start + len(ORDER)]) == sorted(ORDER)
+
+
+def test_shuffle_peek_after_previous(tmp_path, root):
+    source = _source(tmp_path)
+    source.start(str(root), shuffle=True)
+    source.next()
+    source.next()
+    back = source.previous()
+    predicted = source.peek_next()
+    assert predicted is not None and predicted != back
+    assert source.next() == predicted
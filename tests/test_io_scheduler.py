@@ -0,0 +1,114 @@
+# tests/test_io_scheduler.py
+"""存储 I/O 调度器的排队名额和熔断测试"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.io_scheduler import IOScheduler, StorageTimeoutError, StorageUnavailableError
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = IOScheduler()
+    scheduler.MAX_WORKERS_PER_ROOT = 1
+    yield scheduler
+    scheduler.shutdown()
+
+
+def _status(scheduler):
+    [status] = scheduler.get_status()
+    return status
+
+
+def _wait_idle(scheduler, timeout=5):
+    deadline = time.time() + timeout
+    while _status(scheduler)["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+    return _status(scheduler)["pending"]
+
+
+def test_timed_out_queued_calls_release_pending(scheduler, tmp_path):
+    release = threading.Event()
+    blocker = scheduler.submit(str(tmp_path), release.wait, 5)
+    for _ in range(3):
+        with pytest.raises(StorageTimeoutError):
+            scheduler.call(str(tmp_path), time.sleep, 0, timeout=0.05)
+    release.set()
+    blocker.result(5)
+    assert _wait_idle(scheduler) == 0
+    assert _status(scheduler)["total_timeouts"] == 3
+
+
+def test_pending_limit_recovers_after_timeouts(scheduler, tmp_path):
+    scheduler.MAX_PENDING_PER_ROOT = 2
+    scheduler.FAILURE_THRESHOLD = 100
+    release = threading.Event()
+    blocker = scheduler.submit(str(tmp_path), release.wait, 5)
+    for _ in range(5):
+        with pytest.raises(StorageTimeoutError):
+            scheduler.call(str(tmp_path), time.sleep, 0, timeout=0.02)
+    release.set()
+    blocker.result(5)
+    assert scheduler.call(str(tmp_path), lambda: "ok", timeout=5) == "ok"
+
+
+def test_cancelled_async_call_releases_pending(scheduler, tmp_path):
+    release = threading.Event()
+    blocker = scheduler.submit(str(tmp_path), release.wait, 5)
+
+    async def cancel_queued_call():
+        task = asyncio.ensure_future(scheduler.run(str(tmp_path), time.sleep, 0, timeout=5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_queued_call())
+    assert _status(scheduler)["pending"] == 1
+    release.set()
+    blocker.result(5)
+    assert _wait_idle(scheduler) == 0
+    # 请求断开不计入熔断
+    assert _status(scheduler)["consecutive_failures"] == 0
+
+
+def test_late_success_does_not_close_breaker(scheduler, tmp_path):
+    scheduler.FAILURE_THRESHOLD = 1
+    release = threading.Event()
+    with pytest.raises(StorageTimeoutError):
+        scheduler.call(str(tmp_path), release.wait, 5, timeout=0.05)
+    assert _status(scheduler)["circuit"] == "open"
+    with pytest.raises(StorageUnavailableError):
+        scheduler.call(str(tmp_path), lambda: None)
+
+    # 已超时的调用迟到完成，不说明存储已恢复
+    release.set()
+    assert _wait_idle(scheduler) == 0
+    assert _status(scheduler)["circuit"] == "open"
+
+
+def test_probe_success_closes_breaker(scheduler, tmp_path):
+    scheduler.FAILURE_THRESHOLD = 1
+    scheduler.RESET_TIMEOUT = 0.05
+    with pytest.raises(OSError):
+        scheduler.call(str(tmp_path), _raise_io_error)
+    assert _status(scheduler)["circuit"] == "open"
+    time.sleep(0.1)
+    assert _status(scheduler)["circuit"] == "half_open"
+    assert scheduler.call(str(tmp_path), lambda: "ok") == "ok"
+    assert _status(scheduler)["circuit"] == "closed"
+    assert _status(scheduler)["consecutive_failures"] == 0
+
+
+def test_file_errors_do_not_trip_breaker(scheduler, tmp_path):
+    scheduler.FAILURE_THRESHOLD = 1
+    with pytest.raises(FileNotFoundError):
+        scheduler.call(str(tmp_path), open, str(tmp_path / "missing"))
+    assert _status(scheduler)["circuit"] == "closed"
+    assert scheduler.path_exists(str(tmp_path))
+
+
+def _raise_io_error():
+    raise OSError(5, "I/O error")
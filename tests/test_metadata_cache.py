@@ -0,0 +1,61 @@
+# tests/test_metadata_cache.py
+"""元数据缓存的测试（外部写入时保留已提取的封面 hash）"""
+import pytest
+
+from app.core.metadata_cache import MetadataCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MetadataCache(db_path=str(tmp_path / "metadata_cache.db"))
+    yield cache
+    cache.close()
+
+
+def _scan_entry(path, size=100, mtime_ns=1, title="Song"):
+    """媒体库扫描写入的记录：不读取封面"""
+    return {"path": path, "size": size, "mtime_ns": mtime_ns, "title": title,
+            "artist": "", "album": "", "duration": 1.0, "bitrate": 0,
+            "samplerate": 0, "channels": 0, "bitdepth": 0}
+
+
+def _reopen(cache):
+    """从数据库重新读取（绕过进程内 LRU）"""
+    reopened = MetadataCache(db_path=cache.db_path)
+    try:
+        return reopened.lookup(["/m/a.mp3", "/m/b.mp3"])
+    finally:
+        reopened.close()
+
+
+def test_scan_keeps_existing_cover(cache):
+    cache.put_many([_scan_entry("/m/a.mp3"), _scan_entry("/m/b.mp3")])
+    entry = cache.lookup(["/m/a.mp3"])["/m/a.mp3"]
+    cache.set_cover(entry, "abc123")
+    cache.set_cover(cache.lookup(["/m/b.mp3"])["/m/b.mp3"], None)
+
+    # 重新扫描（文件未变化）不覆盖已提取的封面，包括“没有封面”的记录
+    cache.put_many([_scan_entry("/m/a.mp3", title="New"), _scan_entry("/m/b.mp3")])
+    for rows in (cache.lookup(["/m/a.mp3", "/m/b.mp3"]), _reopen(cache)):
+        assert rows["/m/a.mp3"]["cover"] == "abc123"
+        assert rows["/m/a.mp3"]["title"] == "New"
+        assert rows["/m/b.mp3"]["cover"] == ""
+
+
+def test_scan_of_changed_file_resets_cover(cache):
+    cache.put_many([_scan_entry("/m/a.mp3")])
+    cache.set_cover(cache.lookup(["/m/a.mp3"])["/m/a.mp3"], "abc123")
+
+    cache.put_many([_scan_entry("/m/a.mp3", mtime_ns=2)])
+    for rows in (cache.lookup(["/m/a.mp3"]), _reopen(cache)):
+        assert rows["/m/a.mp3"]["cover"] is None
+        assert rows["/m/a.mp3"]["mtime_ns"] == 2
+
+
+def test_explicit_cover_overrides(cache):
+    cache.put_many([_scan_entry("/m/a.mp3")])
+    cache.set_cover(cache.lookup(["/m/a.mp3"])["/m/a.mp3"], "abc123")
+
+    cache.put_many([dict(_scan_entry("/m/a.mp3"), cover="def456")])
+    for rows in (cache.lookup(["/m/a.mp3"]), _reopen(cache)):
+        assert rows["/m/a.mp3"]["cover"] == "def456"
@@ -0,0 +1,122 @@
+# tests/test_path_store.py
+"""紧凑路径存储的测试"""
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from app.core.path_store import PathStore, PathStoreBuilder, SearchCancelled
+from app.core.search_file import FileNameIndexerSingleton
+
+FILES = {
+    os.path.join("/music", "Jay Chou"): ["晴天.mp3", "七里香.flac", "cover.jpg"],
+    os.path.join("/music", "Jay Chou", "Live"): ["晴天 (Live).mp3", "notes.txt"],
+    os.path.join("/videos"): ["Concert.MKV", "jay.txt"],
+    os.path.join("/empty"): [],
+}
+
+
+def _build():
+    builder = PathStoreBuilder()
+    for directory, names in FILES.items():
+        builder.add_directory(directory, names)
+    return builder.build()
+
+
+def _all_paths():
+    return [os.path.join(d, n) for d, names in FILES.items() for n in names]
+
+
+@pytest.fixture
+def store():
+    return _build()
+
+
+def _substring_reference(pattern):
+    """逐个路径判断的参照实现"""
+    return [i for i, p in enumerate(_all_paths()) if pattern.lower() in p.lower()]
+
+
+# ============================= 构建和访问 =============================
+def test_build_and_access(store):
+    paths = _all_paths()
+    assert len(store) == len(paths)
+    assert list(store.iter_paths()) == paths
+    assert store.paths(range(len(paths))) == paths
+    assert store.name(1) == "七里香.flac"
+    assert [store.media_type(i) != 0 for i in range(3)] == [True, True, False]
+
+
+@pytest.mark.parametrize("pattern", ["晴天", "JAY", "live", "mp3", ".mkv", "chou" + os.sep + "live", "zzz", ""])
+def test_substring_matches_reference(store, pattern):
+    assert list(store.search_substring(pattern)) == _substring_reference(pattern)
+
+
+def test_media_only_and_regex(store):
+    assert store.paths(store.search_substring("jay", media_only=True)) == [
+        p for p in _all_paths() if "jay" in p.lower() and not p.endswith((".jpg", ".txt"))
+    ]
+    regex = re.compile(r".*\.(mp3|flac)$")
+    assert store.paths(store.search_regex(regex)) == [p for p in _all_paths() if regex.match(p)]
+
+
+def test_refinement_from_candidates(store):
+    """关键词延长时在上一次结果中过滤，结果与全量搜索一致"""
+    for short, longer in (("jay", "jay chou"), ("晴", "晴天 ("), ("m", "mp3"), ("j", "jay" + os.sep)):
+        candidates = store.search_substring(short)
+        assert list(store.search_substring(longer, candidates=candidates)) == _substring_reference(longer)
+
+
+def test_rank_prefers_name_prefix(store):
+    ids = store.search_substring("晴天")
+    ranked = store.paths(store.rank(ids, "晴天"))
+    assert [os.path.basename(p) for p in ranked] == ["晴天.mp3", "晴天 (Live).mp3"]
+    # 仅目录匹配的排在最后
+    ranked = store.paths(store.rank(store.search_substring("jay"), "jay"))
+    assert os.path.basename(ranked[0]) == "jay.txt"
+
+
+def test_cancel_raises(store):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SearchCancelled):
+        store.search_substring("jay", cancel=cancel)
+
+
+def test_save_and_load(store, tmp_path):
+    path = str(tmp_path / "index.bin")
+    store.save(path)
+    loaded = PathStore.load(path)
+    assert list(loaded.iter_paths()) == _all_paths()
+    assert list(loaded.search_substring("jay")) == list(store.search_substring("jay"))
+
+
+def test_load_rejects_old_index_format(tmp_path):
+    path = tmp_path / "old_index.marisa"
+    path.write_bytes(b"We love Marisa." + bytes(range(64)))
+    with pytest.raises(ValueError):
+        PathStore.load(str(path))
+
+
+def test_old_index_file_triggers_rebuild(tmp_path):
+    music = tmp_path / "music"
+    music.mkdir()
+    (music / "a.mp3").write_bytes(b"")
+    old_index = tmp_path / "old_index.marisa"
+    old_index.write_bytes(b"We love Marisa." + bytes(range(64)))
+
+    indexer = FileNameIndexerSingleton()
+    indexer._set_store(None)
+    indexer.set_root(str(music))
+    try:
+        indexer.load_index(str(old_index))
+        deadline = time.time() + 5
+        while indexer.get_build_status()["state"] == "running" and time.time() < deadline:
+            time.sleep(0.01)
+        assert indexer.get_build_status()["state"] == "done"
+        assert list(indexer._store.iter_paths()) == [str(music / "a.mp3")]
+    finally:
+        indexer._set_store(None)
+        indexer.set_root(None)
@@ -0,0 +1,156 @@
+# tests/test_player_commands.py
+"""播放器命令队列合并规则的测试（处理函数只记录调用，返回值与 PlayerManager 的处理函数一致，不需要 VLC）"""
+import threading
+
+import pytest
+
+from app.core.player_commands import Command, PlayerCommandQueue
+
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def handler(self, kind):
+        def run(*args, started=None):
+            self.calls.append((kind, args))
+            if kind == Command.SKIP:
+                # skip_tracks 返回最终播放的文件
+                return f"/music/skip{args[0]}.mp3"
+            if kind == Command.PLAY_FILE:
+                # play_file 返回开始播放的文件
+                return args[0]
+            if kind == Command.AUTO_NEXT:
+                return True
+            return (kind, args)
+        return run
+
+
+@pytest.fixture
+def recorder():
+    return _Recorder()
+
+
+@pytest.fixture
+def queue(recorder):
+    handlers = {kind: recorder.handler(kind) for kind in Command}
+    handlers[Command.CALL] = lambda func, *args: func(*args)
+    return PlayerCommandQueue(handlers)
+
+
+@pytest.fixture
+def busy(queue):
+    """让工作线程阻塞在一个 CALL 上，之后提交的命令都留在队列中等待合并"""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    queue.submit(Command.CALL, block)
+    assert started.wait(5)
+    yield release
+    release.set()
+
+
+def _pending(queue):
+    with queue._lock:
+        return [(c.kind, c.args) for c in queue._queue]
+
+
+def test_skips_are_summed(queue, busy):
+    futures = [queue.submit(Command.SKIP, 1) for _ in range(3)]
+    futures.append(queue.submit(Command.SKIP, -1))
+    assert _pending(queue) == [(Command.SKIP, (2,))]
+    busy.set()
+    assert {f.result(5) for f in futures} == {"/music/skip2.mp3"}
+    assert queue.get_status()["coalesced"] == 3
+
+
+def test_skip_replaces_auto_next(queue, busy):
+    auto = queue.submit(Command.AUTO_NEXT)
+    skip = queue.submit(Command.SKIP, 1)
+    assert _pending(queue) == [(Command.SKIP, (1,))]
+    busy.set()
+    assert auto.result(5) == skip.result(5) == "/music/skip1.mp3"
+
+
+def test_play_file_replaces_pending_track_changes(queue, busy):
+    skip = queue.submit(Command.SKIP, 2)
+    play = queue.submit(Command.PLAY_FILE, "/music/a.mp3")
+    again = queue.submit(Command.PLAY_FILE, "/music/b.mp3")
+    assert _pending(queue) == [(Command.PLAY_FILE, ("/music/b.mp3",))]
+    busy.set()
+    # 被取代的切歌请求得到最终播放的文件（切歌路由据此返回成功）
+    assert skip.result(5) == play.result(5) == again.result(5) == "/music/b.mp3"
+
+
+def test_auto_next_dropped_when_track_change_pending(queue, recorder, busy):
+    queue.submit(Command.PLAY_FILE, "/music/a.mp3")
+    auto = queue.submit(Command.AUTO_NEXT)
+    assert auto.result(5) is None
+    assert queue.get_status()["dropped"] == 1
+    busy.set()
+    queue.call(Command.CALL, lambda: None, timeout=5)
+    assert [kind for kind, _ in recorder.calls] == [Command.PLAY_FILE]
+
+
+def test_seek_and_audio_track_keep_last_until_track_change(queue, busy):
+    queue.submit(Command.SEEK, 0.1)
+    queue.submit(Command.AUDIO_TRACK, 1)
+    queue.submit(Command.SEEK, 0.5)
+    queue.submit(Command.AUDIO_TRACK, 2)
+    queue.submit(Command.SKIP, 1)
+    queue.submit(Command.SEEK, 0.9)
+    assert _pending(queue) == [
+        (Command.SEEK, (0.5,)),
+        (Command.AUDIO_TRACK, (2,)),
+        (Command.SKIP, (1,)),
+        (Command.SEEK, (0.9,)),
+    ]
+
+
+def test_volume_last_wins_anywhere(queue, busy):
+    queue.submit(Command.VOLUME, 10)
+    queue.submit(Command.SKIP, 1)
+    queue.submit(Command.VOLUME, 60)
+    assert _pending(queue) == [(Command.VOLUME, (60,)), (Command.SKIP, (1,))]
+
+
+def test_play_pause_stop_join_identical_tail(queue, busy):
+    queue.submit(Command.PAUSE)
+    queue.submit(Command.PAUSE)
+    queue.submit(Command.PLAY)
+    queue.submit(Command.PAUSE)
+    queue.submit(Command.STOP)
+    queue.submit(Command.STOP)
+    assert [kind for kind, _ in _pending(queue)] == [Command.PAUSE, Command.PLAY, Command.PAUSE, Command.STOP]
+
+
+def test_calls_and_handoffs_are_not_merged(queue, busy):
+    queue.submit(Command.HANDOFF)
+    queue.submit(Command.SKIP, 1)
+    queue.submit(Command.CALL, print)
+    queue.submit(Command.CALL, print)
+    queue.submit(Command.SKIP, 1)
+    assert [kind for kind, _ in _pending(queue)] == [
+        Command.HANDOFF, Command.SKIP, Command.CALL, Command.CALL, Command.SKIP]
+
+
+def test_handler_error_is_raised_to_waiter(queue, busy):
+    def fail():
+        raise RuntimeError("boom")
+
+    future = queue.submit(Command.CALL, fail)
+    busy.set()
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    # 工作线程在出错后继续执行后续命令
+    assert queue.call(Command.SKIP, 1, timeout=5) == "/music/skip1.mp3"
+
+
+def test_cancelled_waiter_does_not_stop_worker(queue, busy):
+    cancelled = queue.submit(Command.SKIP, 1)
+    cancelled.cancel()
+    busy.set()
+    assert queue.call(Command.VOLUME, 30, timeout=5) == (Command.VOLUME, (30,))
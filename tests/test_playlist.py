@@ -0,0 +1,275 @@
+# tests/test_playlist.py
+"""播放列表（隐式 treap）和播放列表日志的测试，不需要 VLC / Quart"""
+import json
+import random
+
+from app.core.playlist import IndexedPlaylist
+from app.core.playlist_journal import PlaylistJournal
+
+
+def _paths(playlist):
+    return [item.path for item in playlist]
+
+
+def _make(count):
+    playlist = IndexedPlaylist()
+    for i in range(count):
+        playlist.append(f"song{i}", f"/music/{i}.mp3", duration=10.0)
+    return playlist
+
+
+# ============================= treap =============================
+def test_insert_and_positions():
+    playlist = _make(5)
+    playlist.insert(0, "first", "/music/first.mp3")
+    playlist.insert(3, "middle", "/music/middle.mp3")
+    playlist.insert(100, "last", "/music/last.mp3")
+
+    expected = ["/music/first.mp3", "/music/0.mp3", "/music/1.mp3", "/music/middle.mp3",
+                "/music/2.mp3", "/music/3.mp3", "/music/4.mp3", "/music/last.mp3"]
+    assert _paths(playlist) == expected
+    assert len(playlist) == len(expected)
+    for index, path in enumerate(expected):
+        item = playlist.get_by_path(path)
+        assert playlist.index_of(item) == index
+        assert playlist.item_at(index) is item
+    assert playlist.item_at(-1).path == "/music/last.mp3"
+    assert playlist.next_item(playlist.item_at(-1)) is None
+    assert playlist.prev_item(playlist.item_at(0)) is None
+    assert playlist.next_item(playlist.item_at(2)).path == "/music/middle.mp3"
+    assert playlist.prev_item(playlist.item_at(3)).path == "/music/1.mp3"
+
+
+def test_duplicate_path_rejected():
+    playlist = _make(2)
+    try:
+        playlist.append("again", "/music/0.mp3")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("重复路径应抛出 ValueError")
+    assert playlist.extend([{"name": "again", "path": "/music/1.mp3"}]) == []
+    assert len(playlist) == 2
+
+
+def test_ids_are_stable():
+    playlist = _make(4)
+    ids = [item.id for item in playlist]
+    assert ids == [1, 2, 3, 4]
+
+    playlist.remove(2)
+    playlist.move(4, 0)
+    assert [item.id for item in playlist] == [4, 1, 3]
+    assert playlist.get(2) is None
+    assert "/music/1.mp3" not in playlist
+
+    # 删除后的 id 不会重新分配
+    added = playlist.append("new", "/music/new.mp3")
+    assert added.id == 5
+    assert playlist.get(5) is added
+
+
+def test_move_and_remove():
+    playlist = _make(5)
+    playlist.move(1, 4)
+    assert [item.id for item in playlist] == [2, 3, 4, 5, 1]
+    playlist.move(5, 0)
+    assert [item.id for item in playlist] == [5, 2, 3, 4, 1]
+    assert playlist.move(99, 0) is None
+
+    removed = playlist.remove(3)
+    assert removed.path == "/music/2.mp3"
+    assert playlist.remove(3) is None
+    assert [item.id for item in playlist] == [5, 2, 4, 1]
+    assert playlist.total_duration == 40.0
+    assert playlist.find_by_name("song2") is None
+
+
+def test_random_operations_match_list():
+    rng = random.Random(1234)
+    playlist = IndexedPlaylist()
+    model = []
+    counter = 0
+    for _ in range(2000):
+        op = rng.random()
+        if op < 0.4 or not model:
+            counter += 1
+            index = rng.randint(0, len(model))
+            item = playlist.insert(index, f"n{counter}", f"/p/{counter}")
+            model.insert(index, item.id)
+        elif op < 0.7:
+            item_id = rng.choice(model)
+            index = rng.randint(0, len(model) - 1)
+            playlist.move(item_id, index)
+            model.remove(item_id)
+            model.insert(index, item_id)
+        else:
+            item_id = rng.choice(model)
+            playlist.remove(item_id)
+            model.remove(item_id)
+    assert [item.id for item in playlist] == model
+    assert [playlist.item_at(i).id for i in range(len(model))] == model
+    assert all(playlist.index_of(playlist.get(item_id)) == i for i, item_id in enumerate(model))
+
+
+# ============================= 变更记录重放 =============================
+def test_apply_replays_change_records():
+    source = _make(3)
+    records = []
+    source.add_listener(records.append)
+
+    source.insert(1, "inserted", "/music/inserted.mp3", artist="A", duration=5.0)
+    source.extend([{"name": "x", "path": "/music/x.mp3"}, {"name": "y", "path": "/music/y.mp3"}])
+    source.move(1, 5)
+    source.remove(2)
+    source.update(3, artist="B", title="T", duration=7.0)
+    assert [r["op"] for r in records] == ["insert", "extend", "move", "remove", "update"]
+
+    replica = IndexedPlaylist(_make(3).to_list())
+    for record in records:
+        replica.apply(json.loads(json.dumps(record)))
+    assert replica.to_list() == source.to_list()
+    assert replica.total_duration == source.total_duration
+
+    # 之后新加的项目 id 与原播放列表一致
+    assert replica.append("z", "/music/z.mp3").id == source.append("z", "/music/z.mp3").id
+
+
+def test_apply_clear_and_unknown_ids():
+    playlist = _make(3)
+    playlist.apply({"op": "remove", "id": 42})
+    playlist.apply({"op": "move", "id": 42, "index": 0})
+    assert len(playlist) == 3
+    playlist.apply({"op": "clear"})
+    assert len(playlist) == 0 and not playlist
+
+
+# ============================= 日志 =============================
+def _journal(tmp_path):
+    return PlaylistJournal(snapshot_path=str(tmp_path / "playlist.json"),
+                           journal_path=str(tmp_path / "playlist.journal"))
+
+
+def _restore(journal):
+    items, records = journal.load()
+    playlist = IndexedPlaylist(items or [])
+    for record in records:
+        playlist.apply(record)
+    return playlist
+
+
+def _open(journal, playlist):
+    playlist.add_listener(journal.append)
+    journal.open(lambda: (playlist.to_list(), journal.rotate()))
+
+
+def test_journal_replays_records_after_snapshot(tmp_path):
+    journal = _journal(tmp_path)
+    playlist = IndexedPlaylist()
+    _open(journal, playlist)
+    playlist.extend([{"name": f"s{i}", "path": f"/m/{i}"} for i in range(4)])
+    playlist.move(1, 3)
+    assert journal.compact() == 4
+
+    playlist.remove(2)
+    playlist.append("later", "/m/later")
+    journal.close()
+
+    with open(journal.snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["seq"] == 2
+
+    restored = _journal(tmp_path)
+    items, records = restored.load()
+    assert len(items) == 4
+    assert [r["seq"] for r in records] == [3, 4]
+    assert _restore(_journal(tmp_path)).to_list() == playlist.to_list()
+
+
+def test_journal_skips_records_already_in_snapshot(tmp_path):
+    journal = _journal(tmp_path)
+    playlist = _make(2)
+    journal.write_snapshot(playlist.to_list(), 3)
+    lines = [
+        {"op": "remove", "id": 1, "seq": 2},
+        {"op": "move", "id": 2, "index": 0, "seq": 3},
+        {"op": "insert", "index": 0, "item": {"id": 7, "name": "n", "path": "/n"}, "seq": 4},
+    ]
+    with open(journal.journal_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+        # 末尾写了一半的记录被忽略
+        f.write('{"op": "remove", "id"')
+
+    items, records = journal.load()
+    assert [r["seq"] for r in records] == [4]
+    assert _paths(_restore(_journal(tmp_path))) == ["/n", "/music/0.mp3", "/music/1.mp3"]
+
+
+def test_journal_recovers_leftover_compacting_file(tmp_path):
+    journal = _journal(tmp_path)
+    playlist = IndexedPlaylist()
+    _open(journal, playlist)
+    playlist.extend([{"name": f"s{i}", "path": f"/m/{i}"} for i in range(3)])
+    playlist.remove(1)
+    # 模拟压缩中断：日志已改名为 .compacting，快照还没写入
+    journal.rotate()
+    playlist.append("after", "/m/after")
+    journal.close()
+    assert (tmp_path / "playlist.journal.compacting").exists()
+    assert not (tmp_path / "playlist.json").exists()
+
+    recovered = _journal(tmp_path)
+    assert _restore(recovered).to_list() == playlist.to_list()
+
+    # 再次打开后压缩：旧的 .compacting 日志合并进快照并删除
+    replica = _restore(recovered)
+    _open(recovered, replica)
+    replica.append("more", "/m/more")
+    recovered.compact()
+    recovered.close()
+    assert not (tmp_path / "playlist.journal.compacting").exists()
+    assert _paths(_restore(_journal(tmp_path))) == ["/m/1", "/m/2", "/m/after", "/m/more"]
+
+
+def test_corrupt_snapshot_is_moved_aside_not_overwritten(tmp_path):
+    journal = _journal(tmp_path)
+    (tmp_path / "playlist.json").write_text('{"playlist": [', encoding="utf-8")
+    with open(journal.journal_path, "w", encoding="utf-8") as f:
+        for seq in (1, 2, 3):
+            f.write(json.dumps({"op": "remove", "id": seq, "seq": seq}) + "\n")
+
+    try:
+        journal.load()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("损坏的快照应抛出 ValueError")
+    assert not journal.can_compact
+
+    # 没有移走损坏的文件之前不压缩
+    playlist = IndexedPlaylist()
+    _open(journal, playlist)
+    try:
+        journal.compact()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("读取失败时不应压缩")
+    journal.close()
+    assert (tmp_path / "playlist.json").read_text(encoding="utf-8") == '{"playlist": ['
+
+    moved = journal.quarantine()
+    assert sorted(moved) == sorted([str(tmp_path / "playlist.json.corrupt"),
+                                    str(tmp_path / "playlist.journal.corrupt")])
+    assert journal.can_compact
+    assert not (tmp_path / "playlist.json").exists()
+
+    # 新记录的序号接在读到的记录之后
+    _open(journal, playlist)
+    playlist.append("new", "/m/new")
+    journal.close()
+    with open(journal.journal_path, encoding="utf-8") as f:
+        assert [json.loads(line)["seq"] for line in f] == [4]
+    assert (tmp_path / "playlist.json.corrupt").read_text(encoding="utf-8") == '{"playlist": ['
+    assert _paths(_restore(_journal(tmp_path))) == ["/m/new"]
@@ -0,0 +1,88 @@
+# tests/test_playlist_changes.py
+"""播放列表版本号和增量变更的测试"""
+from app.core.playlist import IndexedPlaylist
+from app.core.playlist_changes import PlaylistChangeLog
+
+
+def _log_with_playlist():
+    changes = PlaylistChangeLog()
+    playlist = IndexedPlaylist()
+    playlist.add_listener(changes.record)
+    return changes, playlist
+
+
+def test_since_returns_changes_after_version():
+    changes, playlist = _log_with_playlist()
+    playlist.append("a", "/a")
+    version = changes.version
+    playlist.append("b", "/b")
+    playlist.move(2, 0)
+
+    records = changes.since(version, changes.epoch)
+    assert [r["op"] for r in records] == ["insert", "move"]
+    assert [r["version"] for r in records] == [version + 1, version + 2]
+    assert changes.since(changes.version, changes.epoch) == []
+    assert changes.since(0) == changes.since(0, changes.epoch)
+    assert len(changes.since(0)) == 3
+    # 客户端的版本比服务端新（服务端已重启）
+    assert changes.since(changes.version + 1) is None
+
+
+def test_replaying_changes_reproduces_playlist():
+    changes, playlist = _log_with_playlist()
+    playlist.extend([{"name": str(i), "path": f"/{i}"} for i in range(5)])
+    client = IndexedPlaylist(playlist.to_list())
+    version = changes.version
+
+    playlist.remove(3)
+    playlist.insert(1, "x", "/x")
+    playlist.update(1, artist="A")
+    for record in changes.since(version, changes.epoch):
+        client.apply(record)
+    assert client.to_list() == playlist.to_list()
+
+
+def test_reset_requires_full_refresh():
+    changes, playlist = _log_with_playlist()
+    playlist.append("a", "/a")
+    old_epoch, old_version = changes.epoch, changes.version
+
+    changes.reset()
+    assert changes.epoch != old_epoch
+    assert changes.version == old_version + 1
+    # 重置前的版本：无论是否带纪元都需要全量刷新
+    assert changes.since(old_version, old_epoch) is None
+    assert changes.since(old_version) is None
+    assert changes.since(changes.version, old_epoch) is None
+
+    # 全量刷新后拿到新的纪元和版本，之后的修改可以增量获取
+    epoch, version = changes.epoch, changes.version
+    assert changes.since(version, epoch) == []
+    playlist.append("b", "/b")
+    assert [r["item"]["path"] for r in changes.since(version, epoch)] == ["/b"]
+    assert changes.since(old_version) is None
+
+
+def test_trimmed_history_requires_full_refresh():
+    changes, playlist = _log_with_playlist()
+    changes.MAX_RECORDS = 3
+    for i in range(5):
+        playlist.append(str(i), f"/{i}")
+    assert changes.since(1) is None
+    assert [r["version"] for r in changes.since(2)] == [3, 4, 5]
+
+    # 大的 extend 记录按项目数计入上限
+    changes.MAX_ITEMS = 10
+    playlist.extend([{"name": f"e{i}", "path": f"/e{i}"} for i in range(9)])
+    assert changes.since(3) is None
+    assert [r["version"] for r in changes.since(4)] == [5, 6]
+    assert [r["op"] for r in changes.since(5)] == ["extend"]
+
+
+def test_subscribers_receive_versions():
+    changes, playlist = _log_with_playlist()
+    seen = []
+    changes.add_subscriber(seen.append)
+    playlist.append("a", "/a")
+    changes.reset()
+    assert seen == [1, 2]
@@ -0,0 +1,77 @@
+# tests/test_search_cache.py
+"""搜索结果缓存（按索引代数失效）的测试"""
+import asyncio
+import os
+from array import array
+
+from app.core.path_store import PathStoreBuilder
+from app.core.search_file import FileNameIndexerSingleton, SearchResultCache
+
+FILES = {
+    os.path.join("/music", "Jay Chou"): ["晴天.mp3", "七里香.flac", "cover.jpg"],
+    os.path.join("/music", "Jay Chou", "Live"): ["晴天 (Live).mp3", "notes.txt"],
+    os.path.join("/videos"): ["Concert.MKV", "jay.txt"],
+}
+
+
+def _build():
+    builder = PathStoreBuilder()
+    for directory, names in FILES.items():
+        builder.add_directory(directory, names)
+    return builder.build()
+
+
+def _matches(pattern):
+    paths = [os.path.join(d, n) for d, names in FILES.items() for n in names]
+    return [p for p in paths if pattern.lower() in p.lower()]
+
+
+def test_cache_invalidated_by_newer_generation():
+    cache = SearchResultCache()
+    ids = array('I', [1, 2])
+    cache.put(1, ("substring", "a"), ids)
+    assert cache.get(1, ("substring", "a")) == ids
+    assert cache.find_refinable(1, "ab") == ids
+    assert cache.get(2, ("substring", "a")) is None
+    assert cache.get(1, ("substring", "a")) is None
+
+
+def test_stale_generation_does_not_clear_cache():
+    cache = SearchResultCache()
+    ids = array('I', [3])
+    cache.put(2, ("substring", "a"), ids)
+    # 读到旧索引的查询：不命中、不写入，也不清空当前代数的缓存
+    assert cache.get(1, ("substring", "a")) is None
+    assert cache.find_refinable(1, "ab") is None
+    cache.put(1, ("substring", "b"), array('I', [9]))
+    assert cache.get(2, ("substring", "a")) == ids
+    assert cache.get(2, ("substring", "b")) is None
+
+
+def test_cache_lru_and_refinable_choice():
+    cache = SearchResultCache(max_size=2)
+    cache.put(1, ("substring", "a"), array('I', [1, 2, 3]))
+    cache.put(1, ("substring", "ab"), array('I', [1]))
+    cache.put(1, ("regex", "a"), array('I', [5]))
+    assert cache.get(1, ("substring", "a")) is None
+    assert list(cache.find_refinable(1, "abc")) == [1]
+
+
+def test_indexer_search_uses_generation():
+    indexer = FileNameIndexerSingleton()
+    indexer._set_store(_build())
+    try:
+        total, paths = asyncio.run(indexer.search_page("jay", page=1, page_size=2))
+        assert total == len(_matches("jay"))
+        assert paths == _matches("jay")[:2]
+        # 延长关键词命中缓存的上一次结果
+        _, paths = asyncio.run(indexer.search_page("jay chou"))
+        assert paths == _matches("jay chou")
+
+        # 替换索引后旧缓存失效
+        builder = PathStoreBuilder()
+        builder.add_directory("/other", ["jay.mp3"])
+        indexer._set_store(builder.build())
+        assert asyncio.run(indexer.search_page("jay")) == (1, [os.path.join("/other", "jay.mp3")])
+    finally:
+        indexer._set_store(None)
@@ -0,0 +1,123 @@
+# tests/test_shuffle.py
+"""随机播放顺序（ShuffleBag）的测试"""
+import pytest
+
+from app.core.shuffle import ShuffleBag
+
+
+@pytest.fixture
+def bag(tmp_path):
+    bag = ShuffleBag(state_path=str(tmp_path / "shuffle_state.json"))
+    bag.load(range(1, 11))
+    return bag
+
+
+def _upcoming(bag):
+    ids, _ = bag.peek(1, 0, len(bag) + 1)
+    return ids
+
+
+def _played(bag):
+    ids, _ = bag.peek(-1, 0, len(bag) + 1)
+    return ids
+
+
+def _advance(bag, count):
+    """按随机顺序播放 count 首，返回播放的项目 id"""
+    order = []
+    while len(order) < count and not bag.exhausted():
+        next_id = _upcoming(bag)[0]
+        bag.mark_played(next_id)
+        order.append(next_id)
+    return order
+
+
+def _play_all(bag):
+    return _advance(bag, len(bag))
+
+
+def test_one_round_plays_every_item_once(bag):
+    assert len(bag) == 10
+    assert sorted(_upcoming(bag)) == list(range(1, 11))
+    order = _play_all(bag)
+    assert sorted(order) == list(range(1, 11))
+    # 已播放的部分由近到远
+    assert _played(bag) == order[-2::-1]
+
+
+def test_peek_pages_with_offset(bag):
+    first, offset = bag.peek(1, 0, 4)
+    second, offset = bag.peek(1, offset, 4)
+    third, offset = bag.peek(1, offset, 4)
+    assert len(first) == 4 and len(second) == 4 and len(third) == 2
+    assert offset is None
+    assert first + second + third == _upcoming(bag)
+
+
+def test_mark_played_history_item_moves_cursor_back(bag):
+    order = _advance(bag, 3)
+    bag.mark_played(order[0])
+    assert _played(bag) == []
+    assert _upcoming(bag)[:2] == order[1:]
+
+
+def test_reshuffle_starts_with_current(bag):
+    _play_all(bag)
+    assert bag.exhausted()
+    bag.reshuffle(current_id=5)
+    assert not bag.exhausted()
+    assert 5 not in _upcoming(bag)
+    assert sorted(_upcoming(bag) + [5]) == list(range(1, 11))
+
+
+def test_playlist_changes_update_order_in_place(bag):
+    played = _advance(bag, 3)
+    upcoming = _upcoming(bag)
+
+    # 删除已播放的项目留下空位，上一首时跳过
+    bag.apply({"op": "remove", "id": played[1]})
+    assert _played(bag) == [played[0]]
+    assert len(bag) == 9
+    # 删除尚未播放的项目
+    bag.apply({"op": "remove", "id": upcoming[0]})
+    # 新项目只进入尚未播放的部分
+    bag.apply({"op": "insert", "index": 0, "item": {"id": 11}})
+    bag.apply({"op": "extend", "items": [{"id": 12}, {"id": 13}]})
+    bag.apply({"op": "move", "id": 11, "index": 3})
+
+    assert len(bag) == 11
+    assert sorted(_upcoming(bag)) == sorted(set(upcoming[1:]) | {11, 12, 13})
+
+    bag.apply({"op": "clear"})
+    assert len(bag) == 0 and bag.exhausted()
+
+
+def test_save_and_load_keeps_order_and_cursor(bag):
+    order = _advance(bag, 4)
+    bag.apply({"op": "remove", "id": order[1]})
+    played, upcoming = _played(bag), _upcoming(bag)
+    bag.save()
+
+    restored = ShuffleBag(state_path=bag.state_path)
+    restored.load([i for i in range(1, 11) if i != order[1]])
+    # 保存时清除空位，当前项目和两个方向的顺序不变
+    assert _played(restored) == played == [order[2], order[0]]
+    assert _upcoming(restored) == upcoming
+    restored.mark_played(order[0])
+    assert _upcoming(restored)[:2] == [order[2], order[3]]
+
+
+def test_sync_drops_missing_and_adds_new(bag):
+    bag.mark_played(_upcoming(bag)[0])
+    bag.sync(list(range(5, 15)))
+    assert len(bag) == 10
+    assert set(_played(bag) + _upcoming(bag)) <= set(range(5, 15))
+    assert {11, 12, 13, 14} <= set(_upcoming(bag))
+
+
+def test_corrupt_state_reshuffles(tmp_path):
+    path = tmp_path / "shuffle_state.json"
+    path.write_text("{not json", encoding="utf-8")
+    bag = ShuffleBag(state_path=str(path))
+    bag.load([1, 2, 3])
+    assert sorted(_upcoming(bag)) == [1, 2, 3]